@@ -11,6 +11,9 @@ import os
 import json
 import tarfile
 import zipfile
+import zlib
+import mmap
+import threading
 import time
 import shutil
 import logging
@@ -74,7 +77,50 @@ def dumpCSV (dataframe, out_file_pathname, separator=" "):
     dataframe.to_csv(out_file_pathname, sep=separator, index=False)
 
     return None
-#~ dumpCSV()         
+#~ dumpCSV()
+
+# Linux ioctl to clone a file's extents (reflink), from linux/fs.h
+_FICLONE = 0x40049409
+
+class StagingMethods(object):
+    HARDLINK = "hardlink"
+    REFLINK = "reflink"
+    COPY = "copy"
+#~ class StagingMethods
+
+def stage_file (src_file_pathname, dest_file_pathname):
+    '''
+    Make dest a file with the content of src without copying the data
+    when the file system allows it: hard link first, then reflink
+    (copy-on-write clone), and copy as last resort. An existing dest is
+    removed first, so that writing into a previously hard-linked dest
+    never changes its source.
+    The staged file must not be modified in place afterward.
+
+    :param src_file_pathname: Pathname of the file to stage.
+    :param dest_file_pathname: Pathname of the staged file.
+    :returns: the StagingMethods used.
+    '''
+    if os.path.lexists(dest_file_pathname):
+        os.remove(dest_file_pathname)
+    try:
+        os.link(src_file_pathname, dest_file_pathname)
+        return StagingMethods.HARDLINK
+    except OSError:
+        pass
+    try:
+        import fcntl
+        with open(src_file_pathname, 'rb') as src_fp:
+            with open(dest_file_pathname, 'wb') as dest_fp:
+                fcntl.ioctl(dest_fp.fileno(), _FICLONE, src_fp.fileno())
+        shutil.copystat(src_file_pathname, dest_file_pathname)
+        return StagingMethods.REFLINK
+    except (ImportError, OSError):
+        if os.path.lexists(dest_file_pathname):
+            os.remove(dest_file_pathname)
+    shutil.copy2(src_file_pathname, dest_file_pathname)
+    return StagingMethods.COPY
+#~ stage_file()
 
 class TarGz:
     """
@@ -93,7 +139,11 @@ class TarGz:
 
     @classmethod
     def _add_fd_function(cls, handle, in_directory, *args, **kwargs):
-        handle.add(in_directory, *args, **kwargs)
+        """ Add the file or directory in_directory, named relatively to
+            its parent directory in the archive
+        """
+        handle.add(in_directory, *args, \
+                            arcname=os.path.basename(in_directory), **kwargs)
     #~ def _add_fd_function()
 
     #################################################################
@@ -154,11 +204,8 @@ class TarGz:
 
         with cls.opening_function(out_archive_pathname, cls.open_write_flag) \
                                                                     as handle:
-            push_dir = os.getcwd()
-            os.chdir(os.path.dirname(os.path.abspath(in_directory)))
-            cls._add_fd_function(handle, os.path.basename(in_directory)) #, \
-                                                                #arcname='.')
-            os.chdir(push_dir)
+            # No chdir, other threads may be running subprocesses
+            cls._add_fd_function(handle, os.path.abspath(in_directory))
 
         if not cls.is_archive_file(out_archive_pathname):
             errmsg = " ".join(["The created", cls.archive_ext, "file", \
@@ -323,6 +370,10 @@ class Zip (TarGz):
 
     @classmethod
     def _add_fd_function(cls, handle, in_directory, *args, **kwargs):
+        """ Add the file or directory in_directory, named relatively to
+            its parent directory in the archive
+        """
+        parent_dir = os.path.dirname(in_directory)
         # setup file paths variable
         file_paths = []
    
@@ -337,7 +388,8 @@ class Zip (TarGz):
                     file_paths.append(file_path)
          
         for file_path in file_paths:
-            handle.write(file_path, *args, **kwargs)
+            handle.write(file_path, *args, \
+                    arcname=os.path.relpath(file_path, parent_dir), **kwargs)
     #~ def _add_fd_function()
 
     #######################################################################
@@ -373,6 +425,189 @@ class Zip (TarGz):
     #~ def addToArchive ()
 #~ class Zip
 
+class IndexedArchive(object):
+    """
+        Archive with random access to its members, compressed one by one.
+        The file is made of a magic, the zlib compressed files one after 
+        the other, the JSON index (member name to offset, compressed size 
+        and permission mode) and the offset of the index (8 bytes).
+        Extracting a member only reads that member (the index of an 
+        archive is loaded once per process), optionally memory-mapped.
+        The member names are the same as with TarGz.
+    """
+
+    archive_ext = ".idxar"
+
+    MAGIC = b'MUTIDXA1'
+
+    OFFSET_KEY = "offset"
+    SIZE_KEY = "size"
+    MODE_KEY = "mode"
+
+    # archive pathname -> (file stat key, index, mmap or None)
+    _loaded_archives = {}
+    _loaded_archives_lock = threading.Lock()
+
+    @classmethod
+    def get_archive_filename_of(cls, file_dir):
+        return file_dir + cls.archive_ext
+    #~ def get_archive_filename_of()
+
+    @classmethod
+    def is_archive_file(cls, pathname):
+        if not os.path.isfile(pathname):
+            return False
+        with open(pathname, 'rb') as f:
+            return f.read(len(cls.MAGIC)) == cls.MAGIC
+    #~ def is_archive_file()
+
+    @classmethod
+    def _write_archive(cls, out_archive_pathname, members_iter):
+        """ Write the archive from the iterable of triples 
+            (member name, file content bytes, permission mode)
+        """
+        index = {}
+        tmp_pathname = out_archive_pathname + ".tmp"
+        with open(tmp_pathname, 'wb') as f:
+            f.write(cls.MAGIC)
+            for name, content, mode in members_iter:
+                data = zlib.compress(content)
+                index[name] = {cls.OFFSET_KEY: f.tell(), \
+                                cls.SIZE_KEY: len(data), cls.MODE_KEY: mode}
+                f.write(data)
+            index_offset = f.tell()
+            f.write(json.dumps(index).encode('utf-8'))
+            f.write(index_offset.to_bytes(8, 'little'))
+        os.replace(tmp_pathname, out_archive_pathname)
+    #~ def _write_archive()
+
+    @classmethod
+    def compressDir (cls, in_directory, out_archive_pathname=None, 
+                    remove_in_directory=False):
+        """ Archive the files of in_directory
+        :returns: None on success and an error message on failure
+        """
+        ERROR_HANDLER.assert_true(os.path.isdir(in_directory), \
+                                        "invalid in_directory: "+in_directory)
+        if out_archive_pathname is None:
+            out_archive_pathname = cls.get_archive_filename_of(in_directory)
+
+        parent = os.path.dirname(os.path.abspath(in_directory))
+        def _dir_members():
+            for root, _, files in os.walk(in_directory):
+                for filename in sorted(files):
+                    file_path = os.path.join(root, filename)
+                    with open(file_path, 'rb') as f:
+                        content = f.read()
+                    yield os.path.relpath(os.path.abspath(file_path), \
+                                                                parent), \
+                            content, os.stat(file_path).st_mode & 0o7777
+        cls._write_archive(out_archive_pathname, _dir_members())
+
+        if not cls.is_archive_file(out_archive_pathname):
+            return " ".join(["The created", cls.archive_ext, "file", \
+                                        out_archive_pathname, "is invalid"])
+
+        if remove_in_directory:
+            shutil.rmtree(in_directory)
+        return None
+    #~ def compressDir()
+
+    @classmethod
+    def migrateFromTarGz (cls, in_tar_pathname, out_archive_pathname=None, \
+                                                    remove_in_archive=True):
+        """ Convert a TarGz archive into an IndexedArchive (the same 
+            members, read in one pass)
+        :returns: None on success and an error message on failure
+        """
+        if out_archive_pathname is None:
+            out_archive_pathname = cls.get_archive_filename_of(\
+                                in_tar_pathname[:-len(TarGz.archive_ext)])
+        with tarfile.open(in_tar_pathname, TarGz.open_read_flag) as handle:
+            def _tar_members():
+                for member in handle:
+                    if member.isfile():
+                        yield member.name, \
+                                handle.extractfile(member).read(), member.mode
+            cls._write_archive(out_archive_pathname, _tar_members())
+
+        if not cls.is_archive_file(out_archive_pathname):
+            return " ".join(["The migrated", cls.archive_ext, "file", \
+                                        out_archive_pathname, "is invalid"])
+        if remove_in_archive:
+            os.remove(in_tar_pathname)
+        return None
+    #~ def migrateFromTarGz()
+
+    @classmethod
+    def _get_loaded_archive(cls, in_archive_pathname, use_mmap):
+        """ get the index and mmap (None if use_mmap is False) of the 
+            archive, loading them only if the file changed
+        """
+        stat = os.stat(in_archive_pathname)
+        stat_key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with cls._loaded_archives_lock:
+            loaded = cls._loaded_archives.get(in_archive_pathname)
+            if loaded is None or loaded[0] != stat_key or \
+                                            (use_mmap and loaded[2] is None):
+                with open(in_archive_pathname, 'rb') as f:
+                    f.seek(-8, os.SEEK_END)
+                    index_offset = int.from_bytes(f.read(8), 'little')
+                    f.seek(index_offset)
+                    index = json.loads(\
+                            f.read(stat.st_size - 8 - index_offset)\
+                                                            .decode('utf-8'))
+                    mapped = None
+                    if use_mmap:
+                        mapped = mmap.mmap(f.fileno(), 0, \
+                                                    access=mmap.ACCESS_READ)
+                loaded = (stat_key, index, mapped)
+                cls._loaded_archives[in_archive_pathname] = loaded
+        return loaded[1], loaded[2]
+    #~ def _get_loaded_archive()
+
+    @classmethod
+    def extractFromArchive (cls, in_archive_pathname, extract_pathname, \
+                        out_location=None, is_folder=False, use_mmap=False):
+        """ Extract the file (or every file of the folder, if is_folder)
+            extract_pathname from the archive into out_location
+        :returns: None on success and an error message on failure
+        """
+        if not cls.is_archive_file(in_archive_pathname):
+            return " ".join(["Invalid", cls.archive_ext, "file:", \
+                                                        in_archive_pathname])
+        if out_location is None:
+            out_location = os.path.dirname(in_archive_pathname)
+
+        index, mapped = cls._get_loaded_archive(in_archive_pathname, use_mmap)
+        if is_folder:
+            prefix = extract_pathname.rstrip(os.sep) + os.sep
+            names = [n for n in index if n.startswith(prefix)]
+        else:
+            names = [extract_pathname] if extract_pathname in index else []
+        if len(names) == 0:
+            return " ".join(["Member", extract_pathname, \
+                                    "abscent in archive", in_archive_pathname])
+
+        with open(in_archive_pathname, 'rb') as f:
+            for name in names:
+                info = index[name]
+                start = info[cls.OFFSET_KEY]
+                if mapped is not None:
+                    data = mapped[start:start + info[cls.SIZE_KEY]]
+                else:
+                    f.seek(start)
+                    data = f.read(info[cls.SIZE_KEY])
+                dest = os.path.join(out_location, name)
+                if not os.path.isdir(os.path.dirname(dest)):
+                    os.makedirs(os.path.dirname(dest))
+                with open(dest, 'wb') as out_f:
+                    out_f.write(zlib.decompress(data))
+                os.chmod(dest, info[cls.MODE_KEY])
+        return None
+    #~ def extractFromArchive()
+#~ class IndexedArchive
+
 class FileDirStructureHandling(object):
     '''
     Can be used for the organization of the output directory.
@@ -494,6 +729,12 @@ class CheckpointState(object):
     DETAILED_TIME_KEY = "DETAILED_TIME"
     CHECKPOINT_DATA_KEY = "CHECKPOINT_DATA"
 
+    # The journal (store file with this suffix) holds the records appended,
+    # one JSON per line, since the last write_checkpoint
+    JOURNAL_SUFFIX = ".journal"
+    # Number of records appended between two syncs of the journal to disk
+    JOURNAL_SYNC_PERIOD = 64
+
     '''
         The different states are:
             - Destroyed
@@ -516,8 +757,17 @@ class CheckpointState(object):
         # aggregated time loaded from last ckeckpoint (offset by starttime)
         self.prev_aggregated_time = None
 
+        self.journal_filepath = self.store_filepath + self.JOURNAL_SUFFIX
+        self.journal_file = None
+        self.journal_unsynced_count = 0
+
         raw_obj = self._get_from_file()
         self._update_this_object(raw_obj)
+        if raw_obj is not None:
+            journal = self._load_journal_records()
+            if len(journal) > 0:
+                self.prev_aggregated_time = \
+                                        float(journal[-1][self.AGG_TIME_KEY])
     #~ def __init__()
 
     def get_dep_checkpoint_states(self):
@@ -536,6 +786,7 @@ class CheckpointState(object):
         if os.path.isfile(self.store_filepath):
             #shutil.copy2(self.store_filepath, self.backup_filepath)
             os.remove(self.store_filepath)
+        self._close_journal(remove=True)
         self.started = False
         self.finished = False
         self.starttime = None
@@ -565,7 +816,8 @@ class CheckpointState(object):
         for dep_cp in self.dep_checkpoint_states:
             no_files &= dep_cp.is_destroyed()
         no_files &= not os.path.isfile(self.store_filepath) and \
-                    not os.path.isfile(self.backup_filepath)
+                    not os.path.isfile(self.backup_filepath) and \
+                    not os.path.isfile(self.journal_filepath)
         return no_files
     #~ def is_destroyed()
 
@@ -621,8 +873,76 @@ class CheckpointState(object):
         dumpJSON(raw_obj, self.store_filepath, pretty=True)
         if remove_back and os.path.isfile(self.backup_filepath):
             os.remove(self.backup_filepath)
+        # The journaled records are now in the store file
+        self._close_journal(remove=True)
     #~ def write_checkpoint()
 
+    def append_to_journal(self, json_obj):
+        '''
+        Append a record to the journal, instead of rewriting the whole
+        checkpoint. The journal is flushed after each record and synced 
+        to disk every JOURNAL_SYNC_PERIOD records. It is cleared by the 
+        next write_checkpoint.
+        '''
+        cur_agg_time = \
+                    self.prev_aggregated_time + (time.time() - self.starttime)
+        record = {
+                    self.AGG_TIME_KEY: cur_agg_time, \
+                    self.CHECKPOINT_DATA_KEY: json_obj, \
+        }
+        if self.journal_file is None:
+            self._drop_partial_journal_record()
+            self.journal_file = open(self.journal_filepath, 'a')
+        self.journal_file.write(json.dumps(record) + '\n')
+        self.journal_file.flush()
+        self.journal_unsynced_count += 1
+        if self.journal_unsynced_count >= self.JOURNAL_SYNC_PERIOD:
+            os.fsync(self.journal_file.fileno())
+            self.journal_unsynced_count = 0
+    #~ def append_to_journal()
+
+    def load_journal(self):
+        '''
+        Return the list of the data of the records appended to the journal
+        since the last write_checkpoint, in order
+        '''
+        return [r[self.CHECKPOINT_DATA_KEY] \
+                                    for r in self._load_journal_records()]
+    #~ def load_journal()
+
+    def _load_journal_records(self):
+        records = []
+        if os.path.isfile(self.journal_filepath):
+            with open(self.journal_filepath) as f:
+                lines = f.read().splitlines()
+            for pos, line in enumerate(lines):
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Only the last record may be partial (interrupted)
+                    ERROR_HANDLER.assert_true(pos == len(lines) - 1, \
+                                "Invalid checkpoint journal file ({})"\
+                                .format(self.journal_filepath), __file__)
+        return records
+    #~ def _load_journal_records()
+
+    def _drop_partial_journal_record(self):
+        if os.path.isfile(self.journal_filepath):
+            with open(self.journal_filepath, 'rb+') as f:
+                content = f.read()
+                if len(content) > 0 and not content.endswith(b'\n'):
+                    f.truncate(content.rfind(b'\n') + 1)
+    #~ def _drop_partial_journal_record()
+
+    def _close_journal(self, remove=False):
+        if self.journal_file is not None:
+            self.journal_file.close()
+            self.journal_file = None
+            self.journal_unsynced_count = 0
+        if remove and os.path.isfile(self.journal_filepath):
+            os.remove(self.journal_filepath)
+    #~ def _close_journal()
+
     def get_execution_time(self):
         ERROR_HANDLER.assert_true(not self.is_destroyed(), \
                                 "Trying to get time for destroyed checkpoint",
@@ -5,6 +5,9 @@ import os
 import sys
 import itertools
 import copy
+import contextlib
+import json
+import numpy as np
 import pandas as pd
 
 import muteria.common.mix as common_mix
@@ -13,6 +16,177 @@ import muteria.common.fs as common_fs
 ERROR_HANDLER = common_mix.ErrorHandler
 
 DEFAULT_KEY_COLUMN_NAME="MUTERIA_MATRIX_KEY_COL"
+
+# Default cell predicates. They also apply elementwise on numpy arrays, 
+# which enables the vectorized queries
+def _is_positive_cell(x):
+    return x > 0
+
+def _is_zero_cell(x):
+    return x == 0
+
+def _is_negative_cell(x):
+    return x < 0
+
+_ARRAY_CELL_FUNCS = {_is_positive_cell, _is_zero_cell, _is_negative_cell}
+
+class MatrixBackend(common_mix.EnumAutoName):
+    """ Storage used by the ExecutionMatrix objects
+        - PANDAS_DATAFRAME: pandas dataframe keeping the raw cell values.
+        - BITPACKED: two bitsets per row, keeping only whether each cell
+                    is active, inactive or uncertain 
+                    (see RawBitPackedExecutionMatrix).
+    """
+    PANDAS_DATAFRAME = 0
+    BITPACKED = 1
+#~ class MatrixBackend
+
+_EXECUTION_MATRIX_BACKEND = MatrixBackend.PANDAS_DATAFRAME
+
+def set_execution_matrix_backend(backend):
+    """ Set the backend of the ExecutionMatrix objects created afterward
+    :param backend: (MatrixBackend) the backend
+    """
+    global _EXECUTION_MATRIX_BACKEND
+    ERROR_HANDLER.assert_true(isinstance(backend, MatrixBackend), \
+                    "invalid execution matrix backend: "+str(backend), __file__)
+    _EXECUTION_MATRIX_BACKEND = backend
+#~ def set_execution_matrix_backend()
+
+def get_execution_matrix_backend():
+    """ Get the backend of the ExecutionMatrix objects to be created
+    """
+    return _EXECUTION_MATRIX_BACKEND
+#~ def get_execution_matrix_backend()
+
+class MatrixFileFormat(common_mix.EnumAutoName):
+    """ Format of the files in which ExecutionMatrix objects are serialized
+        - CSV: space separated text.
+        - BINARY: header with the key and column lists, followed by a 
+                dense (int8 when possible) or bit-packed body, that is 
+                memory-mapped when loading (see _dump_binary_matrix).
+        Both formats are always readable, whatever the format set.
+        The files named with the CSV extension are always written as CSV,
+        to remain readable by other tools. The binary files should be
+        named with BINARY_MATRIX_FILE_EXTENSION (see
+        get_matrix_file_extension).
+        The format also applies to the OutputLogData objects (JSON for
+        CSV, and a columnar binary layout for BINARY). The files named
+        with the JSON extension are always written as JSON.
+    """
+    CSV = 0
+    BINARY = 1
+#~ class MatrixFileFormat
+
+_MATRIX_FILE_FORMAT = MatrixFileFormat.CSV
+
+def set_matrix_file_format(file_format):
+    """ Set the format used to serialize the ExecutionMatrix objects
+    :param file_format: (MatrixFileFormat) the format
+    """
+    global _MATRIX_FILE_FORMAT
+    ERROR_HANDLER.assert_true(isinstance(file_format, MatrixFileFormat), \
+                    "invalid matrix file format: "+str(file_format), __file__)
+    _MATRIX_FILE_FORMAT = file_format
+#~ def set_matrix_file_format()
+
+def get_matrix_file_format():
+    """ Get the format used to serialize the ExecutionMatrix objects
+    """
+    return _MATRIX_FILE_FORMAT
+#~ def get_matrix_file_format()
+
+CSV_MATRIX_FILE_EXTENSION = ".csv"
+JSON_OUTLOG_FILE_EXTENSION = ".json"
+BINARY_MATRIX_FILE_EXTENSION = ".mtx"
+
+def get_matrix_file_extension(text_extension=CSV_MATRIX_FILE_EXTENSION):
+    """ Get the extension of the files to serialize in the format set with
+        set_matrix_file_format
+    :param text_extension: extension of the text format files
+    """
+    if _MATRIX_FILE_FORMAT == MatrixFileFormat.BINARY:
+        return BINARY_MATRIX_FILE_EXTENSION
+    return text_extension
+#~ def get_matrix_file_extension()
+
+def _is_binary_serialized(filename, text_extension):
+    """ Check whether filename is serialized in binary format. The files
+        named with text_extension are always text
+    """
+    return _MATRIX_FILE_FORMAT == MatrixFileFormat.BINARY and \
+                                        not filename.endswith(text_extension)
+#~ def _is_binary_serialized()
+
+_BINARY_MATRIX_MAGIC = b'MUTMTX01'
+_BINARY_MATRIX_ALIGN = 64
+_DENSE_ENCODING = "dense"
+_BITPACKED_ENCODING = "bitpacked"
+
+def _is_binary_matrix_file(filename):
+    with open(filename, 'rb') as f:
+        return f.read(len(_BINARY_MATRIX_MAGIC)) == _BINARY_MATRIX_MAGIC
+#~ def _is_binary_matrix_file()
+
+def _dump_binary_matrix(filename, key_column_name, non_key_col_list, keys, \
+                                                        encoding, bodies):
+    """ Write a binary matrix file. The layout is:
+        magic (8 bytes), header size (8 bytes, little endian),
+        JSON header (key column name, columns, keys, encoding, and the 
+        dtype and shape of each body), padding, then the 2D arrays 
+        'bodies' one after the other, in C order.
+        The file is written into a temporary file then moved, so that
+        readers never see a partial file.
+    """
+    header = {
+        "key_column_name": key_column_name,
+        "columns": list(non_key_col_list),
+        "keys": list(keys),
+        "encoding": encoding,
+        "bodies": [{"dtype": b.dtype.str, "shape": list(b.shape)} \
+                                                            for b in bodies],
+    }
+    header = json.dumps(header).encode('utf-8')
+    prefix_len = len(_BINARY_MATRIX_MAGIC) + 8
+    header += b' ' * (-(prefix_len + len(header)) % _BINARY_MATRIX_ALIGN)
+    tmp_filename = filename + '.tmp'
+    with open(tmp_filename, 'wb') as f:
+        f.write(_BINARY_MATRIX_MAGIC)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        for body in bodies:
+            f.write(np.ascontiguousarray(body).tobytes())
+    os.replace(tmp_filename, filename)
+#~ def _dump_binary_matrix()
+
+def _load_binary_matrix(filename):
+    """ Read a binary matrix file written by _dump_binary_matrix.
+        The bodies are memory-mapped copy-on-write (modifying them does not
+        change the file), so nothing is read before being accessed.
+    :return: pair of the header dict and the list of bodies
+    """
+    with open(filename, 'rb') as f:
+        ERROR_HANDLER.assert_true(\
+                    f.read(len(_BINARY_MATRIX_MAGIC)) == _BINARY_MATRIX_MAGIC,\
+                        "not a binary matrix file: "+str(filename), __file__)
+        header_len = int.from_bytes(f.read(8), 'little')
+        header = json.loads(f.read(header_len).decode('utf-8'))
+    offset = len(_BINARY_MATRIX_MAGIC) + 8 + header_len
+    bodies = []
+    for body_info in header["bodies"]:
+        dtype = np.dtype(body_info["dtype"])
+        shape = tuple(body_info["shape"])
+        size = int(np.prod(shape)) * dtype.itemsize
+        if size == 0:
+            # Empty arrays cannot be memory-mapped
+            bodies.append(np.zeros(shape, dtype=dtype))
+        else:
+            bodies.append(np.memmap(filename, dtype=dtype, mode='c', \
+                                                offset=offset, shape=shape))
+        offset += size
+    return header, bodies
+#~ def _load_binary_matrix()
+
 class RawExecutionMatrix(object):
     '''
         A 2D matrix representation of the execution of entities by test cases.
@@ -63,9 +237,9 @@ class RawExecutionMatrix(object):
     def __init__(self, filename=None, key_column_name=DEFAULT_KEY_COLUMN_NAME,
                     non_key_col_list=None, active_cell_default_val=[1], 
                     inactive_cell_vals=[0], uncertain_cell_default_val=[-1],
-                    is_active_cell_func=lambda x: x > 0, 
-                    is_inactive_cell_func=lambda x: x == 0, 
-                    is_uncertain_cell_func=lambda x: x < 0,
+                    is_active_cell_func=_is_positive_cell, 
+                    is_inactive_cell_func=_is_zero_cell, 
+                    is_uncertain_cell_func=_is_negative_cell,
                     cell_dtype=int):
         self.filename = filename
         self.key_column_name = key_column_name
@@ -92,6 +266,11 @@ class RawExecutionMatrix(object):
             ERROR_HANDLER.assert_true(not self.is_uncertain_cell_func(v), \
                                                                 "", __file__)
 
+        self._init_storage(cell_dtype)
+
+    def _init_storage(self, cell_dtype):
+        """ create the underlying storage, loading the file if existing
+        """
         if self.filename is None or not os.path.isfile(self.filename):
             ERROR_HANDLER.assert_true(self.non_key_col_list is not None, \
                                     "Must specify 'non_key_col_list' when " + \
@@ -103,23 +282,60 @@ class RawExecutionMatrix(object):
             self.dataframe = self.dataframe.astype(cell_dtype)\
                                            .astype({self.key_column_name: str})
         else:
-            self.dataframe = common_fs.loadCSV(self.filename)
+            if _is_binary_matrix_file(self.filename):
+                self.dataframe = self._load_binary_dataframe(cell_dtype)
+            else:
+                self.dataframe = common_fs.loadCSV(self.filename)
             #ERROR_HANDLER.assert_true(len(self.dataframe.columns) >= 2, \
             #        "expect at least 2 columns in dataframe: key, values...",\
             #                                                        __file__)
-            ERROR_HANDLER.assert_true(self.key_column_name == \
-                                    list(self.dataframe)[0], "key_column"\
-                            " name missing or not first column in dataframe",\
-                                                                    __file__)
-            if self.non_key_col_list is None:
-                self.non_key_col_list = list(self.dataframe)[1:]
-            else:
-                ERROR_HANDLER.assert_true(self.non_key_col_list == \
-                                list(self.dataframe)[1:], "non key mismatch",\
-                                                                    __file__)
+            self._check_loaded_columns(list(self.dataframe)[0], \
+                                                list(self.dataframe)[1:])
 
         self.keys_set = set(self.get_keys())
 
+    def _check_loaded_columns(self, key_column_name, non_key_col_list):
+        """ check the columns loaded from file against the expected ones
+        """
+        ERROR_HANDLER.assert_true(self.key_column_name == key_column_name, \
+                            "key_column name missing or not first column "\
+                                                    "in dataframe", __file__)
+        if self.non_key_col_list is None:
+            self.non_key_col_list = non_key_col_list
+        else:
+            ERROR_HANDLER.assert_true(\
+                            self.non_key_col_list == non_key_col_list, \
+                                                "non key mismatch", __file__)
+
+    def _load_binary_dataframe(self, cell_dtype):
+        """ load the dataframe from the binary file. The cells of a dense
+            file are memory-mapped, not read
+        """
+        header, bodies = _load_binary_matrix(self.filename)
+        if header["encoding"] == _BITPACKED_ENCODING:
+            n_cols = len(header["columns"])
+            active, uncertain = [np.unpackbits(b, axis=1, \
+                                    bitorder='little')[:, :n_cols].astype(bool)\
+                                                            for b in bodies]
+            values = self._get_values_from_states(active, uncertain, \
+                                                                cell_dtype)
+        else:
+            values = bodies[0]
+        dataframe = pd.DataFrame(values, columns=header["columns"], \
+                                                                copy=False)
+        dataframe.insert(0, header["key_column_name"], \
+                                    pd.Series(header["keys"], dtype=object))
+        return dataframe
+
+    def _get_values_from_states(self, active, uncertain, dtype):
+        """ get the array of cell values given the boolean arrays of the
+            active and the uncertain cells (the others are inactive)
+        """
+        values = np.full(active.shape, self.getInactiveCellVal(), dtype=dtype)
+        values[active] = self.getActiveCellDefaultVal()
+        values[uncertain] = self.getUncertainCellDefaultVal()
+        return values
+
     def get_a_deepcopy(self, new_filename=None, serialize=True):
         """ get a copy of the current matrix. The new filename will be 
             used fo storage.
@@ -160,13 +376,44 @@ class RawExecutionMatrix(object):
         """
         return self.uncertain_cell_default_val[0]
 
-    def serialize(self):
-        """ Serialize the matrix to its corresponding file if not None
+    def serialize(self, out_filename=None):
+        """ Serialize the matrix to its corresponding file if not None,
+            or to out_filename if specified, in the format set with
+            set_matrix_file_format (CSV if the file name has the CSV
+            extension)
         """
-        if self.filename is not None:
-            common_fs.dumpCSV(self.dataframe, self.filename)
+        if out_filename is None:
+            out_filename = self.filename
+        if out_filename is not None:
+            if _is_binary_serialized(out_filename, \
+                                                CSV_MATRIX_FILE_EXTENSION):
+                self._dump_binary(out_filename)
+            else:
+                self.export_to_csv(out_filename)
     #~ def serialize()
 
+    def export_to_csv(self, out_filename):
+        """ Write the matrix as CSV into the file out_filename
+        """
+        common_fs.dumpCSV(self.dataframe, out_filename)
+    #~ def export_to_csv()
+
+    def _dump_binary(self, out_filename):
+        """ Write the matrix in binary format, with a dense body of 
+            int8 when the values fit, or of the cells dtype otherwise
+        """
+        values = self.dataframe[self.non_key_col_list].values
+        ERROR_HANDLER.assert_true(values.dtype != object, \
+                    "binary matrix format requires numeric cells", __file__)
+        if np.issubdtype(values.dtype, np.integer) and (values.size == 0 \
+                                        or (values.min() >= -128 and \
+                                                    values.max() <= 127)):
+            values = values.astype(np.int8)
+        _dump_binary_matrix(out_filename, self.key_column_name, \
+                            self.non_key_col_list, self.get_keys(), \
+                                                _DENSE_ENCODING, [values])
+    #~ def _dump_binary()
+
     def get_store_filename(self):
         """ Get the name of the storing file
         """
@@ -198,6 +445,56 @@ class RawExecutionMatrix(object):
         """
         self.dataframe[list(self.get_nonkey_colname_list())] = value
         
+    def get_states_arrays(self):
+        """ get the boolean 2D arrays of the active and the uncertain cells
+            (rows ordered as get_keys() and columns as 
+            get_nonkey_colname_list())
+        :return: pair of the active array and the uncertain array
+
+        :Example:
+        >>> nc = ['a', 'b', 'c']
+        >>> mat = ExecutionMatrix(non_key_col_list=nc)
+        >>> mat.add_row_by_key('k', [1, 0, -1])
+        >>> active, uncertain = mat.get_states_arrays()
+        >>> active.tolist(), uncertain.tolist()
+        ([[True, False, False]], [[False, False, True]])
+        """
+        values = self.dataframe[self.non_key_col_list].values
+        return self._get_cells_mask(values, self.is_active_cell_func), \
+                    self._get_cells_mask(values, self.is_uncertain_cell_func)
+    #~ def get_states_arrays()
+
+    def set_cells_from_states(self, active, uncertain):
+        """ set all the cells at once to the default value of their state,
+            given as boolean 2D arrays (see get_states_arrays). The cells
+            neither active nor uncertain are set inactive
+        :param active: boolean array of the active cells
+        :param uncertain: boolean array of the uncertain cells
+        :return: nothing
+
+        :Example:
+        >>> nc = ['a', 'b', 'c']
+        >>> mat = ExecutionMatrix(non_key_col_list=nc)
+        >>> mat.add_row_by_key('k', [1, 2, 3])
+        >>> mat.set_cells_from_states([[False, True, False]], \
+                                                    [[False, False, True]])
+        >>> mat._get_key_values_dict() == {'k': {'a':0, 'b':1, 'c':-1}}
+        True
+        """
+        active = np.asarray(active, dtype=bool)
+        uncertain = np.asarray(uncertain, dtype=bool)
+        ERROR_HANDLER.assert_true(active.shape == uncertain.shape == \
+                    (len(self.dataframe), len(self.non_key_col_list)), \
+                                        "states arrays shape mismatch", __file__)
+        dtype = np.result_type(int, \
+                                *self.dataframe[self.non_key_col_list].dtypes)
+        values = self._get_values_from_states(active, uncertain, dtype)
+        keys = self.dataframe[self.key_column_name]
+        self.dataframe = pd.DataFrame(values, columns=self.non_key_col_list, \
+                                                                copy=False)
+        self.dataframe.insert(0, self.key_column_name, \
+                                        keys.reset_index(drop=True))
+    #~ def set_cells_from_states()
     
     def add_row_by_key(self, key, values, serialize=True):
         """ add a row to the matrix
@@ -239,6 +536,75 @@ class RawExecutionMatrix(object):
         if serialize:
             self.serialize()
 
+    def add_rows_by_keys(self, key_values_dict, serialize=True):
+        """ add several rows to the matrix at once (much faster than
+            calling add_row_by_key for each row)
+        :param key_values_dict: dict mapping each key to add to its values
+                        (list or dict, as for add_row_by_key)
+        :param serialize: (bool) decide whether to serialize the matrix to 
+                        file after adding
+        :return: nothing
+
+        :Example:
+        >>> nc = ['a', 'b', 'c']
+        >>> mat = ExecutionMatrix(non_key_col_list=nc)
+        >>> mat.add_rows_by_keys({'k': [1, 2, 3], 'r': {'a':3, 'c':2, 'b':3}})
+        >>> mat._get_key_values_dict() == {'k': {'a':1,'b':2,'c':3}, \
+                                            'r': {'a':3,'b':3,'c':2}}
+        True
+        >>> list(mat.get_keys())
+        ['k', 'r']
+        """
+        ERROR_HANDLER.assert_true(\
+                        len(self.keys_set & set(key_values_dict)) == 0, \
+                            "adding existing keys to matrix: " + \
+                                                str(self.filename), __file__)
+        records = []
+        for key, values in key_values_dict.items():
+            if type(values) in (list, tuple):
+                records.append([key] + list(values))
+            elif type(values) == dict:
+                ERROR_HANDLER.assert_true(\
+                                    self.key_column_name not in values, \
+                                        "key column name in values", __file__)
+                records.append([key] + [values.get(c, float('nan')) \
+                                            for c in self.non_key_col_list])
+            else:
+                ERROR_HANDLER.error_exit("Invald input: 'values'", __file__)
+
+        if len(records) > 0:
+            self.keys_set |= set(key_values_dict)
+            new_rows_df = pd.DataFrame(records, columns=\
+                            [self.key_column_name] + self.non_key_col_list)
+            self.dataframe = pd.concat([self.dataframe, new_rows_df], \
+                                                        ignore_index=True)
+
+        if serialize:
+            self.serialize()
+    #~ def add_rows_by_keys()
+
+    @contextlib.contextmanager
+    def bulk_row_adder(self, serialize=True):
+        """ context manager giving a dict in which to put the rows to add
+            (key to values). The rows are added, with add_rows_by_keys, 
+            when exiting the context.
+        :param serialize: (bool) decide whether to serialize the matrix to 
+                        file after adding
+        
+        :Example:
+        >>> nc = ['a', 'b', 'c']
+        >>> mat = ExecutionMatrix(non_key_col_list=nc)
+        >>> with mat.bulk_row_adder() as rows:
+        ...     rows['k'] = [1, 2, 3]
+        ...     rows['r'] = [3, 2, 1]
+        >>> list(mat.get_keys())
+        ['k', 'r']
+        """
+        key_values_dict = {}
+        yield key_values_dict
+        self.add_rows_by_keys(key_values_dict, serialize=serialize)
+    #~ def bulk_row_adder()
+
     def delete_rows_by_key(self, key_list, serialize=True):
         """ delete the rows for the given keys
         :param key_list: collection of key whose rows to delete
@@ -400,6 +766,63 @@ class RawExecutionMatrix(object):
         ret.non_key_col_list = non_key_col_list
         return ret
 
+    def _get_cells_mask(self, values, is_cell_func):
+        """ get the boolean array of the cells of the 2D array 'values' 
+            for which is_cell_func is True. 
+            This is vectorized for the default cell predicates and 
+            calls is_cell_func on each cell otherwise.
+        """
+        if is_cell_func in _ARRAY_CELL_FUNCS:
+            with np.errstate(invalid='ignore'):
+                return np.asarray(is_cell_func(values), dtype=bool)
+        if values.size == 0:
+            return np.zeros(values.shape, dtype=bool)
+        return np.vectorize(is_cell_func, otypes=[bool])(values)
+    #~ def _get_cells_mask()
+
+    def _query_columns_of_rows(self, row_key_list, is_cell_func):
+        if row_key_list is None:
+            row_key_list = self.get_keys()
+
+        result = {}
+        if len(row_key_list) > 0:
+            ERROR_HANDLER.assert_true(\
+                            len(set(row_key_list) - self.keys_set) == 0,\
+                                    "invalid row key passed to extract row", \
+                                                                    __file__)
+            small_df = self.dataframe.loc[self.dataframe[\
+                                self.key_column_name].isin(row_key_list)]
+            mask = self._get_cells_mask(\
+                        small_df[self.non_key_col_list].values, is_cell_func)
+            cols = np.array([sys.intern(x) for x in self.non_key_col_list], \
+                                                                dtype=object)
+            for key, row_mask in zip(small_df[self.key_column_name], mask):
+                result[key] = cols[row_mask].tolist()
+
+        return result
+    #~ def _query_columns_of_rows()
+
+    def _query_rows_of_columns(self, non_key_col_list, is_cell_func):
+        if non_key_col_list is None:
+            non_key_col_list = self.non_key_col_list
+
+        result = {}
+        if len(non_key_col_list) > 0:
+            ERROR_HANDLER.assert_true(len(set(non_key_col_list) - \
+                                        set(self.non_key_col_list)) == 0, \
+                                    "invalid column passed to extract col", \
+                                                                    __file__)
+            non_key_col_list = list(non_key_col_list)
+            mask = self._get_cells_mask(\
+                    self.dataframe[non_key_col_list].values, is_cell_func)
+            keys = np.array([sys.intern(x) for x in \
+                            self.dataframe[self.key_column_name]], dtype=object)
+            for col, col_mask in zip(non_key_col_list, mask.T):
+                result[col] = keys[col_mask].tolist()
+
+        return result
+    #~ def _query_rows_of_columns()
+
     def query_active_columns_of_rows(self, row_key_list=None):
         ''' return a dict in the form row2cols
         :param row_key_list: list of rows to query for
@@ -416,18 +839,8 @@ class RawExecutionMatrix(object):
         >>> mat.query_active_columns_of_rows() == {'k': ['c']}
         True
         '''
-        if row_key_list is None:
-            row_key_list = self.get_keys()
-
-        result = {}
-        if len(row_key_list) > 0:
-            small_df = self.extract_by_rowkey(row_key_list).dataframe
-            for _, row in small_df.iterrows():
-                result[row[self.key_column_name]] = \
-                                [sys.intern(x) for x in self.non_key_col_list \
-                                        if self.is_active_cell_func(row[x])]
-
-        return result
+        return self._query_columns_of_rows(row_key_list, \
+                                                   self.is_active_cell_func)
     #~ def query_active_columns_of_rows()
 
     def query_active_rows_of_columns(self, non_key_col_list=None):
@@ -446,18 +859,8 @@ class RawExecutionMatrix(object):
         >>> mat.query_active_rows_of_columns() == {'a':[], 'b':[], 'c':['k']}
         True
         '''
-        if non_key_col_list is None:
-            non_key_col_list = self.non_key_col_list
-
-        result = {}
-        if len(non_key_col_list) > 0:
-            small_df = self.extract_by_column(non_key_col_list).dataframe
-            for col in non_key_col_list:
-                result[col] = [sys.intern(x) for x in small_df.loc[\
-                                small_df[col].apply(self.is_active_cell_func)]\
-                                                        [self.key_column_name]]
-
-        return result
+        return self._query_rows_of_columns(non_key_col_list, \
+                                                   self.is_active_cell_func)
     #~ def query_active_rows_of_columns()
 
     def query_inactive_columns_of_rows(self, row_key_list=None):
@@ -476,18 +879,8 @@ class RawExecutionMatrix(object):
         >>> mat.query_inactive_columns_of_rows() == {'k': ['a']}
         True
         '''
-        if row_key_list is None:
-            row_key_list = self.get_keys()
-
-        result = {}
-        if len(row_key_list) > 0:
-            small_df = self.extract_by_rowkey(row_key_list).dataframe
-            for _, row in small_df.iterrows():
-                result[row[self.key_column_name]] = \
-                                [sys.intern(x) for x in self.non_key_col_list \
-                                        if self.is_inactive_cell_func(row[x])]
-
-        return result
+        return self._query_columns_of_rows(row_key_list, \
+                                                 self.is_inactive_cell_func)
     #~ def query_inactive_columns_of_rows()
 
     def query_inactive_rows_of_columns(self, non_key_col_list=None):
@@ -506,18 +899,8 @@ class RawExecutionMatrix(object):
         >>> mat.query_inactive_rows_of_columns() == {'a':['k'], 'b':[], 'c':[]}
         True
         '''
-        if non_key_col_list is None:
-            non_key_col_list = self.non_key_col_list
-
-        result = {}
-        if len(non_key_col_list) > 0:
-            small_df = self.extract_by_column(non_key_col_list).dataframe
-            for col in non_key_col_list:
-                result[col] = [sys.intern(x) for x in small_df.loc[\
-                            small_df[col].apply(self.is_inactive_cell_func)]\
-                                                        [self.key_column_name]]
-
-        return result
+        return self._query_rows_of_columns(non_key_col_list, \
+                                                 self.is_inactive_cell_func)
     #~ def query_inactive_rows_of_columns()
 
     def query_uncertain_columns_of_rows(self, row_key_list=None):
@@ -536,18 +919,8 @@ class RawExecutionMatrix(object):
         >>> mat.query_uncertain_columns_of_rows() == {'k': ['b']}
         True
         '''
-        if row_key_list is None:
-            row_key_list = self.get_keys()
-
-        result = {}
-        if len(row_key_list) > 0:
-            small_df = self.extract_by_rowkey(row_key_list).dataframe
-            for _, row in small_df.iterrows():
-                result[row[self.key_column_name]] = \
-                                [sys.intern(x) for x in self.non_key_col_list \
-                                        if self.is_uncertain_cell_func(row[x])]
-
-        return result
+        return self._query_columns_of_rows(row_key_list, \
+                                                self.is_uncertain_cell_func)
     #~ def query_uncertain_columns_of_rows()
 
     def query_uncertain_rows_of_columns(self, non_key_col_list=None):
@@ -566,18 +939,8 @@ class RawExecutionMatrix(object):
         >>> mat.query_uncertain_rows_of_columns() == {'a':[],'b':['k'],'c':[]}
         True
         '''
-        if non_key_col_list is None:
-            non_key_col_list = self.non_key_col_list
-
-        result = {}
-        if len(non_key_col_list) > 0:
-            small_df = self.extract_by_column(non_key_col_list).dataframe
-            for col in non_key_col_list:
-                result[col] = [sys.intern(x) for x in small_df.loc[\
-                            small_df[col].apply(self.is_uncertain_cell_func)]\
-                                                        [self.key_column_name]]
-
-        return result
+        return self._query_rows_of_columns(non_key_col_list, \
+                                                self.is_uncertain_cell_func)
     #~ def query_uncertain_rows_of_columns()
 
     def _get_key_values_dict(self, keys=None):
@@ -705,48 +1068,715 @@ class RawExecutionMatrix(object):
                                                                     __file__)
 
         # Actual update
-        ## 1. Create columns that are not in others
-        col_to_add = set(other_matrix.get_nonkey_colname_list()) - \
-                                            set(self.get_nonkey_colname_list())
-        for col in col_to_add:
-            self.non_key_col_list.append(col)
-            self.dataframe[col] = [self.getUncertainCellDefaultVal()] * \
-                                                        len(self.get_keys())
-        
-        ## 2. Update or insert rows
-        extra_cols = set(self.get_nonkey_colname_list()) - \
-                                    set(other_matrix.get_nonkey_colname_list())
-        missing_extracol_vals = {e_c: self.getUncertainCellDefaultVal() \
-                                                        for e_c in extra_cols}
-        ### Insert
-        new_rows = set(other_matrix.get_keys()) - set(self.get_keys())
-        k_v_dict = other_matrix._get_key_values_dict(new_rows)
-        for key, values in list(k_v_dict.items()):
-            values.update(missing_extracol_vals)
-            self.add_row_by_key(key, values, serialize=False)
-        ### Update
-        k_v_dict = other_matrix._get_key_values_dict(row_existing)
-        for key, values in list(k_v_dict.items()):
-            #for col in values:
-            self.update_cells(key, values)
+        self._merge_other_matrix(other_matrix)
 
         if serialize:
             self.serialize()
     #~ def update_with_other_matrix()
+
+    def _merge_other_matrix(self, other_matrix):
+        """ Add the columns and rows of other_matrix that are not in this
+            matrix and set the cells of other_matrix, at once on the arrays
+            aligned by key and column. The added cells that are not in
+            other_matrix are uncertain.
+        """
+        if isinstance(other_matrix, RawBitPackedExecutionMatrix):
+            other_df = other_matrix.to_pandas_df()
+        else:
+            other_df = other_matrix.dataframe
+        key_col = self.get_key_colname()
+        other_cols = list(other_matrix.get_nonkey_colname_list())
+        other_keys = list(other_df[other_matrix.get_key_colname()])
+
+        self_cols = set(self.non_key_col_list)
+        col_to_add = [c for c in other_cols if c not in self_cols]
+        row_to_add = [k for k in other_keys if k not in self.keys_set]
+        if len(other_keys) == 0 and len(col_to_add) == 0:
+            return
+
+        merged = self.dataframe.set_index(key_col).reindex(\
+                        index=list(self.dataframe[key_col]) + row_to_add, \
+                        columns=self.non_key_col_list + col_to_add, \
+                        fill_value=self.getUncertainCellDefaultVal())
+        other_values = other_df[other_cols].to_numpy()
+        values = merged.to_numpy(dtype=np.result_type(other_values.dtype, \
+                                                            *merged.dtypes))
+        values[np.ix_(merged.index.get_indexer(other_keys), \
+                        merged.columns.get_indexer(other_cols))] = other_values
+
+        self.non_key_col_list.extend(col_to_add)
+        self.keys_set |= set(row_to_add)
+        self.dataframe = pd.DataFrame(values, columns=self.non_key_col_list, \
+                                                                copy=False)
+        self.dataframe.insert(0, key_col, pd.Series(list(merged.index), \
+                                                                dtype=object))
+    #~ def _merge_other_matrix()
+
+    def _append_uncertain_columns(self, col_list):
+        """ add the columns, with uncertain value in every row
+        """
+        for col in col_list:
+            self.non_key_col_list.append(col)
+            self.dataframe[col] = [self.getUncertainCellDefaultVal()] * \
+                                                        len(self.get_keys())
+    #~ def _append_uncertain_columns()
 #~ class RawExecutionMatrix
 
 class ExecutionMatrix(RawExecutionMatrix):
     '''
         This class is the default extension of the class RawExecutionMatrix. 
+        When the execution matrix backend is set to BITPACKED 
+        (see set_execution_matrix_backend), a BitPackedExecutionMatrix 
+        is created instead.
     '''
+    def __new__(cls, *args, **kwargs):
+        # No argument is passed when unpickling or copying
+        if (len(args) > 0 or len(kwargs) > 0) and \
+                    _EXECUTION_MATRIX_BACKEND == MatrixBackend.BITPACKED:
+            return BitPackedExecutionMatrix(*args, **kwargs)
+        return super(ExecutionMatrix, cls).__new__(cls)
+    #~ def __new__()
+
     def __init__(self, filename=None, non_key_col_list=None):
         RawExecutionMatrix.__init__(self, filename=filename, \
                                             non_key_col_list=non_key_col_list)
     #~ def __init__()
 #~ class ExecutionMatrix
 
+def _bitsets_to_packed(bitsets, n_bits):
+    """ get a 2D uint8 array whose rows are the little endian bytes 
+        of the bitsets
+    """
+    n_bytes = (n_bits + 7) // 8
+    buf = b''.join([b.to_bytes(n_bytes, 'little') for b in bitsets])
+    return np.frombuffer(buf, dtype=np.uint8).reshape(len(bitsets), n_bytes)
+#~ def _bitsets_to_packed()
+
+def _bitsets_to_array(bitsets, n_bits):
+    """ get a 2D boolean array whose rows are the bits of the bitsets
+    """
+    packed = _bitsets_to_packed(bitsets, n_bits)
+    return np.unpackbits(packed, axis=1, \
+                                bitorder='little')[:, :n_bits].astype(bool)
+#~ def _bitsets_to_array()
+
+def _packed_to_bitsets(packed):
+    """ get the bitsets (int) of the rows of a 2D uint8 array of 
+        little endian bytes
+    """
+    return [int.from_bytes(row.tobytes(), 'little') for row in packed]
+#~ def _packed_to_bitsets()
+
+def _array_to_bitsets(bool_array):
+    """ get the bitsets (int) of the rows of a 2D boolean array
+    """
+    return _packed_to_bitsets(\
+                        np.packbits(bool_array, axis=1, bitorder='little'))
+#~ def _array_to_bitsets()
+
+class RawBitPackedExecutionMatrix(RawExecutionMatrix):
+    '''
+        Columnar bit-packed implementation of RawExecutionMatrix.
+        Only the state of each cell (active, inactive or uncertain) is 
+        kept, as two bitsets per row: the active bits and the uncertain
+        bits (a cell in neither is inactive). Bit i of a row's bitsets 
+        is the cell of column i. The rows and columns are indexed by key.
+        A cell value is read back as the default value of its state
+        (getActiveCellDefaultVal(), getInactiveCellVal() or 
+        getUncertainCellDefaultVal()).
+        The file formats are the same as for RawExecutionMatrix (see
+        MatrixFileFormat).
+
+        :Example:
+        >>> nc = ['a', 'b', 'c']
+        >>> mat = BitPackedExecutionMatrix(non_key_col_list=nc)
+        >>> mat.add_row_by_key('k', [0, -3, 3])
+        >>> mat._get_key_values_dict() == {'k': {'a': 0, 'b': -1, 'c': 1}}
+        True
+        >>> mat.query_active_columns_of_rows() == {'k': ['c']}
+        True
+    '''
+
+    def _init_storage(self, cell_dtype):
+        """ create the bitsets, loading the file if existing
+        """
+        self.cell_dtype = cell_dtype
+        self.row_keys = []
+        self.row_pos = {}
+        self.active_bits = []
+        self.uncertain_bits = []
+        if self.filename is None or not os.path.isfile(self.filename):
+            ERROR_HANDLER.assert_true(self.non_key_col_list is not None, \
+                                    "Must specify 'non_key_col_list' when " + \
+                                    "filename inexistant. filename is " +
+                                    str(self.filename), __file__)
+            self._index_columns()
+        elif _is_binary_matrix_file(self.filename):
+            header, bodies = _load_binary_matrix(self.filename)
+            self._check_loaded_columns(header["key_column_name"], \
+                                                        header["columns"])
+            self._index_columns()
+            self.row_keys = header["keys"]
+            self._index_rows()
+            if header["encoding"] == _BITPACKED_ENCODING:
+                self.active_bits = _packed_to_bitsets(bodies[0])
+                self.uncertain_bits = _packed_to_bitsets(bodies[1])
+            else:
+                self._set_bits_from_values(bodies[0])
+        else:
+            dataframe = common_fs.loadCSV(self.filename)
+            self._check_loaded_columns(list(dataframe)[0], \
+                                                        list(dataframe)[1:])
+            self._index_columns()
+            self.row_keys = list(dataframe[self.key_column_name])
+            self._index_rows()
+            self._set_bits_from_values(\
+                                    dataframe[self.non_key_col_list].values)
+    #~ def _init_storage()
+
+    def _set_bits_from_values(self, values):
+        active, uncertain = self._get_states_arrays(values)
+        self.active_bits = _array_to_bitsets(active)
+        self.uncertain_bits = _array_to_bitsets(uncertain)
+    #~ def _set_bits_from_values()
+
+    def _index_columns(self):
+        self.col_pos = {c: i for i, c in enumerate(self.non_key_col_list)}
+    #~ def _index_columns()
+
+    def _index_rows(self):
+        self.row_pos = {k: i for i, k in enumerate(self.row_keys)}
+    #~ def _index_rows()
+
+    def _get_states_arrays(self, values):
+        """ get the boolean arrays of the active and the uncertain cells 
+            of an array of cell values. 
+            Cells that are neither active nor inactive are uncertain
+        """
+        values = np.asarray(values)
+        if values.size == 0:
+            return np.zeros(values.shape, dtype=bool), \
+                                        np.zeros(values.shape, dtype=bool)
+        active = self._get_cells_mask(values, self.is_active_cell_func)
+        inactive = self._get_cells_mask(values, self.is_inactive_cell_func)
+        return active, ~(active | inactive)
+    #~ def _get_states_arrays()
+
+    def _get_full_bits(self):
+        return (1 << len(self.non_key_col_list)) - 1
+    #~ def _get_full_bits()
+
+    def _get_inactive_bits(self, pos):
+        return self._get_full_bits() & \
+                        ~(self.active_bits[pos] | self.uncertain_bits[pos])
+    #~ def _get_inactive_bits()
+
+    def _get_values_array(self, positions):
+        """ get the 2D array of cell values of the rows at the positions
+        """
+        n_cols = len(self.non_key_col_list)
+        active = _bitsets_to_array(\
+                        [self.active_bits[p] for p in positions], n_cols)
+        uncertain = _bitsets_to_array(\
+                        [self.uncertain_bits[p] for p in positions], n_cols)
+        return self._get_values_from_states(active, uncertain, \
+                                                            self.cell_dtype)
+    #~ def _get_values_array()
+
+    def _copy_with(self, positions, non_key_col_list, out_filename):
+        """ get a copy having the rows at the given positions and 
+            the given columns
+        """
+        ret = copy.copy(self)
+        ret.filename = out_filename
+        ret.row_keys = [self.row_keys[p] for p in positions]
+        ret._index_rows()
+        ret.non_key_col_list = list(non_key_col_list)
+        ret._index_columns()
+        active_bits = [self.active_bits[p] for p in positions]
+        uncertain_bits = [self.uncertain_bits[p] for p in positions]
+        if ret.non_key_col_list != self.non_key_col_list:
+            n_cols = len(self.non_key_col_list)
+            col_positions = [self.col_pos[c] for c in ret.non_key_col_list]
+            active_bits = _array_to_bitsets(\
+                    _bitsets_to_array(active_bits, n_cols)[:, col_positions])
+            uncertain_bits = _array_to_bitsets(\
+                _bitsets_to_array(uncertain_bits, n_cols)[:, col_positions])
+        ret.active_bits = active_bits
+        ret.uncertain_bits = uncertain_bits
+        ret.serialize()
+        return ret
+    #~ def _copy_with()
+
+    def get_a_deepcopy(self, new_filename=None, serialize=True):
+        """ get a copy of the current matrix. The new filename will be 
+            used fo storage.
+        :param new_filename: filename to store the copy
+        :param serialize: (bool) decide whether to serialize the copy to 
+                            file upon creation
+        :return: a deep copy of this matrix
+        """
+        ret_matrix = copy.copy(self)
+        ret_matrix.filename = new_filename
+        ret_matrix.non_key_col_list = list(self.non_key_col_list)
+        ret_matrix.col_pos = dict(self.col_pos)
+        ret_matrix.row_keys = list(self.row_keys)
+        ret_matrix.row_pos = dict(self.row_pos)
+        ret_matrix.active_bits = list(self.active_bits)
+        ret_matrix.uncertain_bits = list(self.uncertain_bits)
+        if serialize:
+            ret_matrix.serialize()
+        return ret_matrix
+    #~ def get_a_deepcopy()
+
+    def export_to_csv(self, out_filename):
+        """ Write the matrix as CSV into the file out_filename
+        """
+        common_fs.dumpCSV(self.to_pandas_df(), out_filename)
+    #~ def export_to_csv()
+
+    def _dump_binary(self, out_filename):
+        """ Write the matrix in binary format, with a bit-packed body
+        """
+        n_cols = len(self.non_key_col_list)
+        _dump_binary_matrix(out_filename, self.key_column_name, \
+                        self.non_key_col_list, self.row_keys, \
+                        _BITPACKED_ENCODING, \
+                        [_bitsets_to_packed(self.active_bits, n_cols), \
+                            _bitsets_to_packed(self.uncertain_bits, n_cols)])
+    #~ def _dump_binary()
+
+    def clear_cells_to_value(self, value):
+        """ clear the matrix values to a given value
+        :param value: cell value type
+        :return: nothing
+        """
+        active, uncertain = self._get_states_arrays([[value]])
+        active_row = self._get_full_bits() if active[0][0] else 0
+        uncertain_row = self._get_full_bits() if uncertain[0][0] else 0
+        self.active_bits = [active_row] * len(self.row_keys)
+        self.uncertain_bits = [uncertain_row] * len(self.row_keys)
+    #~ def clear_cells_to_value()
+
+    def get_states_arrays(self):
+        """ get the boolean 2D arrays of the active and the uncertain cells
+            (rows ordered as get_keys() and columns as 
+            get_nonkey_colname_list())
+        :return: pair of the active array and the uncertain array
+        """
+        n_cols = len(self.non_key_col_list)
+        return _bitsets_to_array(self.active_bits, n_cols), \
+                            _bitsets_to_array(self.uncertain_bits, n_cols)
+    #~ def get_states_arrays()
+
+    def set_cells_from_states(self, active, uncertain):
+        """ set all the cells at once to the state given by the boolean 2D
+            arrays (see get_states_arrays). The cells neither active nor
+            uncertain are set inactive
+        :param active: boolean array of the active cells
+        :param uncertain: boolean array of the uncertain cells
+        :return: nothing
+        """
+        active = np.asarray(active, dtype=bool)
+        uncertain = np.asarray(uncertain, dtype=bool)
+        ERROR_HANDLER.assert_true(active.shape == uncertain.shape == \
+                    (len(self.row_keys), len(self.non_key_col_list)), \
+                                        "states arrays shape mismatch", __file__)
+        self.active_bits = _array_to_bitsets(active & ~uncertain)
+        self.uncertain_bits = _array_to_bitsets(uncertain)
+    #~ def set_cells_from_states()
+
+    def add_row_by_key(self, key, values, serialize=True):
+        """ add a row to the matrix
+        :param key: The key to add
+        :param values: (list or dict) The values for the given key.
+                        Ordered following non key columns ordering if list
+                        if dict, it is mapping from column name to value
+                        (missing columns are uncertain)
+        :param serialize: (bool) decide whether to serialize the matrix to 
+                        file after adding
+        :return: nothing
+        """
+        self.add_rows_by_keys({key: values}, serialize=serialize)
+    #~ def add_row_by_key()
+
+    def add_rows_by_keys(self, key_values_dict, serialize=True):
+        """ add several rows to the matrix at once
+        :param key_values_dict: dict mapping each key to add to its values
+                        (list or dict, as for add_row_by_key)
+        :param serialize: (bool) decide whether to serialize the matrix to 
+                        file after adding
+        :return: nothing
+        """
+        ERROR_HANDLER.assert_true(\
+                    not any(k in self.row_pos for k in key_values_dict), \
+                            "adding existing keys to matrix: " + \
+                                                str(self.filename), __file__)
+        uncertain_val = self.getUncertainCellDefaultVal()
+        rows = []
+        for values in key_values_dict.values():
+            if type(values) in (list, tuple):
+                ERROR_HANDLER.assert_true(\
+                            len(values) == len(self.non_key_col_list), \
+                                    "values and columns mismatch", __file__)
+                rows.append(values)
+            elif type(values) == dict:
+                ERROR_HANDLER.assert_true(\
+                                len(set(values) - set(self.col_pos)) == 0, \
+                                        "unknown column in values", __file__)
+                rows.append([values.get(c, uncertain_val) \
+                                            for c in self.non_key_col_list])
+            else:
+                ERROR_HANDLER.error_exit("Invald input: 'values'", __file__)
+
+        if len(rows) > 0:
+            active, uncertain = self._get_states_arrays(rows)
+            for key in key_values_dict:
+                self.row_pos[key] = len(self.row_keys)
+                self.row_keys.append(key)
+            self.active_bits.extend(_array_to_bitsets(active))
+            self.uncertain_bits.extend(_array_to_bitsets(uncertain))
+
+        if serialize:
+            self.serialize()
+    #~ def add_rows_by_keys()
+
+    def delete_rows_by_key(self, key_list, serialize=True):
+        """ delete the rows for the given keys
+        :param key_list: collection of key whose rows to delete
+        :param serialize: (bool) decide whether to serialize the matrix
+                         to file after deletion
+        :return: nothing
+        """
+        key_list = set(key_list)
+        kept = [p for p, k in enumerate(self.row_keys) if k not in key_list]
+        self.row_keys = [self.row_keys[p] for p in kept]
+        self.active_bits = [self.active_bits[p] for p in kept]
+        self.uncertain_bits = [self.uncertain_bits[p] for p in kept]
+        self._index_rows()
+
+        if serialize:
+            self.serialize()
+    #~ def delete_rows_by_key()
+
+    def to_pandas_df(self):
+        """ return the matrix as a pandas dataframe 
+        :return: a pandas dataframe with the cell values
+                (modifying the dataframe do ot affect the matrix)
+        """
+        ordered_cols = [self.key_column_name] + self.non_key_col_list
+        values = self._get_values_array(range(len(self.row_keys)))
+        dataframe = pd.DataFrame(values, columns=self.non_key_col_list)
+        dataframe = dataframe.astype(self.cell_dtype)
+        dataframe.insert(0, self.key_column_name, \
+                                    pd.Series(self.row_keys, dtype=object))
+        return dataframe[ordered_cols]
+    #~ def to_pandas_df()
+
+    def get_keys(self):
+        """ get a pandas serie of the keys (example mutant ids)
+        """
+        return pd.Series(self.row_keys, dtype=object, \
+                                                name=self.key_column_name)
+    #~ def get_keys()
+
+    def is_empty(self):
+        """ Check that the matrix have no row (all columns have no row)
+        """
+        return len(self.row_keys) == 0
+    #~ def is_empty()
+
+    def _get_row_positions(self, row_key_list):
+        """ get the positions, ordered as in the matrix, of the row keys
+        """
+        ERROR_HANDLER.assert_true(\
+                        len(set(row_key_list) - set(self.row_pos)) == 0,\
+                                    "invalid row key passed to extract row", \
+                                                                    __file__)
+        return sorted({self.row_pos[k] for k in row_key_list})
+    #~ def _get_row_positions()
+
+    def extract_by_rowkey(self, row_key_list, out_filename=None):
+        """ get the sub-matrix with the rows keys corresponding to the
+            values in the passed list.
+            Note that the order of keys in row_key_list is not guaranted
+        :param row_key_list: collection of row keys to extract. 
+                            Must not be empty and every key must exist
+        :param out_filename: Optional filename to use as storage for the 
+                            extracted matrix. Default is None (no storage)
+        :return: matrix which is sub matrix of this
+        """
+        ERROR_HANDLER.assert_true(len(row_key_list) > 0, \
+                                    "key list should not be empty", __file__)
+        return self._copy_with(self._get_row_positions(row_key_list), \
+                                        self.non_key_col_list, out_filename)
+    #~ def extract_by_rowkey()
+
+    def extract_by_column(self, non_key_col_list, out_filename=None):
+        """ get the sub-matrix with the columns corresponding to the
+            values in the passed list.
+            Note that the order is maintained if a list is passed
+        :param non_key_col_list: collection of columns to extract. 
+                            Must not be empty and every column must exist
+        :param out_filename: Optional filename to use as storage for the 
+                            extracted matrix. Default is None (no storage)
+        :return: matrix which is sub matrix of this
+        """
+        ERROR_HANDLER.assert_true(len(non_key_col_list) > 0, \
+                                    "col list should not be empty", __file__)
+        ERROR_HANDLER.assert_true(len(set(non_key_col_list) - \
+                                        set(self.non_key_col_list)) == 0, \
+                                    "invalid column passed to extract col", \
+                                                                    __file__)
+        return self._copy_with(range(len(self.row_keys)), \
+                                        list(non_key_col_list), out_filename)
+    #~ def extract_by_column()
+
+    def _query_columns_of_row_bits(self, row_key_list, get_row_bits):
+        if row_key_list is None:
+            row_key_list = self.row_keys
+        result = {}
+        if len(row_key_list) > 0:
+            n_cols = len(self.non_key_col_list)
+            positions = self._get_row_positions(row_key_list)
+            bits = _bitsets_to_array([get_row_bits(p) for p in positions], \
+                                                                    n_cols)
+            for p, row_bits in zip(positions, bits):
+                result[self.row_keys[p]] = \
+                                [sys.intern(self.non_key_col_list[c]) \
+                                            for c in np.flatnonzero(row_bits)]
+        return result
+    #~ def _query_columns_of_row_bits()
+
+    def _query_rows_of_column_bits(self, non_key_col_list, get_row_bits):
+        if non_key_col_list is None:
+            non_key_col_list = self.non_key_col_list
+        result = {}
+        if len(non_key_col_list) > 0:
+            ERROR_HANDLER.assert_true(len(set(non_key_col_list) - \
+                                                set(self.col_pos)) == 0, \
+                                    "invalid column passed to extract col", \
+                                                                    __file__)
+            packed = _bitsets_to_packed(\
+                            [get_row_bits(p) for p in \
+                                            range(len(self.row_keys))], \
+                                                len(self.non_key_col_list))
+            for col in non_key_col_list:
+                c = self.col_pos[col]
+                rows = (packed[:, c >> 3] >> (c & 7)) & 1
+                result[col] = [sys.intern(self.row_keys[p]) \
+                                                for p in np.flatnonzero(rows)]
+        return result
+    #~ def _query_rows_of_column_bits()
+
+    def query_active_columns_of_rows(self, row_key_list=None):
+        ''' return a dict in the form row2cols
+        :param row_key_list: list of rows to query for
+        :return: a dict representing a mapping between the passed rows
+                and the list of columns active for those rows
+        '''
+        return self._query_columns_of_row_bits(row_key_list, \
+                                            lambda p: self.active_bits[p])
+    #~ def query_active_columns_of_rows()
+
+    def query_active_rows_of_columns(self, non_key_col_list=None):
+        ''' return a dict in the form col2rows
+        :param non_key_col_list: list of columns to query for
+        :return: a dict representing a mapping between the passed columns
+                and the list of rows active for those columns
+        '''
+        return self._query_rows_of_column_bits(non_key_col_list, \
+                                            lambda p: self.active_bits[p])
+    #~ def query_active_rows_of_columns()
+
+    def query_inactive_columns_of_rows(self, row_key_list=None):
+        ''' return a dict in the form row2cols
+        :param row_key_list: list of rows to query for
+        :return: a dict representing a mapping between the passed rows
+                and the list of columns inactive for those rows
+        '''
+        return self._query_columns_of_row_bits(row_key_list, \
+                                                    self._get_inactive_bits)
+    #~ def query_inactive_columns_of_rows()
+
+    def query_inactive_rows_of_columns(self, non_key_col_list=None):
+        ''' return a dict in the form col2rows
+        :param non_key_col_list: list of columns to query for
+        :return: a dict representing a mapping between the passed columns
+                and the list of rows inactive for those columns
+        '''
+        return self._query_rows_of_column_bits(non_key_col_list, \
+                                                    self._get_inactive_bits)
+    #~ def query_inactive_rows_of_columns()
+
+    def query_uncertain_columns_of_rows(self, row_key_list=None):
+        ''' return a dict in the form row2cols
+        :param row_key_list: list of rows to query for
+        :return: a dict representing a mapping between the passed rows
+                and the list of columns uncertain for those rows
+        '''
+        return self._query_columns_of_row_bits(row_key_list, \
+                                            lambda p: self.uncertain_bits[p])
+    #~ def query_uncertain_columns_of_rows()
+
+    def query_uncertain_rows_of_columns(self, non_key_col_list=None):
+        ''' return a dict in the form col2rows
+        :param non_key_col_list: list of columns to query for
+        :return: a dict representing a mapping between the passed columns
+                and the list of rows uncertain for those columns
+        '''
+        return self._query_rows_of_column_bits(non_key_col_list, \
+                                            lambda p: self.uncertain_bits[p])
+    #~ def query_uncertain_rows_of_columns()
+
+    def _get_key_values_dict(self, keys=None):
+        """ compute a dict object with key each element of keys and value
+            the corresponding dict representation of the row(without the key)
+        :param keys: list of keys of interest to get values. 
+                        If None, all keys are considered
+        :return: dict representing a mapping between the row keys and their 
+                    row values. 
+                    each row value is a dict of column to cell value
+        """
+        if keys is None:
+            keys = self.row_keys
+        k_v_dict = {}
+        if len(keys) > 0:
+            positions = self._get_row_positions(keys)
+            values = self._get_values_array(positions)
+            for p, row_vals in zip(positions, values.tolist()):
+                k_v_dict[self.row_keys[p]] = \
+                                    dict(zip(self.non_key_col_list, row_vals))
+        return k_v_dict
+    #~ def _get_key_values_dict()
+
+    def update_cells(self, key, values):
+        """ Update the values for the key with the values 
+        :param key: key whose values to update
+        :param values: dict representing the new cell values by column name
+        :return: nothing
+        """
+        ERROR_HANDLER.assert_true(key in self.row_pos, \
+                                "updating a missing key: "+str(key), __file__)
+        pos = self.row_pos[key]
+        col_positions = [self.col_pos[c] for c in values]
+        active, uncertain = self._get_states_arrays([list(values.values())])
+        masks = np.zeros((3, len(self.non_key_col_list)), dtype=bool)
+        masks[0, col_positions] = True
+        masks[1, col_positions] = active[0]
+        masks[2, col_positions] = uncertain[0]
+        updated, new_active, new_uncertain = _array_to_bitsets(masks)
+        self.active_bits[pos] = (self.active_bits[pos] & ~updated) | \
+                                                                    new_active
+        self.uncertain_bits[pos] = (self.uncertain_bits[pos] & ~updated) | \
+                                                                new_uncertain
+    #~ def update_cells()
+
+    def _merge_other_matrix(self, other_matrix):
+        """ Add the columns and rows of other_matrix that are not in this
+            matrix and set the cells of other_matrix (updating the bitsets
+            of the existing rows)
+        """
+        col_to_add = [c for c in other_matrix.get_nonkey_colname_list() \
+                                            if c not in self.col_pos]
+        self._append_uncertain_columns(col_to_add)
+
+        other_keys = list(other_matrix.get_keys())
+        new_rows = [k for k in other_keys if k not in self.row_pos]
+        row_existing = [k for k in other_keys if k in self.row_pos]
+        self.add_rows_by_keys(other_matrix._get_key_values_dict(new_rows), \
+                                                            serialize=False)
+        for key, values in other_matrix._get_key_values_dict(\
+                                                        row_existing).items():
+            self.update_cells(key, values)
+    #~ def _merge_other_matrix()
+
+    def _append_uncertain_columns(self, col_list):
+        """ add the columns, with uncertain value in every row
+        """
+        new_bits = 0
+        for col in col_list:
+            new_bits |= 1 << len(self.non_key_col_list)
+            self.non_key_col_list.append(col)
+        self._index_columns()
+        self.uncertain_bits = [b | new_bits for b in self.uncertain_bits]
+    #~ def _append_uncertain_columns()
+#~ class RawBitPackedExecutionMatrix
+
+class BitPackedExecutionMatrix(RawBitPackedExecutionMatrix):
+    '''
+        This class is the default extension of the class 
+        RawBitPackedExecutionMatrix, with the same cell values as
+        ExecutionMatrix.
+    '''
+    def __init__(self, filename=None, non_key_col_list=None):
+        RawBitPackedExecutionMatrix.__init__(self, filename=filename, \
+                                            non_key_col_list=non_key_col_list)
+    #~ def __init__()
+#~ class BitPackedExecutionMatrix
+
+
+def _smallest_int_array(values, small_dtype):
+    """ get the array of the integers values, of small_dtype when they fit
+    """
+    if len(values) == 0 or (min(values) >= np.iinfo(small_dtype).min and \
+                                    max(values) <= np.iinfo(small_dtype).max):
+        return np.array(values, dtype=small_dtype)
+    return np.array(values, dtype=np.int64)
+#~ def _smallest_int_array()
+
+class _OutputLogColumns(object):
+    '''
+        Columnar representation of output log data: the lists of the 
+        objectives, the tests and the distinct output hashes (their IDs
+        are their positions), and a record per (objective, test) in each
+        of the arrays of RECORD_FIELDS. The hash ID of uncertain records
+        is -1.
+    '''
+    RECORD_FIELDS = ("objective", "test", "len", "retcode", "timedout", \
+                                                                    "hash")
+
+    def __init__(self, objectives, tests, hashes, records):
+        self.objectives = objectives
+        self.tests = tests
+        self.hashes = hashes
+        self.records = records
+    #~ def __init__()
+
+    def get_hash_bodies(self):
+        """ get the pair of the array of the utf-8 bytes of the hashes, 
+            concatenated, and the array of their offsets
+        """
+        encoded = [h.encode('utf-8', 'surrogatepass') for h in self.hashes]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(e) for e in encoded], dtype=np.int64)
+        blob = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+        return blob, offsets
+    #~ def get_hash_bodies()
+
+    @staticmethod
+    def get_hashes_from_bodies(blob, offsets):
+        blob = blob.tobytes()
+        offsets = offsets.tolist()
+        return [sys.intern(blob[offsets[i]:offsets[i+1]].decode('utf-8', \
+                        'surrogatepass')) for i in range(len(offsets) - 1)]
+    #~ def get_hashes_from_bodies()
+#~ class _OutputLogColumns
 
 class OutputLogData(object):
+    '''
+        Output log data of the tests executions, per test objective:
+        {objective: {test: {OUTLOG_LEN, OUTLOG_HASH, RETURN_CODE, TIMEDOUT}}}
+
+        When the matrix file format is BINARY (see set_matrix_file_format),
+        the data is serialized as columns (see _OutputLogColumns): the 
+        table of distinct hashes, and fixed width records (int32 length, 
+        int16 return code, bool timeout and hash ID, when the values fit),
+        using the binary matrix file layout. The files named with the JSON
+        extension are always written as JSON. A binary file is loaded 
+        memory-mapped, and the nested dicts are only created when the data
+        is accessed (`data`).
+    '''
     #OBJECTIVE_ID = "OBJECTIVE_ID"
     #TEST_ID = "TEST_ID"
     OUTLOG_LEN = "OUTLOG_LEN"       # int
@@ -764,6 +1794,8 @@ class OutputLogData(object):
                 TIMEDOUT: common_mix.GlobalConstants.COMMAND_UNCERTAIN,
     }
 
+    _BINARY_ENCODING = "outlogdata"
+
     @classmethod
     def outlogdata_equiv(cls, outlogdata1, outlogdata2):
         if outlogdata1 == cls.UNCERTAIN_TEST_OUTLOGDATA or \
@@ -777,32 +1809,249 @@ class OutputLogData(object):
 
     def __init__(self, filename=None):
         self.filename = filename
+        # One of the nested dicts and the columns is set
+        self._data = None
+        self._columns = None
         if self.filename is None or not os.path.isfile(self.filename):
-            self.data = {}
+            self._data = {}
+        elif _is_binary_matrix_file(self.filename):
+            self._columns = self._load_binary_columns(self.filename)
         else:
-            self.data = {objective: self._mem_optimize_sub_dat(test2dat) \
+            self._data = {objective: self._mem_optimize_sub_dat(test2dat) \
                                 for objective, test2dat in \
                                     common_fs.loadJSON(self.filename).items()}
     #~ def __init__()
 
+    @property
+    def data(self):
+        """ The nested dicts of the data (created from the columns on the
+            first access)
+        """
+        if self._data is None:
+            self._data = self._columns_to_data(self._columns)
+            self._columns = None
+        return self._data
+    #~ def data()
+
     @classmethod
     def _mem_optimize_sub_dat(cls, test2dat):
         res = {}
         for t, dat in test2dat.items():
             t = sys.intern(t)
-            dat[cls.OUTLOG_HASH] = sys.intern(dat[cls.OUTLOG_HASH])
+            if isinstance(dat[cls.OUTLOG_HASH], str):
+                dat[cls.OUTLOG_HASH] = sys.intern(dat[cls.OUTLOG_HASH])
             res[t] = dat
         return res
     #~ def _mem_optimize_sub_dat()
 
+    @classmethod
+    def _data_to_columns(cls, data):
+        """ get the columns of the nested dicts data, or None if some 
+            values cannot be represented in columns
+        """
+        test_pos = {}
+        hash_pos = {}
+        fields = {f: [] for f in _OutputLogColumns.RECORD_FIELDS}
+        for obj_id, test2dat in enumerate(data.values()):
+            for test, dat in test2dat.items():
+                fields["objective"].append(obj_id)
+                fields["test"].append(test_pos.setdefault(test, \
+                                                            len(test_pos)))
+                if dat == cls.UNCERTAIN_TEST_OUTLOGDATA:
+                    out_len, retcode, timedout, hash_id = 0, 0, False, -1
+                else:
+                    out_len = dat[cls.OUTLOG_LEN]
+                    retcode = dat[cls.RETURN_CODE]
+                    timedout = dat[cls.TIMEDOUT]
+                    out_hash = dat[cls.OUTLOG_HASH]
+                    if not (isinstance(out_len, (int, np.integer)) and \
+                                isinstance(retcode, (int, np.integer)) and \
+                                isinstance(timedout, (bool, np.bool_)) and \
+                                                isinstance(out_hash, str)):
+                        return None
+                    hash_id = hash_pos.setdefault(out_hash, len(hash_pos))
+                fields["len"].append(int(out_len))
+                fields["retcode"].append(int(retcode))
+                fields["timedout"].append(bool(timedout))
+                fields["hash"].append(hash_id)
+        records = {
+            "objective": np.array(fields["objective"], dtype=np.int32),
+            "test": np.array(fields["test"], dtype=np.int32),
+            "len": _smallest_int_array(fields["len"], np.int32),
+            "retcode": _smallest_int_array(fields["retcode"], np.int16),
+            "timedout": np.array(fields["timedout"], dtype=bool),
+            "hash": np.array(fields["hash"], dtype=np.int32),
+        }
+        return _OutputLogColumns(list(data), list(test_pos), list(hash_pos), \
+                                                                    records)
+    #~ def _data_to_columns()
+
+    @classmethod
+    def _columns_to_data(cls, columns):
+        tests = [sys.intern(t) for t in columns.tests]
+        data = {objective: {} for objective in columns.objectives}
+        objectives = [data[o] for o in columns.objectives]
+        records = columns.records
+        for obj_id, test_id, out_len, retcode, timedout, hash_id in \
+                    zip(*[records[f].tolist() for f in \
+                                        _OutputLogColumns.RECORD_FIELDS]):
+            if hash_id < 0:
+                dat = dict(cls.UNCERTAIN_TEST_OUTLOGDATA)
+            else:
+                dat = {
+                    cls.OUTLOG_LEN: out_len,
+                    cls.OUTLOG_HASH: columns.hashes[hash_id],
+                    cls.RETURN_CODE: retcode,
+                    cls.TIMEDOUT: timedout,
+                }
+            objectives[obj_id][tests[test_id]] = dat
+        return data
+    #~ def _columns_to_data()
+
+    @classmethod
+    def _load_binary_columns(cls, filename):
+        header, bodies = _load_binary_matrix(filename)
+        ERROR_HANDLER.assert_true(header["encoding"] == cls._BINARY_ENCODING, \
+                    "not an output log data file: "+str(filename), __file__)
+        n_fields = len(_OutputLogColumns.RECORD_FIELDS)
+        records = dict(zip(_OutputLogColumns.RECORD_FIELDS, \
+                                                        bodies[:n_fields]))
+        hashes = _OutputLogColumns.get_hashes_from_bodies(*bodies[n_fields:])
+        return _OutputLogColumns(header["keys"], header["columns"], hashes, \
+                                                                    records)
+    #~ def _load_binary_columns()
+
+    def _get_columns(self):
+        """ get the columns of the data, or None if the data cannot be 
+            represented in columns
+        """
+        if self._data is None:
+            return self._columns
+        return self._data_to_columns(self._data)
+    #~ def _get_columns()
+
     def is_empty(self):
-        return len(self.data) == 0
+        if self._data is None:
+            return len(self._columns.objectives) == 0
+        return len(self._data) == 0
     #~ def is_empty()
 
     def get_zip_objective_and_data(self):
         return self.data.items()
     #~ def get_zip_objective_and_data()
 
+    def get_tests_not_equiv_to(self, reference_outlogdata):
+        """ Compare, at once on the columns, the output log data of each
+            objective with the output log data of the single objective of
+            reference_outlogdata, using outlogdata_equiv.
+        :param reference_outlogdata: OutputLogData with a single objective,
+                    having all the tests of this data
+        :return: dict of each objective to the set of its tests whose data
+                    are not equivalent to the reference's data (including
+                    uncertain data)
+        """
+        cols, not_equiv = self._get_not_equiv_records(reference_outlogdata)
+        if cols is None:
+            return not_equiv
+        res = {objective: set() for objective in cols.objectives}
+        records = cols.records
+        for obj_id, test_id in zip(records["objective"][not_equiv].tolist(), \
+                                        records["test"][not_equiv].tolist()):
+            res[cols.objectives[obj_id]].add(cols.tests[test_id])
+        return res
+    #~ def get_tests_not_equiv_to()
+
+    def get_not_equiv_mask(self, reference_outlogdata, objective_list, \
+                                                                test_list):
+        """ Same as get_tests_not_equiv_to, with the result as a boolean 
+            2D array whose rows are the objectives of objective_list and 
+            columns the tests of test_list (the other tests are ignored).
+            Every objective with non equivalent data must be in 
+            objective_list.
+        """
+        cols, not_equiv = self._get_not_equiv_records(reference_outlogdata)
+        mask = np.zeros((len(objective_list), len(test_list)), dtype=bool)
+        obj_pos = {o: i for i, o in enumerate(objective_list)}
+        test_pos = {t: i for i, t in enumerate(test_list)}
+        if cols is None:
+            for objective, tests in not_equiv.items():
+                tests = [test_pos[t] for t in tests if t in test_pos]
+                if len(tests) > 0:
+                    ERROR_HANDLER.assert_true(objective in obj_pos, \
+                            "objective missing: "+str(objective), __file__)
+                    mask[obj_pos[objective], tests] = True
+            return mask
+
+        obj_map = np.array([obj_pos.get(o, -1) for o in cols.objectives] \
+                                                            , dtype=np.int64)
+        test_map = np.array([test_pos.get(t, -1) for t in cols.tests], \
+                                                            dtype=np.int64)
+        rows = obj_map[cols.records["objective"][not_equiv]]
+        columns = test_map[cols.records["test"][not_equiv]]
+        kept = columns >= 0
+        ERROR_HANDLER.assert_true(not np.any(rows[kept] < 0), \
+                            "objective missing in objective_list", __file__)
+        mask[rows[kept], columns[kept]] = True
+        return mask
+    #~ def get_not_equiv_mask()
+
+    def _get_not_equiv_records(self, reference_outlogdata):
+        """ get the pair of the columns of this data and the boolean array 
+            of its records that are not equivalent to the reference's.
+            When the data cannot be represented in columns, get the pair of
+            None and the result of get_tests_not_equiv_to (computed by
+            comparing the dicts)
+        """
+        ref_cols = reference_outlogdata._get_columns()
+        cols = self._get_columns()
+        if ref_cols is None or cols is None:
+            _, ref_data = list(\
+                        reference_outlogdata.get_zip_objective_and_data())[0]
+            res = {}
+            for objective, test2dat in self.get_zip_objective_and_data():
+                ERROR_HANDLER.assert_true(\
+                                len(set(test2dat) - set(ref_data)) == 0, \
+                            "The elements in target must all be in vector",\
+                                                                    __file__)
+                res[objective] = {t for t, dat in test2dat.items() \
+                            if not self.outlogdata_equiv(dat, ref_data[t])}
+            return None, res
+
+        ERROR_HANDLER.assert_true(len(ref_cols.objectives) == 1, \
+                    "the reference must have a single objective", __file__)
+        # Reference records by test ID
+        ref_test_pos = {t: i for i, t in enumerate(ref_cols.tests)}
+        ref_fields = {}
+        for field in ("len", "retcode", "timedout", "hash"):
+            ref_fields[field] = np.zeros(len(ref_cols.tests), \
+                                        dtype=ref_cols.records[field].dtype)
+            ref_fields[field][ref_cols.records["test"]] = \
+                                                    ref_cols.records[field]
+        # Map the tests and hashes IDs to the reference's
+        test_map = np.array([ref_test_pos.get(t, -1) for t in cols.tests] \
+                                                    + [-1], dtype=np.int64)
+        ref_hash_pos = {h: i for i, h in enumerate(ref_cols.hashes)}
+        # -2 never matches (hash not in reference), -1 stays uncertain
+        hash_map = np.array([ref_hash_pos.get(h, -2) for h in cols.hashes] \
+                                                    + [-1], dtype=np.int64)
+
+        records = cols.records
+        ref_tests = test_map[records["test"]]
+        ERROR_HANDLER.assert_true(not np.any(ref_tests < 0), \
+                            "The elements in target must all be in vector",\
+                                                                    __file__)
+        hashes = hash_map[records["hash"]]
+        ref_hashes = ref_fields["hash"][ref_tests]
+        timedouts = records["timedout"]
+        ref_timedouts = ref_fields["timedout"][ref_tests]
+        equal = (records["len"] == ref_fields["len"][ref_tests]) & \
+                (records["retcode"] == ref_fields["retcode"][ref_tests]) & \
+                (timedouts == ref_timedouts) & (hashes == ref_hashes)
+        not_equiv = (hashes == -1) | (ref_hashes < 0) | \
+                                    ~(equal | (timedouts & ref_timedouts))
+        return cols, not_equiv
+    #~ def _get_not_equiv_records()
+
     def add_data (self, data_dict, check_all=True, override_existing=False, \
                                 ask_confirmation_with_exist_missing=False, \
                                                             serialize=False):
@@ -857,11 +2106,27 @@ class OutputLogData(object):
                                 serialize=serialize)
     #~ def update_with_other_matrix()
 
-    def serialize(self):
-        """ Serialize the matrix to its corresponding file if not None
+    def serialize(self, out_filename=None):
+        """ Serialize the data to its corresponding file if not None,
+            or to out_filename if specified, in the format set with
+            set_matrix_file_format (JSON if the file name has the JSON
+            extension)
         """
-        if self.filename is not None:
-            common_fs.dumpJSON(self.data, self.filename, pretty=True)
+        if out_filename is None:
+            out_filename = self.filename
+        if out_filename is None:
+            return
+        columns = None
+        if _is_binary_serialized(out_filename, JSON_OUTLOG_FILE_EXTENSION):
+            columns = self._get_columns()
+        if columns is None:
+            common_fs.dumpJSON(self.data, out_filename, pretty=True)
+        else:
+            bodies = [columns.records[f] \
+                                for f in _OutputLogColumns.RECORD_FIELDS]
+            bodies += list(columns.get_hash_bodies())
+            _dump_binary_matrix(out_filename, None, columns.tests, \
+                        columns.objectives, self._BINARY_ENCODING, bodies)
     #~ def serialize()
 
     def get_store_filename(self):
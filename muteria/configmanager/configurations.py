@@ -26,6 +26,7 @@ import os
 import logging
 
 import muteria.common.mix as common_mix 
+from muteria.common.matrices import MatrixBackend, MatrixFileFormat
 
 from muteria.drivers.testgeneration import TestToolType
 
@@ -110,6 +111,28 @@ class CompleteConfiguration(object):
 
     # PARALELISM
     SINGLE_REPO_PARALLELISM = 1 # Max number of parallel exec in a repo dir
+    # Number of criteria elements (mutants) executed at once (separated exec)
+    SEPARATED_CRITERIA_PARALLELISM = 1
+    # Number of tests executed at once for the meta criteria coverage
+    META_CRITERIA_PARALLELISM = 1
+    # Max number of independent meta tasks executed at once (see Resources)
+    TASKS_PARALLELISM = 1
+    # Max number of test generation tools running at once
+    TESTS_GENERATION_PARALLELISM = 1
+
+    # Storage of the execution matrices (value of type MatrixBackend)
+    EXECUTION_MATRIX_BACKEND = MatrixBackend.PANDAS_DATAFRAME
+    # Format of the working matrices files (value of type
+    # MatrixFileFormat), named with the '.mtx' extension when BINARY.
+    # The result matrices files are always CSV ('.csv'), and the
+    # result execution output log data files always JSON ('.json').
+    # Files of both formats are readable. CSV is for legacy
+    # (the working output log data files are then JSON)
+    MATRICES_FILE_FORMAT = MatrixFileFormat.BINARY
+
+    # Number of checkpoints appended to the checkpoint journal between
+    # two full checkpoint rewrites (None to always rewrite the checkpoint)
+    CHECKPOINT_JOURNAL_COMPACTION_PERIOD = 1000
 
     # MICRO CONTROLS
     EXECUTE_ONLY_CURENT_CHECKPOINT_META_TASK = False # for Debugging
@@ -443,6 +466,16 @@ class TestcaseToolsConfig(BaseToolConfig):
     # Scaling factor to apply on recorded test execution time before using
     # as timeout on cosecutive executions
     RECORDED_TEST_TIMEOUT_FACTOR = 5
+
+    # Number of execution times recorded per test (the latest are kept).
+    # The recorded time of a test is the RECORDED_TEST_TIME_PERCENTILE
+    # percentile of its recorded execution times
+    RECORDED_TEST_TIME_SAMPLES = 5
+    RECORDED_TEST_TIME_PERCENTILE = 95
+
+    # Time (in seconds) added to the timeouts computed from the recorded
+    # test execution times (Handle the startup time variations)
+    RECORDED_TEST_TIMEOUT_MARGIN = 1.0
     
     # Whether to compress generated test storage dir. 
     # When true, the generated test storage dir is compressed into a tarball
@@ -466,6 +499,12 @@ class TestcaseToolsConfig(BaseToolConfig):
         self.OUTLOG_MAX_ALLOWED_BYTES_SIZE = value
     def set_recorded_test_timeout_factor(self, value):
         self.RECORDED_TEST_TIMEOUT_FACTOR = value
+    def set_recorded_test_time_samples(self, value):
+        self.RECORDED_TEST_TIME_SAMPLES = value
+    def set_recorded_test_time_percentile(self, value):
+        self.RECORDED_TEST_TIME_PERCENTILE = value
+    def set_recorded_test_timeout_margin(self, value):
+        self.RECORDED_TEST_TIMEOUT_MARGIN = value
     def set_compress_test_storage_dir(self, value):
         self.COMPRESS_TEST_STORAGE_DIR = value
 #~class TestcaseToolsConfig
@@ -7,6 +7,8 @@ from muteria.configmanager.configurations import TestcaseToolsConfig
 from muteria.configmanager.configurations import CriteriaToolsConfig
 from muteria.configmanager.configurations import ToolUserCustom
 
+from muteria.common.matrices import MatrixBackend, MatrixFileFormat
+
 from muteria.drivers.criteria import TestCriteria
 from muteria.drivers.criteria import CriteriaToolType
 
@@ -43,6 +45,28 @@ HASH_OUTLOG = True
 
 # PARALELISM
 SINGLE_REPO_PARALLELISM = 1 # Max number of parallel exec in a repo dir
+# Number of criteria elements (mutants) executed at once (separated exec)
+SEPARATED_CRITERIA_PARALLELISM = 1
+# Number of tests executed at once for the meta criteria coverage
+META_CRITERIA_PARALLELISM = 1
+# Max number of independent meta tasks executed at once (see Resources)
+TASKS_PARALLELISM = 1
+# Max number of test generation tools running at once
+TESTS_GENERATION_PARALLELISM = 1
+
+# Storage of the execution matrices (value of type MatrixBackend)
+EXECUTION_MATRIX_BACKEND = MatrixBackend.PANDAS_DATAFRAME
+# Format of the working matrices files (value of type
+# MatrixFileFormat), named with the '.mtx' extension when BINARY.
+# The result matrices files are always CSV ('.csv'), and the
+# result execution output log data files always JSON ('.json').
+# Files of both formats are readable. CSV is for legacy
+# (the working output log data files are then JSON)
+MATRICES_FILE_FORMAT = MatrixFileFormat.BINARY
+
+# Number of checkpoints appended to the checkpoint journal between
+# two full checkpoint rewrites (None to always rewrite the checkpoint)
+CHECKPOINT_JOURNAL_COMPACTION_PERIOD = 1000
 
 # MICRO CONTROLS
 EXECUTE_ONLY_CURENT_CHECKPOINT_META_TASK = False # for Debugging
@@ -10,6 +10,9 @@
                     the different tasks as well as their status.
                     The state changes as well as the task to run next are 
                     also implemented in the class.
+    - `Resources` enum and `tasks_conflict` function: resources used by
+                    the tasks, and whether two tasks can be executed at
+                    the same time.
 """
 
 
@@ -52,6 +55,63 @@ class Status(common_mix.EnumAutoName):
     DONE = 1 #enum.auto()
 #~ class Status
 
+class Resources(common_mix.EnumAutoName):
+    # The repository files (default build)
+    REPOSITORY = 0 #enum.auto()
+    # The meta test tool (with its checkpointer)
+    META_TEST_TOOL = 1 #enum.auto()
+    # The meta criteria tool (with its checkpointer)
+    META_CRITERIA_TOOL = 2 #enum.auto()
+    # The pass fail matrix and execution output files
+    PASS_FAIL_RESULTS = 3 #enum.auto()
+#~ class Resources
+
+# Resources used by each task as pair of exclusive and shared resources.
+# The builds are done under the repository lock and their outputs are
+# copied out, thus building only is a shared use of the repository,
+# while executing tests needs the repository to stay in default state.
+# The tasks never change the process working directory (the commands are
+# given their cwd), because the non conflicting tasks run concurrently.
+_TASKS_RESOURCES = {
+    Tasks.STARTING: (set(), set()),
+    Tasks.TESTS_GENERATION_GUIDANCE: (set(), set()),
+    Tasks.TESTS_GENERATION: ({Resources.META_TEST_TOOL}, \
+                                                    {Resources.REPOSITORY}),
+    Tasks.TESTS_GENERATION_USING_CRITERIA: ({Resources.META_TEST_TOOL, \
+                                                Resources.META_CRITERIA_TOOL},\
+                                                    {Resources.REPOSITORY}),
+    Tasks.TESTS_EXECUTION_SELECTION_PRIORITIZATION: ({Resources.REPOSITORY, \
+                                            Resources.META_TEST_TOOL}, set()),
+    Tasks.PASS_FAIL_TESTS_EXECUTION: ({Resources.REPOSITORY, \
+                                        Resources.META_TEST_TOOL, \
+                                        Resources.PASS_FAIL_RESULTS}, set()),
+    Tasks.CRITERIA_GENERATION_GUIDANCE: (set(), set()),
+    Tasks.CRITERIA_GENERATION: ({Resources.META_CRITERIA_TOOL}, \
+                                                    {Resources.REPOSITORY}),
+    Tasks.CRITERIA_EXECUTION_SELECTION_PRIORITIZATION: (\
+                                        {Resources.META_CRITERIA_TOOL}, set()),
+    Tasks.CRITERIA_TESTS_EXECUTION: ({Resources.REPOSITORY, \
+                                        Resources.META_TEST_TOOL, \
+                                        Resources.META_CRITERIA_TOOL, \
+                                        Resources.PASS_FAIL_RESULTS}, set()),
+    Tasks.PASS_FAIL_STATS: ({Resources.PASS_FAIL_RESULTS}, set()),
+    Tasks.CRITERIA_STATS: (set(), set()),
+    Tasks.AGGREGATED_STATS: (set(Resources), set()),
+    Tasks.FINISHED: (set(Resources), set()),
+}
+
+def tasks_conflict(task1, task2):
+    """ Check whether the two tasks cannot be executed at the same time,
+        because a resource used by one is used exclusively by the other
+    """
+    excl1, shared1 = _TASKS_RESOURCES[task1]
+    excl2, shared2 = _TASKS_RESOURCES[task2]
+    # A task using all the resources exclusively is executed alone
+    if excl1 == set(Resources) or excl2 == set(Resources):
+        return True
+    return len(excl1 & (excl2 | shared2)) > 0 or len(excl2 & shared1) > 0
+#~ def tasks_conflict()
+
 class TaskOrderingDependency(object): 
     '''
     The task dependency structure is following(The structure neve change):
@@ -12,6 +12,9 @@ import math
 import copy
 import random
 import inspect
+import threading
+
+import joblib
 
 import muteria.common.mix as common_mix
 import muteria.common.fs as common_fs
@@ -130,6 +133,8 @@ class Executor(object):
         """
         self.config = config
         self.top_timeline_explorer = top_timeline_explorer
+        # Lock of the checkpoint data, shared by concurrent tasks
+        self.cp_lock = threading.RLock()
 
         self.head_explorer = self.top_timeline_explorer.get_latest_explorer()
         # Initialize output structure
@@ -228,7 +233,7 @@ class Executor(object):
                         test_types_pos=0,\
                         criteria_set=None,\
                         criteria_set_pos=None)
-            self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+            self._write_checkpoint()
 
         # Ensure that the repository exe and obj are in default state
         self.cb_factory.set_repo_to_build_default()
@@ -300,9 +305,8 @@ class Executor(object):
                                                                         False)
                     
                 
-                # 3. execute the tasks  (TODO: parallelism)
-                for task in task_set:
-                    self._execute_task(task)
+                # 3. execute the tasks
+                self._execute_tasks(task_set)
 
                 # (Break flow)
                 if self.config.EXECUTE_ONLY_CURENT_CHECKPOINT_META_TASK.\
@@ -509,6 +513,10 @@ class Executor(object):
                                     COVER_CRITERIA_ELEMENTS_ONCE.get_val(),\
                             prioritization_module_by_criteria=\
                                     meta_criteriaexec_optimization_tools,\
+                            parallel_count=self.config.\
+                                    SEPARATED_CRITERIA_PARALLELISM.get_val(),\
+                            meta_parallel_count=self.config.\
+                                    META_CRITERIA_PARALLELISM.get_val(),\
                             finish_destroy_checkpointer=True)
                 
                 os.remove(matrix_file)
@@ -561,17 +569,18 @@ class Executor(object):
                 if self.meta_testcase_tool.has_checkpointer():
                     self.meta_testcase_tool.get_checkpoint_state_object()\
                                                         .destroy_checkpoint()
-                self.cp_data.tasks_obj.set_task_executing(task)
-                self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+                self._checkpoint_task_executing(task)
 
             # Generate the tests without criteria instrumented
             self.meta_testcase_tool.generate_tests(\
                             meta_criteria_tool_obj=None, \
-                            test_tool_type_list=self.cp_data.test_types)
+                            test_tool_type_list=self.cp_data.test_types, \
+                            parallel_testgen_count=\
+                                self.config.TESTS_GENERATION_PARALLELISM\
+                                                                .get_val())
 
             # @Checkpointing
-            self.cp_data.tasks_obj.set_task_completed(task)
-            self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+            self._checkpoint_task_completed(task)
             # Destroy meta test checkpointer
             self.meta_testcase_tool.get_checkpoint_state_object()\
                                                         .destroy_checkpoint()
@@ -584,17 +593,18 @@ class Executor(object):
                 if self.meta_testcase_tool.has_checkpointer():
                     self.meta_testcase_tool.get_checkpoint_state_object()\
                                                         .destroy_checkpoint()
-                self.cp_data.tasks_obj.set_task_executing(task)
-                self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+                self._checkpoint_task_executing(task)
 
             # Generate the tests using criteria
             self.meta_testcase_tool.generate_tests(\
                             meta_criteria_tool_obj=self.meta_criteria_tool, \
-                            test_tool_type_list=self.cp_data.test_types)
+                            test_tool_type_list=self.cp_data.test_types, \
+                            parallel_testgen_count=\
+                                self.config.TESTS_GENERATION_PARALLELISM\
+                                                                .get_val())
 
             # @Checkpointing
-            self.cp_data.tasks_obj.set_task_completed(task)
-            self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+            self._checkpoint_task_completed(task)
             # Destroy meta test checkpointer
             self.meta_testcase_tool.get_checkpoint_state_object()\
                                                         .destroy_checkpoint()
@@ -610,8 +620,7 @@ class Executor(object):
                     self.meta_testcase_tool.get_checkpoint_state_object()\
                                                         .destroy_checkpoint()
                 self.head_explorer.remove_file_and_get(out_file_key)
-                self.cp_data.tasks_obj.set_task_executing(task)
-                self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+                self._checkpoint_task_executing(task)
 
             candidate_aliases = \
                         self.meta_testcase_tool.get_candidate_tools_aliases(\
@@ -665,8 +674,7 @@ class Executor(object):
             common_fs.dumpJSON(list(selected_tests), out_file)
 
             # @Checkpointing
-            self.cp_data.tasks_obj.set_task_completed(task)
-            self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+            self._checkpoint_task_completed(task)
             # Destroy meta test checkpointer
             #self.meta_testexec_optimization_tool.get_checkpoint_state_object()\
             #                                            .destroy_checkpoint()
@@ -699,8 +707,7 @@ class Executor(object):
                 self.head_explorer.remove_file_and_get(execoutput_file_key)
                 self.meta_testcase_tool.get_checkpoint_state_object()\
                                                         .restart_task()
-                self.cp_data.tasks_obj.set_task_executing(task)
-                self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+                self._checkpoint_task_executing(task)
 
             # Execute tests
             test_list_file = self.head_explorer.get_file_pathname(\
@@ -722,8 +729,7 @@ class Executor(object):
                         finish_destroy_checkpointer=False)
             
             # @Checkpointing
-            self.cp_data.tasks_obj.set_task_completed(task)
-            self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+            self._checkpoint_task_completed(task)
             # Destroy meta test checkpointer
             self.meta_testcase_tool.get_checkpoint_state_object()\
                                                         .destroy_checkpoint()
@@ -740,8 +746,7 @@ class Executor(object):
 
                 self.meta_criteria_tool.get_checkpoint_state_object()\
                                                         .restart_task()
-                self.cp_data.tasks_obj.set_task_executing(task)
-                self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+                self._checkpoint_task_executing(task)
 
             if self.config.ENABLED_CRITERIA.get_val():
                 self.meta_criteria_tool.instrument_code(criteria_enabled_list=\
@@ -749,8 +754,7 @@ class Executor(object):
                                     finish_destroy_checkpointer=False)
 
             # @Checkpointing
-            self.cp_data.tasks_obj.set_task_completed(task)
-            self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+            self._checkpoint_task_completed(task)
             if self.config.ENABLED_CRITERIA.get_val():
                 # Destroy meta test checkpointer
                 self.meta_criteria_tool.get_checkpoint_state_object()\
@@ -769,8 +773,7 @@ class Executor(object):
                     self.meta_criteria_tool.get_checkpoint_state_object()\
                                                         .destroy_checkpoint()
                 self.head_explorer.remove_file_and_get(out_file_key)
-                self.cp_data.tasks_obj.set_task_executing(task)
-                self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+                self._checkpoint_task_executing(task)
 
             if self.config.ENABLED_CRITERIA.get_val():
 
@@ -829,8 +832,7 @@ class Executor(object):
                 # write down selection
                 common_fs.dumpJSON(selected_TO, out_file)
             # @Checkpointing
-            self.cp_data.tasks_obj.set_task_completed(task)
-            self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+            self._checkpoint_task_completed(task)
 
         elif task == checkpoint_tasks.Tasks.CRITERIA_TESTS_EXECUTION:
             # Make sure that the Matrices dir exists
@@ -874,8 +876,7 @@ class Executor(object):
                     self.head_explorer.remove_file_and_get(execoutput_file_key)
                 self.meta_criteria_tool.get_checkpoint_state_object()\
                                                         .restart_task()
-                self.cp_data.tasks_obj.set_task_executing(task)
-                self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+                self._checkpoint_task_executing(task)
 
             if self.config.ENABLED_CRITERIA.get_val():
                 # XXX: Criteria element execution selection loading
@@ -956,6 +957,10 @@ class Executor(object):
                                     COVER_CRITERIA_ELEMENTS_ONCE.get_val(),\
                                 prioritization_module_by_criteria=\
                                     self.meta_criteriaexec_optimization_tools,\
+                                parallel_count=self.config.\
+                                    SEPARATED_CRITERIA_PARALLELISM.get_val(),\
+                                meta_parallel_count=self.config.\
+                                    META_CRITERIA_PARALLELISM.get_val(),\
                                 finish_destroy_checkpointer=True)
 
                     # Update matrix if needed to have output diff or such
@@ -985,12 +990,17 @@ class Executor(object):
                                             pf_matrix_file, pf_execoutput_file)
 
                     # @Checkpointing
-                    self.checkpointer.write_checkpoint(\
-                                                self.cp_data.get_json_obj())
+                    self._write_checkpoint()
+
+            n_timeouts, saved_time = \
+                                self.meta_testcase_tool.get_timeout_savings()
+            if n_timeouts > 0:
+                logging.info("executor: the adaptive test timeouts saved"
+                            " {:.1f}s on {} timed out test executions"\
+                                            .format(saved_time, n_timeouts))
 
             # @Checkpointing
-            self.cp_data.tasks_obj.set_task_completed(task)
-            self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+            self._checkpoint_task_completed(task)
 
         elif task == checkpoint_tasks.Tasks.PASS_FAIL_STATS:
             # Make sure that the Matrices dir exists
@@ -1013,8 +1023,7 @@ class Executor(object):
                                         tmp_execoutput_file, execoutput_file)
 
             # @Checkpointing
-            self.cp_data.tasks_obj.set_task_completed(task)
-            self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+            self._checkpoint_task_completed(task)
 
             # Cleanup
             self.head_explorer.remove_file_and_get(\
@@ -1046,8 +1055,7 @@ class Executor(object):
                                         tmp_execoutput_file, execoutput_file)
 
             # @Checkpointing
-            self.cp_data.tasks_obj.set_task_completed(task)
-            self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+            self._checkpoint_task_completed(task)
 
             # Cleanup
             for criterion in self.config.ENABLED_CRITERIA.get_val():
@@ -1083,14 +1091,65 @@ class Executor(object):
         #-------------------------------------------------------------------
 
         if not self.cp_data.tasks_obj.task_is_complete(task):
-            # @Checkpoint: set task as done
-            self.cp_data.tasks_obj.set_task_completed(task)
-
-            # @Checkpoint: write checkpoint
-            self.checkpointer.write_checkpoint(\
-                                        json_obj=self.cp_data.get_json_obj())
+            # @Checkpoint: set task as done and write checkpoint
+            self._checkpoint_task_completed(task)
     #~ def _execute_task()
 
+    def _write_checkpoint(self):
+        """ Write the checkpoint. The tasks executed concurrently share
+            the checkpoint data, thus the lock
+        """
+        with self.cp_lock:
+            self.checkpointer.write_checkpoint(self.cp_data.get_json_obj())
+    #~ def _write_checkpoint()
+
+    def _checkpoint_task_executing(self, task):
+        with self.cp_lock:
+            self.cp_data.tasks_obj.set_task_executing(task)
+            self._write_checkpoint()
+    #~ def _checkpoint_task_executing()
+
+    def _checkpoint_task_completed(self, task):
+        with self.cp_lock:
+            self.cp_data.tasks_obj.set_task_completed(task)
+            self._write_checkpoint()
+    #~ def _checkpoint_task_completed()
+
+    def _execute_tasks(self, task_set):
+        """ Execute the tasks of the set (that are ready to execute).
+            The tasks are grouped into lanes such that the tasks of different
+            lanes do not conflict (see checkpoint_tasks.tasks_conflict). The
+            tasks of a lane are executed sequentially and up to
+            TASKS_PARALLELISM lanes are executed concurrently
+        """
+        lanes = []
+        for task in sorted(task_set, key=lambda t: t.get_field_value()):
+            conflicting = [lane for lane in lanes \
+                            if any(checkpoint_tasks.tasks_conflict(task, t) \
+                                                            for t in lane)]
+            new_lane = [task]
+            for lane in conflicting:
+                lanes.remove(lane)
+                new_lane = lane + new_lane
+            lanes.append(sorted(new_lane, key=lambda t: t.get_field_value()))
+
+        def _execute_lane(lane):
+            for task in lane:
+                self._execute_task(task)
+        #~ def _execute_lane()
+
+        parallelism = min(self.config.TASKS_PARALLELISM.get_val(), len(lanes))
+        if parallelism <= 1:
+            for lane in lanes:
+                _execute_lane(lane)
+        else:
+            logging.debug("executor: executing concurrently the tasks: " + \
+                        str([[t.get_str() for t in lane] for lane in lanes]))
+            joblib.Parallel(n_jobs=parallelism, require='sharedmem')\
+                            (joblib.delayed(_execute_lane)(lane) \
+                                                            for lane in lanes)
+    #~ def _execute_tasks()
+
     @classmethod
     def create_repo_manager(cls, config):
         repo_mgr = RepositoryManager(\
@@ -1109,6 +1168,7 @@ class Executor(object):
                     source_files_to_objects=\
                         config.TARGET_SOURCE_INTERMEDIATE_CODE_MAP.get_val(),\
                     dev_tests_list=config.DEVELOPER_TESTS_LIST.get_val(),\
+                    parallelism=config.SINGLE_REPO_PARALLELISM.get_val(),\
                     )
         return repo_mgr
     #~ def create_repo_manager()
@@ -6,6 +6,7 @@ import logging
 import shutil
 import muteria.common.mix as common_mix
 import muteria.common.fs as common_fs
+import muteria.common.matrices as common_matrices
 
 from muteria.drivers.criteria import TestCriteria
 
@@ -40,6 +41,10 @@ EXECUTION_STATE = "execution_state"
 EXECUTION_STATE_BAKUP = "execution_state" + ".bak"
 EXECUTION_TIMES = "execution_times"
 MAIN_LOG_FILE = "ctrl_log.log"
+CRITERIA_TEST_EXECUTION_HISTORY = {}
+for criterion in TestCriteria:
+    CRITERIA_TEST_EXECUTION_HISTORY[criterion] = \
+                        criterion.get_str()+"_test_execution_history.json"
 
 TEST_PASS_FAIL_MATRIX = "PASSFAIL.csv"
 CRITERIA_MATRIX = {}
@@ -78,6 +83,16 @@ for criterion in TestCriteria:
                             "partial_tmp_"+criterion.get_str()+"_output.json"
 # ---------------------------------------------------------
 
+def _get_working_matrix_file_name(file_name):
+    """ Get the name of the working (temporary) matrix file file_name, with
+        the extension of the matrix file format. The results files keep
+        their text extension (and format)
+    """
+    base_name, text_extension = os.path.splitext(file_name)
+    return base_name + \
+                common_matrices.get_matrix_file_extension(text_extension)
+#~ def _get_working_matrix_file_name()
+
 def get_outputdir_structure_by_filesdirs():
     '''
     :returns: The structure of the output directory as directely 
@@ -116,45 +131,54 @@ def get_outputdir_structure_by_filesdirs():
                                         + [EXECUTION_TIMES]
     TopExecutionDir[MAIN_LOG_FILE] = TopExecutionDir[CTRL_LOGS_DIR] \
                                         + [MAIN_LOG_FILE]
+    for criterion in TestCriteria:
+        TopExecutionDir[CRITERIA_TEST_EXECUTION_HISTORY[criterion]] = \
+                                    TopExecutionDir[CONTROLLER_DATA_DIR] \
+                                + [CRITERIA_TEST_EXECUTION_HISTORY[criterion]]
 
     TopExecutionDir[TEST_PASS_FAIL_MATRIX] = \
                 TopExecutionDir[RESULTS_MATRICES_DIR] + [TEST_PASS_FAIL_MATRIX]
     TopExecutionDir[TMP_TEST_PASS_FAIL_MATRIX] = \
-                                    TopExecutionDir[RESULTS_MATRICES_DIR] \
-                                                + [TMP_TEST_PASS_FAIL_MATRIX]
+                TopExecutionDir[RESULTS_MATRICES_DIR] + \
+                [_get_working_matrix_file_name(TMP_TEST_PASS_FAIL_MATRIX)]
     TopExecutionDir[PARTIAL_TMP_TEST_PASS_FAIL_MATRIX] = \
-                                    TopExecutionDir[RESULTS_MATRICES_DIR] \
-                                        + [PARTIAL_TMP_TEST_PASS_FAIL_MATRIX]
+            TopExecutionDir[RESULTS_MATRICES_DIR] + \
+            [_get_working_matrix_file_name(PARTIAL_TMP_TEST_PASS_FAIL_MATRIX)]
     for criterion in TestCriteria:
         TopExecutionDir[CRITERIA_MATRIX[criterion]] = \
                                     TopExecutionDir[RESULTS_MATRICES_DIR] \
                                                 + [CRITERIA_MATRIX[criterion]]
         TopExecutionDir[TMP_CRITERIA_MATRIX[criterion]] = \
-                                    TopExecutionDir[EXECUTION_TMP_DIR] \
-                                            + [TMP_CRITERIA_MATRIX[criterion]]
+                TopExecutionDir[EXECUTION_TMP_DIR] + \
+                [_get_working_matrix_file_name(TMP_CRITERIA_MATRIX[criterion])]
         TopExecutionDir[PARTIAL_TMP_CRITERIA_MATRIX[criterion]] = \
-                                    TopExecutionDir[EXECUTION_TMP_DIR] \
-                                    + [PARTIAL_TMP_CRITERIA_MATRIX[criterion]]
+                            TopExecutionDir[EXECUTION_TMP_DIR] + \
+                            [_get_working_matrix_file_name(\
+                                    PARTIAL_TMP_CRITERIA_MATRIX[criterion])]
     # Output
     TopExecutionDir[PROGRAM_TESTEXECUTION_OUTPUT] = \
                     TopExecutionDir[RESULTS_TESTEXECUTION_OUTPUTS_DIR] + \
                                                 [PROGRAM_TESTEXECUTION_OUTPUT]
     TopExecutionDir[TMP_PROGRAM_TESTEXECUTION_OUTPUT] = \
-                        TopExecutionDir[RESULTS_TESTEXECUTION_OUTPUTS_DIR] + \
-                                            [TMP_PROGRAM_TESTEXECUTION_OUTPUT]
+                    TopExecutionDir[RESULTS_TESTEXECUTION_OUTPUTS_DIR] + \
+                    [_get_working_matrix_file_name(\
+                                            TMP_PROGRAM_TESTEXECUTION_OUTPUT)]
     TopExecutionDir[PARTIAL_TMP_PROGRAM_TESTEXECUTION_OUTPUT] = \
-                        TopExecutionDir[RESULTS_TESTEXECUTION_OUTPUTS_DIR] + \
-                                    [PARTIAL_TMP_PROGRAM_TESTEXECUTION_OUTPUT]
+                    TopExecutionDir[RESULTS_TESTEXECUTION_OUTPUTS_DIR] + \
+                    [_get_working_matrix_file_name(\
+                                    PARTIAL_TMP_PROGRAM_TESTEXECUTION_OUTPUT)]
     for criterion in TestCriteria:
         TopExecutionDir[CRITERIA_EXECUTION_OUTPUT[criterion]] = \
                         TopExecutionDir[RESULTS_TESTEXECUTION_OUTPUTS_DIR] + \
                                         [CRITERIA_EXECUTION_OUTPUT[criterion]]
         TopExecutionDir[TMP_CRITERIA_EXECUTION_OUTPUT[criterion]] = \
-                                        TopExecutionDir[EXECUTION_TMP_DIR] + \
-                                    [TMP_CRITERIA_EXECUTION_OUTPUT[criterion]]
+                    TopExecutionDir[EXECUTION_TMP_DIR] + \
+                    [_get_working_matrix_file_name(\
+                                    TMP_CRITERIA_EXECUTION_OUTPUT[criterion])]
         TopExecutionDir[PARTIAL_TMP_CRITERIA_EXECUTION_OUTPUT[criterion]] = \
-                                    TopExecutionDir[EXECUTION_TMP_DIR] + \
-                            [PARTIAL_TMP_CRITERIA_EXECUTION_OUTPUT[criterion]]
+                    TopExecutionDir[EXECUTION_TMP_DIR] + \
+                    [_get_working_matrix_file_name(\
+                            PARTIAL_TMP_CRITERIA_EXECUTION_OUTPUT[criterion])]
     
     TopExecutionDir[TMP_SELECTED_TESTS_LIST] = \
                 TopExecutionDir[EXECUTION_TMP_DIR] + [TMP_SELECTED_TESTS_LIST]
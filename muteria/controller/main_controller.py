@@ -35,6 +35,7 @@ import muteria.common.matrices as common_matrices
 import muteria.configmanager.configurations as configurations
 from muteria.configmanager.helper import ConfigurationHelper
 from muteria.repositoryandcode.repository_manager import RepositoryManager
+import muteria.drivers.checkpoint_handler as checkpoint_handler
 
 # from this package
 import muteria.controller.logging_setup as logging_setup
@@ -99,9 +100,17 @@ class MainController (object):
         '''
         Entry point function using the final configuration object
         '''
+        # The matrix file format names the explorers' files
+        common_matrices.set_execution_matrix_backend(\
+                                final_config.EXECUTION_MATRIX_BACKEND.get_val())
+        common_matrices.set_matrix_file_format(\
+                                final_config.MATRICES_FILE_FORMAT.get_val())
+
         # XXX Create TopExplorer
         top_timeline_explorer = explorer.TopExplorer(\
                                         final_config.OUTPUT_ROOT_DIR.get_val())
+        checkpoint_handler.set_journal_compaction_period(\
+                final_config.CHECKPOINT_JOURNAL_COMPACTION_PERIOD.get_val())
 
         # XXX Actual Execution based on the mode
         mode = final_config.RUN_MODE.get_val()
@@ -5,6 +5,11 @@ import importlib
 import subprocess
 import signal
 import time
+import codecs
+import hashlib
+import threading
+import resource
+import contextlib
 
 import muteria.common.fs as common_fs
 import muteria.common.mix as common_mix
@@ -150,6 +155,27 @@ class RepoFileToCustomMap(dict):
         
 #~ class RepoFileToCustomMap
 
+class StreamingOutlogHasher(object):
+    """ Incrementally compute the length and the hash of a test execution
+        output log, fed by chunks. The values are the same as the length
+        of the whole log and the sha512 of its utf-8 encoding, computed in
+        BaseTestcaseTool._oracle_summarize.
+    """
+    def __init__(self):
+        self.length = 0
+        self.hasher = hashlib.sha512()
+    #~ def __init__()
+
+    def update(self, outlog_chunk):
+        self.length += len(outlog_chunk)
+        self.hasher.update(outlog_chunk.encode('utf-8', 'backslashreplace'))
+    #~ def update()
+
+    def get_len_and_hash(self):
+        return self.length, self.hasher.hexdigest()
+    #~ def get_len_and_hash()
+#~ class StreamingOutlogHasher
+
 class DriversUtils(object):
 
     ################### Meta to non meta and vice versa ####################
@@ -195,11 +221,21 @@ class DriversUtils(object):
         return True
     #~ def check_tool()
 
+    # Size of the reads of the output passed to out_consumer
+    OUT_CONSUMER_READ_SIZE = 1024 * 1024
+
     @classmethod
     def execute_and_get_retcode_out_err(cls, prog, args_list=[], env=None, \
                             stdin=None, timeout=None, timeout_grace_period=5, \
                             out_on=True, err_on=True, merge_err_to_out=True, \
-                            cwd=None, shell=False):
+                            cwd=None, shell=False, out_consumer=None):
+        """ Execute the program and return its return code, stdout and
+            stderr (decoded)
+            :param out_consumer: when not None, function called with the
+                        successive decoded chunks of stdout (and stderr if
+                        merged), which is then not kept (returned as None).
+                        This bounds the memory used for huge outputs.
+        """
         #print(prog, args_list, env is None, timeout, out_on, err_on, merge_err_to_out)
         tmp_env = os.environ if env is None else env
         out = subprocess.PIPE if out_on else subprocess.DEVNULL
@@ -207,6 +243,11 @@ class DriversUtils(object):
             err = subprocess.STDOUT if merge_err_to_out else subprocess.PIPE
         else:
             err = subprocess.DEVNULL
+        if out_consumer is not None:
+            ERROR_HANDLER.assert_true(out_on and \
+                                    (merge_err_to_out or not err_on), \
+                        "out_consumer requires the stderr to be merged or "
+                                                        "off", __file__)
         # use setsid to kill the process group
         p = subprocess.Popen([prog]+args_list, env=tmp_env, cwd=cwd, shell=shell, \
                                                             #close_fds=True, \
@@ -214,27 +255,16 @@ class DriversUtils(object):
                                                         stderr=err, \
                                                         stdout=out, \
                                                         preexec_fn=os.setsid)
-        try:
-            stdout, stderr = p.communicate(timeout=timeout)
-        except subprocess.TimeoutExpired:
-            #p.terminate() # TODO: Chose the signal to send
-            group_id = os.getpgid(p.pid)
-            #os.killpg(p.pid, signal.SIGTERM)
-            os.killpg(group_id, signal.SIGTERM)
-            #p.send_signal(signal.SIGINT) # TODO: Chose the signal to send
-            # give timeout_grace_period seconds to stop
-            stopped = False
-            for _ in range(timeout_grace_period):
-                if p.poll() is None:
-                    time.sleep(1)
-                else:
-                    stopped = True
-                    break
-            if not stopped:
-                #os.killpg(p.pid, signal.SIGKILL)
-                os.killpg(group_id, signal.SIGKILL)
-                p.kill() # TODO: Chose the signal to send
-            stdout, stderr = p.communicate()
+        if out_consumer is not None:
+            cls._consume_process_output(p, out_consumer, timeout, \
+                                                        timeout_grace_period)
+            stdout, stderr = None, None
+        else:
+            try:
+                stdout, stderr = p.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                cls._stop_process_group(p, timeout_grace_period)
+                stdout, stderr = p.communicate()
         if stdout is not None:
             stdout = stdout.decode('UTF-8', 'backslashreplace')
         if stderr is not None:
@@ -246,6 +276,105 @@ class DriversUtils(object):
         return retcode, stdout, stderr
     #~ def execute_and_get_retcode_out_err()
 
+    @classmethod
+    def _stop_process_group(cls, p, timeout_grace_period):
+        """ Stop the process group of the timed out process p
+        """
+        try:
+            group_id = os.getpgid(p.pid)
+        except ProcessLookupError:
+            # Already finished
+            return
+        #p.terminate() # TODO: Chose the signal to send
+        #os.killpg(p.pid, signal.SIGTERM)
+        os.killpg(group_id, signal.SIGTERM)
+        #p.send_signal(signal.SIGINT) # TODO: Chose the signal to send
+        # give timeout_grace_period seconds to stop
+        stopped = False
+        for _ in range(timeout_grace_period):
+            if p.poll() is None:
+                time.sleep(1)
+            else:
+                stopped = True
+                break
+        if not stopped:
+            #os.killpg(p.pid, signal.SIGKILL)
+            os.killpg(group_id, signal.SIGKILL)
+            p.kill() # TODO: Chose the signal to send
+    #~ def _stop_process_group()
+
+    @classmethod
+    def _consume_process_output(cls, p, out_consumer, timeout, \
+                                                        timeout_grace_period):
+        """ Pass the decoded stdout of p to out_consumer by chunks, until
+            p finishes. The process group is stopped at timeout.
+        """
+        timer = None
+        if timeout is not None:
+            timer = threading.Timer(timeout, cls._stop_process_group, \
+                                            args=(p, timeout_grace_period))
+            timer.daemon = True
+            timer.start()
+        decoder = codecs.getincrementaldecoder('UTF-8')('backslashreplace')
+        try:
+            while True:
+                chunk = p.stdout.read1(cls.OUT_CONSUMER_READ_SIZE)
+                if not chunk:
+                    break
+                text = decoder.decode(chunk)
+                if text:
+                    out_consumer(text)
+            text = decoder.decode(b'', final=True)
+            if text:
+                out_consumer(text)
+        except:
+            if p.poll() is None:
+                os.killpg(os.getpgid(p.pid), signal.SIGKILL)
+            raise
+        finally:
+            p.stdout.close()
+            p.wait()
+            if timer is not None:
+                timer.cancel()
+                # Wait for an ongoing stop
+                timer.join()
+    #~ def _consume_process_output()
+
+    # State of the unlimited stack contexts (see unlimited_stack)
+    _unlimited_stack_lock = threading.Lock()
+    _unlimited_stack_users = 0
+    _limited_stack_soft = None
+
+    @classmethod
+    @contextlib.contextmanager
+    def unlimited_stack(cls):
+        """ Set the soft stack limit of the process (inherited by the
+            executed programs) to unlimited, within the context.
+            The limit is process wide, thus the contexts are reference
+            counted: the former limit is restored when the last concurrent
+            context exits.
+        """
+        with cls._unlimited_stack_lock:
+            if cls._unlimited_stack_users == 0:
+                soft, hard = resource.getrlimit(resource.RLIMIT_STACK)
+                if soft != resource.RLIM_INFINITY:
+                    resource.setrlimit(resource.RLIMIT_STACK, \
+                                                (resource.RLIM_INFINITY, hard))
+                    cls._limited_stack_soft = soft
+            cls._unlimited_stack_users += 1
+        try:
+            yield
+        finally:
+            with cls._unlimited_stack_lock:
+                cls._unlimited_stack_users -= 1
+                if cls._unlimited_stack_users == 0 and \
+                                        cls._limited_stack_soft is not None:
+                    _, hard = resource.getrlimit(resource.RLIMIT_STACK)
+                    resource.setrlimit(resource.RLIMIT_STACK, \
+                                            (cls._limited_stack_soft, hard))
+                    cls._limited_stack_soft = None
+    #~ def unlimited_stack()
+
     ############################### Misc ###################################
 
     @classmethod
@@ -266,13 +395,15 @@ class DriversUtils(object):
                             set(comparing_vector.get_nonkey_colname_list()) \
                                      ) == 0, "Mismatch of columns", __file__)
 
-        # Get uncertain
-        target_uncertain_cols_dict = \
-                                target_matrix.query_uncertain_columns_of_rows()
-        vector_uncertain_cols = \
-                            comparing_vector.query_uncertain_columns_of_rows()
-        vector_uncertain_cols = \
-                    set(vector_uncertain_cols[list(vector_uncertain_cols)[0]])
+        # Get the states of the cells, with the columns of the target
+        target_cols = target_matrix.get_nonkey_colname_list()
+        target_active, target_uncertain = target_matrix.get_states_arrays()
+        vector_col_pos = {c: i for i, c in \
+                        enumerate(comparing_vector.get_nonkey_colname_list())}
+        vector_col_pos = [vector_col_pos[c] for c in target_cols]
+        vector_active, vector_uncertain = comparing_vector.get_states_arrays()
+        vector_active = vector_active[0, vector_col_pos]
+        vector_uncertain = vector_uncertain[0, vector_col_pos]
 
         # Check if outdata and proceed accordingly
         if target_outdata_file is not None and \
@@ -283,61 +414,18 @@ class DriversUtils(object):
             vector_outdata = common_matrices.OutputLogData(\
                                             filename=comparing_outdata_file)
 
-            _, vector_outdata_uniq = list(\
-                                vector_outdata.get_zip_objective_and_data())[0]
-
             ## Compare using output
-            timedout_key = common_matrices.OutputLogData.TIMEDOUT
-            key_to_diffs = {}
-            for key, key_data in target_outdata.get_zip_objective_and_data():
-                intersect = set(vector_outdata_uniq) & set(key_data)
-                ERROR_HANDLER.assert_true(set(key_data) == intersect, \
-                            "The elements in target must all be in vector",\
-                                                                    __file__)
-                key_to_diffs[key] = set()
-                for elem in intersect:
-                    ol_equiv = common_matrices.OutputLogData.outlogdata_equiv(\
-                                    key_data[elem], vector_outdata_uniq[elem])
-                    if not ol_equiv:
-                        key_to_diffs[key].add(elem)
+            diffs = target_outdata.get_not_equiv_mask(vector_outdata, \
+                                list(target_matrix.get_keys()), target_cols)
         else:
             # outdata is not set use difference of matrices
-            ## obtain the active cols for each rows
-            target_active_cols_dict = \
-                                target_matrix.query_active_columns_of_rows()
-            
-            vector_active_cols = \
-                                comparing_vector.query_active_columns_of_rows()
-            vector_active_cols = \
-                        set(vector_active_cols[list(vector_active_cols)[0]])
-
-            ## for each row of target matrix, get diff
-            target_matrix_allcol = set(target_matrix.get_nonkey_colname_list())
-            key_to_diffs = {}
-            for row_key, row_active in target_active_cols_dict.items():
-                key_to_diffs[row_key] = (set(row_active) - vector_active_cols)\
-                                    | (vector_active_cols - set(row_active))
-                key_to_diffs[row_key] &= target_matrix_allcol
-
-        # Clear matrix to inactive
-        target_matrix.clear_cells_to_value(target_matrix.getInactiveCellVal())
-        
-        # Update matrix based on diff
-        for key, diffs in key_to_diffs.items():
-            # gather the uncertain and set to uncertain
-            uncertain = vector_uncertain_cols | \
-                                        set(target_uncertain_cols_dict[key])
-            set_uncertain = uncertain & diffs
-            diffs -= uncertain
-
-            values = {}
-            for col in set_uncertain:
-                values[col] = target_matrix.getUncertainCellDefaultVal()
-            for col in diffs:
-                values[col] = target_matrix.getActiveCellDefaultVal()
-
-            if len(values) > 0:
-                target_matrix.update_cells(key, values)
+            diffs = target_active ^ vector_active
+
+        # Set the differences active, or uncertain when uncertain in either,
+        # and the other cells inactive
+        uncertain = target_uncertain | vector_uncertain
+        target_matrix.set_cells_from_states(diffs & ~uncertain, \
+                                                        diffs & uncertain)
 
         target_matrix.serialize()
     #~ def update_matrix_to_cover_when_difference()
@@ -1,18 +1,43 @@
-
 import logging
+import itertools
 
 import muteria.common.mix as common_mix
 
 ERROR_HANDLER = common_mix.ErrorHandler
 
+# Number of checkpoints appended to the journal between two full rewrites
+# of the checkpoint (compaction). None disables the journal.
+_JOURNAL_COMPACTION_PERIOD = None
+
+def set_journal_compaction_period(compaction_period):
+    """ Enable the checkpoint journal (see CheckPointHandler.do_checkpoint)
+    :param compaction_period: number of checkpoints journaled between two
+                full checkpoint rewrites. None disables the journal
+    """
+    global _JOURNAL_COMPACTION_PERIOD
+    ERROR_HANDLER.assert_true(compaction_period is None or \
+                                        compaction_period >= 1, \
+                    "invalid journal compaction period: "+ \
+                                        str(compaction_period), __file__)
+    _JOURNAL_COMPACTION_PERIOD = compaction_period
+#~ def set_journal_compaction_period()
+
 class CheckPointHandler(object):
     FUNC_NAME_KEY = "method_name"
     TASK_ID_KEY = "task_id"
     TOOLS_KEY = "tools"
     OPT_PAYLOAD_KEY = "optional_payload"
+    # journal records only
+    TOOL_KEY = "tool"
+    FULL_PAYLOAD_KEY = "full_payload"
     def __init__(self, used_checkpointer):
         self.used_checkpointer = used_checkpointer
         self.current_data = None
+        # Number of records in the journal
+        self.journal_size = 0
+        # Last payload checkpointed and the sizes of its dicts then
+        self.journaled_payload = None
+        self.journaled_payload_sizes = None
         self.get_current_data()
 
     def get_current_data(self):
@@ -30,6 +55,14 @@ class CheckPointHandler(object):
                     ERROR_HANDLER.error_exit( \
                        "Problem with checkpoint data dict key", __file__)
 
+            # replay the journal
+            journal = self.used_checkpointer.load_journal()
+            for record in journal:
+                self._replay_journal_record(record)
+            self.journal_size = len(journal)
+            if self.current_data is not None:
+                self._track_payload(self.current_data[self.OPT_PAYLOAD_KEY])
+
         return self.current_data
 
     def is_finished(self):
@@ -48,6 +81,31 @@ class CheckPointHandler(object):
         return False
 
     def do_checkpoint(self, func_name, taskid, tool=None, opt_payload=None):
+        """ Record the checkpoint.
+            When the journal is enabled, the checkpoint is appended to the
+            journal, with only the items added to the payload since the
+            previous checkpoint when the payload is the same dict (or list
+            of dicts) object, which must then only have new items added.
+            The whole checkpoint is rewritten every compaction period.
+        """
+        self._update_current_data(func_name, taskid, tool, opt_payload)
+        if _JOURNAL_COMPACTION_PERIOD is None or \
+                        self.journal_size + 1 >= _JOURNAL_COMPACTION_PERIOD:
+            self.used_checkpointer.write_checkpoint(self.current_data)
+            self.journal_size = 0
+        else:
+            is_full, payload = self._get_payload_record(opt_payload)
+            self.used_checkpointer.append_to_journal({ \
+                self.FUNC_NAME_KEY: func_name, \
+                self.TASK_ID_KEY: taskid, \
+                self.TOOL_KEY: tool, \
+                self.FULL_PAYLOAD_KEY: is_full, \
+                self.OPT_PAYLOAD_KEY: payload
+            })
+            self.journal_size += 1
+        self._track_payload(opt_payload)
+
+    def _update_current_data(self, func_name, taskid, tool, opt_payload):
         if self.current_data is None:
             self.current_data = { \
                 self.FUNC_NAME_KEY: None, \
@@ -61,7 +119,59 @@ class CheckPointHandler(object):
         self.current_data[self.TASK_ID_KEY] = taskid
         self.current_data[self.TOOLS_KEY].append(tool)
         self.current_data[self.OPT_PAYLOAD_KEY] = opt_payload
-        self.used_checkpointer.write_checkpoint(self.current_data)
+
+    def _replay_journal_record(self, record):
+        payload = record[self.OPT_PAYLOAD_KEY]
+        if not record[self.FULL_PAYLOAD_KEY]:
+            added_items = payload
+            payload = self.current_data[self.OPT_PAYLOAD_KEY]
+            for payload_dict, added in zip(self._get_payload_dicts(payload), \
+                                    self._get_payload_dicts(added_items)):
+                payload_dict.update(added)
+        self._update_current_data(record[self.FUNC_NAME_KEY], \
+                                    record[self.TASK_ID_KEY], \
+                                    record[self.TOOL_KEY], payload)
+
+    @staticmethod
+    def _get_payload_dicts(opt_payload):
+        """ Get the list of dicts of a payload that is a dict or a list
+            of dicts, and None for other payloads
+        """
+        if isinstance(opt_payload, dict):
+            return [opt_payload]
+        if isinstance(opt_payload, (list, tuple)) and \
+                            all(isinstance(e, dict) for e in opt_payload):
+            return list(opt_payload)
+        return None
+
+    def _track_payload(self, opt_payload):
+        payload_dicts = self._get_payload_dicts(opt_payload)
+        if payload_dicts is None:
+            self.journaled_payload = None
+            self.journaled_payload_sizes = None
+        else:
+            self.journaled_payload = opt_payload
+            self.journaled_payload_sizes = [len(d) for d in payload_dicts]
+
+    def _get_payload_record(self, opt_payload):
+        """ Get the pair (is_full, payload) to put in the journal record,
+            where payload has only the items added since the last
+            checkpoint when is_full is False
+        """
+        if opt_payload is None or opt_payload is not self.journaled_payload:
+            return True, opt_payload
+        payload_dicts = self._get_payload_dicts(opt_payload)
+        if len(payload_dicts) != len(self.journaled_payload_sizes) or \
+                        any(len(d) < size for d, size in \
+                            zip(payload_dicts, self.journaled_payload_sizes)):
+            return True, opt_payload
+        # dicts keep the insertion order, new items are at the end
+        added_items = [dict(itertools.islice(d.items(), size, None)) \
+                                for d, size in zip(payload_dicts, \
+                                                self.journaled_payload_sizes)]
+        if isinstance(opt_payload, dict):
+            added_items = added_items[0]
+        return False, added_items
 
     def set_finished(self, detailed_exectime_obj):
         self.used_checkpointer.set_finished( \
@@ -74,8 +184,9 @@ class CheckPointHandler(object):
 
     def restart(self):
         self.used_checkpointer.restart_task()
+        self.journal_size = 0
 
     def destroy(self):
         self.used_checkpointer.destroy_checkpoint()
+        self.journal_size = 0
 #~ class CheckPointHandler
-
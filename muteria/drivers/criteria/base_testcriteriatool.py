@@ -22,7 +22,10 @@ import shutil
 import logging
 import abc
 import tqdm
+import joblib
+import threading
 
+import muteria.common.fs as common_fs
 import muteria.common.matrices as common_matrices
 import muteria.common.mix as common_mix
 
@@ -112,6 +115,9 @@ class BaseCriteriaTool(abc.ABC):
             testcases is assumed to be already in sys.intern
             criteria_element_list_by_criteria's criteria_elements are 
                                         assumed to be already in sys.intern
+            When test_parallel_count > 1, up to test_parallel_count tests
+            are executed at once, each worker with its own result dir and
+            environment (see `_get_worker_criteria_environment_vars`).
         """
 
         logging.debug("# Executing meta {}: {} ...".format("criteria" if \
@@ -123,29 +129,62 @@ class BaseCriteriaTool(abc.ABC):
                                 self.get_instrumented_executable_paths_map( \
                                                     criterion_to_matrix.keys())
 
+        ERROR_HANDLER.assert_true(test_parallel_count >= 1, \
+                "invalid parallel count: {}".format(test_parallel_count), \
+                                                                    __file__)
+        if test_parallel_count > 1 and not \
+                                    self._can_collect_coverage_in_parallel():
+            logging.warning("{} {}".format("The tool {} cannot collect".format(\
+                                self.get_toolalias()), "coverage in parallel."\
+                                " The tests are executed sequentially."))
+            test_parallel_count = 1
+        if test_parallel_count > 1 and not self.meta_test_generation_obj\
+                                        .can_run_tests_in_sandbox(testcases):
+            logging.warning("{} {}".format(\
+                        "Some test tools cannot run tests in sandbox.", \
+                        "The tests are executed sequentially."))
+            test_parallel_count = 1
+
         # get environment vars
         result_dir_tmp = os.path.join(self.criteria_working_dir, \
                                                 "criteria_meta_result_tmp")
-        if os.path.isdir(result_dir_tmp):
-            try:
-                shutil.rmtree(result_dir_tmp)
-            except PermissionError:
-                self._dir_chmod777(result_dir_tmp)
-                shutil.rmtree(result_dir_tmp)
-
-        criterion2environment_vars = self._get_criteria_environment_vars( \
+        workers_dir = os.path.join(self.criteria_working_dir, \
+                                                "criteria_meta_workers.tmp")
+        for dir_path in (result_dir_tmp, workers_dir):
+            if os.path.isdir(dir_path):
+                try:
+                    shutil.rmtree(dir_path)
+                except PermissionError:
+                    self._dir_chmod777(dir_path)
+                    shutil.rmtree(dir_path)
+
+        # One (result_dir_tmp, groups) per worker
+        workers_data = []
+        for worker_id in range(test_parallel_count):
+            if test_parallel_count == 1:
+                criterion2environment_vars = \
+                            self._get_criteria_environment_vars( \
                                                             result_dir_tmp, \
                                 enabled_criteria=criterion_to_matrix.keys())
+            else:
+                worker_dir = os.path.join(workers_dir, str(worker_id))
+                os.makedirs(worker_dir)
+                result_dir_tmp = os.path.join(worker_dir, "result_tmp")
+                criterion2environment_vars = \
+                            self._get_worker_criteria_environment_vars( \
+                                                worker_dir, result_dir_tmp, \
+                                enabled_criteria=criterion_to_matrix.keys())
 
-        ERROR_HANDLER.assert_true(set(criterion2executable_path) == \
+            ERROR_HANDLER.assert_true(set(criterion2executable_path) == \
                                             set(criterion2environment_vars), \
                         "mismatch between exe_path_map and env_vars", __file__)
 
-        criterialist = criterion2executable_path.keys()
-
-        # group criteria
-        groups = self._get_criteria_groups(criterion2executable_path,\
+            # group criteria
+            groups = self._get_criteria_groups(criterion2executable_path,\
                                                     criterion2environment_vars)
+            workers_data.append((result_dir_tmp, groups))
+
+        criterialist = criterion2executable_path.keys()
 
         # important tmp vars
         criterion2coverage_per_test = \
@@ -167,17 +206,74 @@ class BaseCriteriaTool(abc.ABC):
                                                             for t in test2pos]
         #~ def _get_init_elem_cov()
 
-        # Execute each test and gather the data
-        processbar = tqdm.tqdm(testcases, leave=False, dynamic_ncols=True) 
-        for testcase in processbar: 
-            testcase = sys.intern(testcase)
-            processbar.set_description("Running Test %s"% testcase)
+        def _update_data(testcase, cg_criteria, \
+                                        coverage_tmp_data_per_criterion, \
+                                        metaoutlog_tmp_data_per_criterion):
+            for criterion in cg_criteria:
+                if len(criterion2coverage_per_test[criterion]) == 0:
+                    for elem in coverage_tmp_data_per_criterion[criterion]:
+                        #criterion2coverage_per_test[criterion][elem] = {}
+                        criterion2coverage_per_test[criterion][elem] = \
+                                                        _get_init_elem_cov()
+                    if criterion_to_executionoutput[criterion] is not None:
+                        for elem in metaoutlog_tmp_data_per_criterion[\
+                                                                    criterion]:
+                            criterion2metaoutlog_per_test[criterion]\
+                                                                    [elem] = {}
+
+                for elem in coverage_tmp_data_per_criterion[criterion]:
+                    # verify that the value is positive or null
+                    v_elem = coverage_tmp_data_per_criterion[criterion][elem]
+                    ERROR_HANDLER.assert_true(type(v_elem) == int, \
+                                        "cov num type must be int", __file__)
+                    ERROR_HANDLER.assert_true(v_elem >= 0, \
+                                        "invalid cov num(negative)", __file__)
+                    try:
+                        res = criterion2coverage_per_test[criterion][elem]
+                    except KeyError:
+                        #res = {}
+                        res = _get_init_elem_cov()
+                        criterion2coverage_per_test[criterion][elem] = res
+
+                    #res[testcase] = coverage_tmp_data_per_criterion\
+                    res[test2pos[testcase]] = v_elem
+
+                if criterion_to_executionoutput[criterion] is not None:
+                    for elem in metaoutlog_tmp_data_per_criterion[criterion]:
+                        try:
+                            res = criterion2metaoutlog_per_test[criterion]\
+                                                                        [elem]
+                        except KeyError:
+                            res = {}
+                            criterion2metaoutlog_per_test[criterion][\
+                                                                    elem] = res
+
+                        res[testcase] = metaoutlog_tmp_data_per_criterion\
+                                                            [criterion][elem]
+        #~ def _update_data()
+
+        update_lock = threading.Lock()
+
+        def _execute_test(testcase, result_dir_tmp, groups, sandboxed):
+            """ Execute a test for each criteria group, collect its coverage
+                in result_dir_tmp and update the data (one at a time)
+            """
             for cg_criteria, cg_exe_path_map, cg_env_vars in groups:
                 # Create reult_tmp_dir
                 os.mkdir(result_dir_tmp, mode=0o777)
 
                 # run testcase
-                test_verdict = self.meta_test_generation_obj.execute_testcase(\
+                if sandboxed:
+                    verdicts, outlogs = self.meta_test_generation_obj\
+                                            .runtests_in_sandbox([testcase], \
+                                            exe_path_map=cg_exe_path_map, \
+                                            env_vars=cg_env_vars, \
+                                            use_recorded_timeout_times=\
+                                                                timeout_times)
+                    test_verdict = (verdicts[testcase], outlogs[testcase])
+                else:
+                    test_verdict = \
+                                self.meta_test_generation_obj.execute_testcase(\
                                             testcase, \
                                             exe_path_map=cg_exe_path_map, \
                                             env_vars=cg_env_vars,\
@@ -195,58 +291,17 @@ class BaseCriteriaTool(abc.ABC):
                                 self._extract_coverage_data_of_a_test(\
                                                 cg_criteria, test_verdict, \
                                                     result_dir_tmp)
+                metaoutlog_tmp_data_per_criterion = None
                 if a_criterion_has_outlog:
                     metaoutlog_tmp_data_per_criterion = \
                                     self._extract_metaoutlog_data_of_a_test( \
                                                 cg_criteria, test_verdict, \
                                                     result_dir_tmp)
                 # update data
-                for criterion in cg_criteria:
-                    if len(criterion2coverage_per_test[criterion]) == 0:
-                        for elem in coverage_tmp_data_per_criterion[criterion]:
-                            #criterion2coverage_per_test[criterion][elem] = {}
-                            criterion2coverage_per_test[criterion][elem] = \
-                                                        _get_init_elem_cov()
-                        if criterion_to_executionoutput[criterion] is not None:
-                            for elem in metaoutlog_tmp_data_per_criterion[\
-                                                                    criterion]:
-                                criterion2metaoutlog_per_test[criterion]\
-                                                                    [elem] = {}
-
-                    for elem in coverage_tmp_data_per_criterion[criterion]:
-                        # verify that the value is positive or null
-                        v_elem = coverage_tmp_data_per_criterion[criterion]\
-                                                                        [elem]
-                        ERROR_HANDLER.assert_true(type(v_elem) == int, \
-                                        "cov num type must be int", __file__)
-                        ERROR_HANDLER.assert_true(v_elem >= 0, \
-                                        "invalid cov num(negative)", __file__)
-                        try:
-                            res = criterion2coverage_per_test[criterion][elem]
-                        except KeyError:
-                            #res = {}
-                            res = _get_init_elem_cov()
-                            criterion2coverage_per_test[criterion][elem] = res
-
-                        #res[testcase] = coverage_tmp_data_per_criterion\
-                        res[test2pos[testcase]] = \
-                                        coverage_tmp_data_per_criterion\
-                                                            [criterion][elem]
-
-                    if criterion_to_executionoutput[criterion] is not None:
-                        for elem in metaoutlog_tmp_data_per_criterion[\
-                                                                    criterion]:
-                            try:
-                                res = criterion2metaoutlog_per_test[criterion]\
-                                                                        [elem]
-                            except KeyError:
-                                res = {}
-                                criterion2metaoutlog_per_test[criterion][\
-                                                                    elem] = res
-
-                            res[testcase] = metaoutlog_tmp_data_per_criterion\
-                                                            [criterion][elem]
-                            
+                with update_lock:
+                    _update_data(testcase, cg_criteria, \
+                                        coverage_tmp_data_per_criterion, \
+                                        metaoutlog_tmp_data_per_criterion)
 
                 # remove dir created for temporal storage
                 try:
@@ -254,6 +309,33 @@ class BaseCriteriaTool(abc.ABC):
                 except PermissionError:
                     self._dir_chmod777(result_dir_tmp)
                     shutil.rmtree(result_dir_tmp)
+        #~ def _execute_test()
+
+        # Execute each test and gather the data
+        processbar = tqdm.tqdm(testcases, leave=False, dynamic_ncols=True) 
+        if test_parallel_count == 1:
+            result_dir_tmp, groups = workers_data[0]
+            for testcase in processbar: 
+                testcase = sys.intern(testcase)
+                processbar.set_description("Running Test %s"% testcase)
+                _execute_test(testcase, result_dir_tmp, groups, False)
+        else:
+            # Each worker takes the next test not yet executed
+            tests_iter = iter(processbar)
+            def _worker(result_dir_tmp, groups):
+                while True:
+                    with update_lock:
+                        testcase = next(tests_iter, None)
+                    if testcase is None:
+                        break
+                    _execute_test(sys.intern(testcase), result_dir_tmp, \
+                                                                groups, True)
+            #~ def _worker()
+
+            joblib.Parallel(n_jobs=test_parallel_count, require='sharedmem')(\
+                                joblib.delayed(_worker)(result_dir_tmp, groups)\
+                                    for result_dir_tmp, groups in workers_data)
+            shutil.rmtree(workers_dir)
 
         # Write the execution data into the matrices
         # Since for ExecutionMatrix, active is not 0 thus this is direct.
@@ -264,14 +346,15 @@ class BaseCriteriaTool(abc.ABC):
             if matrix_file is not None and os.path.isfile(matrix_file):
                 os.remove(matrix_file)
                                     
-            for key, value in list(\
+            with matrix.bulk_row_adder(serialize=False) as matrix_rows:
+                for key, value in list(\
                             criterion2coverage_per_test[criterion].items()):
-                #missing_tests = {t:common_mix.GlobalConstants.\
-                #                        ELEMENT_NOTCOVERED_VERDICT for t in \
-                #                                  testcases_set - set(value)}
-                #value.update(missing_tests)
-                value = {t: value[test2pos[t]] for t in test2pos}
-                matrix.add_row_by_key(key, value, serialize=False)
+                    #missing_tests = {t:common_mix.GlobalConstants.\
+                    #                    ELEMENT_NOTCOVERED_VERDICT for t in \
+                    #                              testcases_set - set(value)}
+                    #value.update(missing_tests)
+                    matrix_rows[key] = {t: value[test2pos[t]] \
+                                                        for t in test2pos}
             # Serialize to disk
             matrix.serialize()
 
@@ -304,13 +387,22 @@ class BaseCriteriaTool(abc.ABC):
         Note: Here the temporary matrix is used as checkpoint 
                 (with frequency the 'serialize_period' parameter). 
             The checkpointer is mainly used for the execution time
-            (TODO: support parallelism: per test outdata)
+            When test_parallel_count > 1, test_parallel_count workers
+            execute the elements, each taking the next element as soon as
+            it is done with the previous one, with its own staged copy of
+            the element's executables (sandbox). The results are written
+            (optimizer feedback, checkpoint) in the order the elements were
+            obtained from the prioritization module.
         '''
-        # FIXME: Support parallelism, then remove the code
-        # bellow:
-        ERROR_HANDLER.assert_true(test_parallel_count <= 1, \
-                    "FIXME: Must first implement support for parallel mutatio")
-        #~ FXIMEnd
+        ERROR_HANDLER.assert_true(test_parallel_count >= 1, \
+                "invalid parallel count: {}".format(test_parallel_count), \
+                                                                    __file__)
+        if test_parallel_count > 1 and not self.meta_test_generation_obj\
+                                        .can_run_tests_in_sandbox(testcases):
+            logging.warning("{} {}".format(\
+                        "Some test tools cannot run tests in sandbox.", \
+                        "The criteria elements are executed sequentially."))
+            test_parallel_count = 1
 
         # @Checkpoint: validate
         if checkpoint_handler is not None:
@@ -353,54 +445,35 @@ class BaseCriteriaTool(abc.ABC):
             # main loop for elements execution
             num_elems = len(criteria_element_list)
             pos = -1 + len(completed_elems)
-            ## prepare the optimizer
-            prioritization_module.reset(self.config.get_tool_config_alias(), \
-                                            criteria_element_list, testcases)
-            while prioritization_module.has_next_test_objective():
-                #pos += 1 # Done bellow in the case where it was not completed
-                element = prioritization_module.get_next_test_objective()
-
-                # @Checkpointing: check if already executed
-                if element in completed_elems:
-                    continue
-                else:
+
+            def _get_next_element():
+                """ The next element not yet executed and its position
+                    or None if no more element
+                """
+                nonlocal pos
+                while prioritization_module.has_next_test_objective():
+                    #pos += 1 # Done bellow in case it was not completed
+                    element = prioritization_module.get_next_test_objective()
+
+                    # @Checkpointing: check if already executed
+                    if element in completed_elems:
+                        continue
                     pos += 1
 
-                logging.debug("# Executing {} element {} ({}/{}) ...".format( \
-                                    criterion.get_str(), \
+                    logging.debug("# Executing {} element {} ({}/{}) ..."\
+                                    .format(criterion.get_str(), \
                                     DriversUtils.make_meta_element(element, \
                                         self.config.get_tool_config_alias()), \
                                     pos, num_elems))
+                    return element, pos
+                return None
+            #~ def _get_next_element()
 
-                # execute element with the given testcases
-                element_executable_path = \
-                                self._get_criterion_element_executable_path(\
-                                                            criterion, element)
-                execution_environment_vars = \
-                                self._get_criterion_element_environment_vars(\
-                                                            criterion, element)
-                # run optimizer with all tests of targeting the test objective
-                may_cov_tests = prioritization_module\
-                                        .get_test_execution_optimizer(element)\
-                                        .select_tests(100, is_proportion=True)
-
-                cannot_cov_tests = set(testcases) - set(may_cov_tests)
-                
-                fail_verdicts, exec_outs_by_tests = \
-                                    self.meta_test_generation_obj.runtests(\
-                                        meta_testcases=may_cov_tests, \
-                                        exe_path_map=element_executable_path, \
-                                        env_vars=execution_environment_vars, \
-                                        stop_on_failure=\
-                                                cover_criteria_elements_once, \
-                                        use_recorded_timeout_times=\
-                                                            timeout_times, \
-                                        with_output_summary=(executionoutput \
-                                                                is not None), \
-                                        parallel_test_count=None, \
-                                        restart_checkpointer=True)
+            def _save_element_result(element, elem_pos, may_cov_tests, \
+                                        fail_verdicts, exec_outs_by_tests):
                 prioritization_module.feedback(element, fail_verdicts)
 
+                cannot_cov_tests = set(testcases) - set(may_cov_tests)
                 fail_verdicts.update({\
                             v: common_mix.GlobalConstants.PASS_TEST_VERDICT \
                                                 for v in cannot_cov_tests})
@@ -409,7 +482,7 @@ class BaseCriteriaTool(abc.ABC):
                 matrix_row_values = \
                                 {tc:failverdict_to_val_map[fail_verdicts[tc]] \
                                                     for tc in fail_verdicts}
-                serialize_on = (pos % serialize_period == 0)
+                serialize_on = (elem_pos % serialize_period == 0)
                 cp_data[0][matrix_row_key] = matrix_row_values
 
                 if executionoutput is not None:
@@ -422,11 +495,126 @@ class BaseCriteriaTool(abc.ABC):
                                             taskid=cp_calling_done_task_id, \
                                             tool=cp_calling_tool, \
                                             opt_payload=cp_data)
+            #~ def _save_element_result()
+
+            ## prepare the optimizer
+            prioritization_module.reset(self.config.get_tool_config_alias(), \
+                                            criteria_element_list, testcases, \
+                                        test_to_execution_time=\
+                                            self.meta_test_generation_obj\
+                                            .get_test_recorded_times(testcases))
+            if test_parallel_count <= 1:
+                while True:
+                    next_elem = _get_next_element()
+                    if next_elem is None:
+                        break
+                    element, elem_pos = next_elem
+
+                    # execute element with the given testcases
+                    element_executable_path = \
+                                self._get_criterion_element_executable_path(\
+                                                            criterion, element)
+                    execution_environment_vars = \
+                                self._get_criterion_element_environment_vars(\
+                                                            criterion, element)
+                    # run optimizer with all tests of targeting the test 
+                    # objective
+                    may_cov_tests = prioritization_module\
+                                        .get_test_execution_optimizer(element)\
+                                        .select_tests(100, is_proportion=True)
+
+                    fail_verdicts, exec_outs_by_tests = \
+                                    self.meta_test_generation_obj.runtests(\
+                                        meta_testcases=may_cov_tests, \
+                                        exe_path_map=element_executable_path, \
+                                        env_vars=execution_environment_vars, \
+                                        stop_on_failure=\
+                                                cover_criteria_elements_once, \
+                                        use_recorded_timeout_times=\
+                                                            timeout_times, \
+                                        with_output_summary=(executionoutput \
+                                                                is not None), \
+                                        parallel_test_count=None, \
+                                        restart_checkpointer=True)
+                    _save_element_result(element, elem_pos, may_cov_tests, \
+                                            fail_verdicts, exec_outs_by_tests)
+            else:
+                def _worker_exec(exe_path_map, env_vars, may_cov_tests):
+                    return self.meta_test_generation_obj.runtests_in_sandbox(\
+                                        meta_testcases=may_cov_tests, \
+                                        exe_path_map=exe_path_map, \
+                                        env_vars=env_vars, \
+                                        stop_on_failure=\
+                                                cover_criteria_elements_once, \
+                                        use_recorded_timeout_times=\
+                                                            timeout_times, \
+                                        with_output_summary=(executionoutput \
+                                                                is not None))
+                #~ def _worker_exec()
+
+                sandboxes_dir = os.path.join(self.criteria_working_dir, \
+                                            "separated_workers_sandboxes.tmp")
+                # The prioritization module and the staging (the tool may
+                # use a common directory to get the executables) are
+                # accessed by one worker at a time
+                elements_lock = threading.Lock()
+                # Reorder buffer of the executed elements results, by
+                # position, saved in the order of the elements
+                results_by_pos = {}
+                next_save_pos = pos + 1
+
+                def _worker(worker_id):
+                    nonlocal next_save_pos
+                    sandbox_dir = os.path.join(sandboxes_dir, str(worker_id))
+                    while True:
+                        with elements_lock:
+                            next_elem = _get_next_element()
+                            if next_elem is None:
+                                break
+                            element, elem_pos = next_elem
+                            element_executable_path = \
+                                self._stage_criterion_element_executable(\
+                                            criterion, element, sandbox_dir)
+                            execution_environment_vars = \
+                                self._get_criterion_element_environment_vars(\
+                                                            criterion, element)
+                            may_cov_tests = prioritization_module\
+                                        .get_test_execution_optimizer(element)\
+                                        .select_tests(100, is_proportion=True)
+
+                        fail_verdicts, exec_outs_by_tests = _worker_exec(\
+                                        element_executable_path, \
+                                        execution_environment_vars, \
+                                        may_cov_tests)
+
+                        # Single writer, as soon as the next position to
+                        # save is available
+                        with elements_lock:
+                            results_by_pos[elem_pos] = (element, \
+                                            may_cov_tests, fail_verdicts, \
+                                                        exec_outs_by_tests)
+                            while next_save_pos in results_by_pos:
+                                element, may_cov_tests, fail_verdicts, \
+                                                    exec_outs_by_tests = \
+                                            results_by_pos.pop(next_save_pos)
+                                _save_element_result(element, next_save_pos, \
+                                            may_cov_tests, fail_verdicts, \
+                                                        exec_outs_by_tests)
+                                next_save_pos += 1
+                #~ def _worker()
+
+                joblib.Parallel(n_jobs=test_parallel_count, \
+                                                        require='sharedmem')(\
+                                    joblib.delayed(_worker)(worker_id) \
+                                    for worker_id in range(test_parallel_count))
+                ERROR_HANDLER.assert_true(len(results_by_pos) == 0, \
+                            "Some executed elements results are not saved", \
+                                                                    __file__)
+                if os.path.isdir(sandboxes_dir):
+                    shutil.rmtree(sandboxes_dir)
 
         # Write the execution data into the matrix
-        for matrix_row_key, matrix_row_values in list(cp_data[0].items()):
-            matrix.add_row_by_key(matrix_row_key, matrix_row_values, \
-                                                            serialize=False)
+        matrix.add_rows_by_keys(cp_data[0], serialize=False)
 
         # TODO: Make the following two instructions atomic                                                    
         # final serialization (in case #Muts not multiple od serialize_period)
@@ -440,6 +628,30 @@ class BaseCriteriaTool(abc.ABC):
                 executionoutput.serialize()
     #~ def _runtest_separate_criterion_program()
 
+    def _stage_criterion_element_executable(self, criterion, element_id, \
+                                                                sandbox_dir):
+        """ Stage (see common_fs.stage_file) the executables of the 
+            criterion element into the directory sandbox_dir (recreated) 
+            :return: the exe_path_map of the staged executables
+        """
+        if os.path.isdir(sandbox_dir):
+            shutil.rmtree(sandbox_dir)
+        os.makedirs(sandbox_dir)
+        repo_mgr = self.code_builds_factory.repository_manager
+        exe_path_map = self._get_criterion_element_executable_path(\
+                                                        criterion, element_id)
+        sandbox_exe_path_map = {}
+        for repo_exe, exe in exe_path_map.items():
+            if exe is None:
+                exe = repo_mgr.repo_abs_path(repo_exe)
+            sandbox_exe = os.path.join(sandbox_dir, repo_exe)
+            if not os.path.isdir(os.path.dirname(sandbox_exe)):
+                os.makedirs(os.path.dirname(sandbox_exe))
+            common_fs.stage_file(exe, sandbox_exe)
+            sandbox_exe_path_map[repo_exe] = sandbox_exe
+        return sandbox_exe_path_map
+    #~ def _stage_criterion_element_executable()
+
     def runtests_criteria_coverage (self, testcases, \
                                     criteria_element_list_by_criteria, \
                                     criterion_to_matrix, \
@@ -447,15 +659,14 @@ class BaseCriteriaTool(abc.ABC):
                                     re_instrument_code=True, \
                                     cover_criteria_elements_once=False, \
                                     prioritization_module_by_criteria=None, \
-                                    test_parallel_count=1):
+                                    test_parallel_count=1, \
+                                    meta_test_parallel_count=1):
         """
-            (TODO: support parallelism: per test outdata)
+            :param test_parallel_count: number of criteria elements executed
+                        at once for the separated criteria
+            :param meta_test_parallel_count: number of tests executed at
+                        once for the meta criteria
         """
-        # FIXME: Support parallelism, then remove the code
-        # bellow:
-        ERROR_HANDLER.assert_true(test_parallel_count <= 1, \
-                "FIXME: Must first implement support for parallel mutation")
-        #~ FXIMEnd
 
         # save memory
         testcases = [sys.intern(t) for t in testcases]
@@ -544,7 +755,7 @@ class BaseCriteriaTool(abc.ABC):
                                 cover_criteria_elements_once=\
                                             cover_criteria_elements_once,\
                                 prioritization_module_by_criteria=m_crit2pm, \
-                                test_parallel_count=test_parallel_count)
+                                test_parallel_count=meta_test_parallel_count)
 
             # @Checkpoint: checkpoint
             checkpoint_handler.do_checkpoint(func_name=cp_func_name, \
@@ -663,6 +874,24 @@ class BaseCriteriaTool(abc.ABC):
         return os.path.dirname(os.path.dirname(self.criteria_working_dir))
     #~ def _get_latest_top_output_dir()
 
+    def _can_collect_coverage_in_parallel(self):
+        """ Whether the meta criteria coverage can be collected for several
+            tests at once. Override this in a tool that suports it, with
+            `_get_worker_criteria_environment_vars` if needed
+        """
+        return False
+    #~ def _can_collect_coverage_in_parallel()
+
+    def _get_worker_criteria_environment_vars(self, worker_dir, \
+                                            result_dir_tmp, enabled_criteria):
+        """ Same as `_get_criteria_environment_vars` for a worker of the
+            parallel coverage collection. worker_dir is owned by the worker
+            and result_dir_tmp, in worker_dir, is recreated for each test
+        """
+        return self._get_criteria_environment_vars(result_dir_tmp, \
+                                                            enabled_criteria)
+    #~ def _get_worker_criteria_environment_vars()
+
     def _extract_metaoutlog_data_of_a_test(self, enabled_criteria, \
                                     test_execution_verdict, result_dir_tmp):
         """ Override this in a tool that suports it
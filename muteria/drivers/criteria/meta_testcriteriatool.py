@@ -256,6 +256,7 @@ class MetaCriteriaTool(object):
                                     cover_criteria_elements_once=False,
                                     prioritization_module_by_criteria=None,
                                     parallel_count=1, \
+                                    meta_parallel_count=1, \
                                     parallel_criteria_test_scheduler=None,\
                                     restart_checkpointer=False, \
                                     finish_destroy_checkpointer=True):
@@ -288,7 +289,12 @@ class MetaCriteriaTool(object):
                         by criteria. None means no prioritization used.
 
         :type \parallel_count:
-        :param \parallel_count:
+        :param \parallel_count: number of criteria elements (of separated
+                        criteria, such as strong mutation) executed at once
+
+        :type \meta_parallel_count:
+        :param \meta_parallel_count: number of tests executed at once for
+                        the meta criteria (such as statement coverage)
 
         :type \parallel_criteria_test_scheduler:
         :param \parallel_criteria_test_scheduler: scheduler that organize 
@@ -305,9 +311,6 @@ class MetaCriteriaTool(object):
         # FIXME: Make sure that the support are implemented for 
         # parallelism and test prioritization. Remove the code bellow 
         # once supported:
-        ERROR_HANDLER.assert_true(parallel_count <= 1, \
-                    "Must implement parallel execution support here", \
-                                                                    __file__)
         ERROR_HANDLER.assert_true(parallel_criteria_test_scheduler is None, \
             "Must implement parallel codes tests execution support here", \
                                                                     __file__)
@@ -317,6 +320,9 @@ class MetaCriteriaTool(object):
         ERROR_HANDLER.assert_true(parallel_count > 0, \
                     "invalid parallel  execution count: {}. {}".format( \
                                     parallel_count, "must be >= 1"))
+        ERROR_HANDLER.assert_true(meta_parallel_count > 0, \
+                    "invalid meta parallel  execution count: {}. {}".format( \
+                                    meta_parallel_count, "must be >= 1"))
 
         # @Checkpoint: create a checkpoint handler
         cp_func_name = "runtests_criteria_coverage"
@@ -394,7 +400,7 @@ class MetaCriteriaTool(object):
                                                 criterion.get_field_value() 
                                                                 + '-' 
                                                                 + ctoolalias 
-                                                                + '.csv')
+                            + common_matrices.get_matrix_file_extension())
                 if criterion_to_executionoutput is None or \
                             criterion_to_executionoutput[criterion] is None:
                     _criteria2outhash[criterion] = None
@@ -404,7 +410,8 @@ class MetaCriteriaTool(object):
                                                 criterion.get_field_value() 
                                                         + '-' 
                                                         + ctoolalias 
-                                                        + '.outloghash.json')
+                                                        + '.outloghash'
+                    + common_matrices.get_matrix_file_extension('.json'))
                 crit2tool2matrixfile[criterion][ctoolalias] = \
                                                     _criteria2matrix[criterion]
                 crit2tool2outhashfile[criterion][ctoolalias] = \
@@ -437,7 +444,9 @@ class MetaCriteriaTool(object):
                                 cover_criteria_elements_once=\
                                                 cover_criteria_elements_once, \
                                 prioritization_module_by_criteria=\
-                                            prioritization_module_by_criteria)
+                                            prioritization_module_by_criteria,\
+                                test_parallel_count=parallel_count, \
+                                meta_test_parallel_count=meta_parallel_count)
 
                 # Checkpointing
                 checkpoint_handler.do_checkpoint( \
@@ -485,12 +494,11 @@ class MetaCriteriaTool(object):
                         set_index(tool_matrix.get_key_colname(), drop=True).\
                                                 to_dict(orient="index")
                 
-                for c_key in key2nonkeydict:
-                    meta_c_key = DriversUtils.make_meta_element(\
+                with result_matrix.bulk_row_adder(serialize=False) as rows:
+                    for c_key in key2nonkeydict:
+                        meta_c_key = DriversUtils.make_meta_element(\
                                                         str(c_key), mtoolalias)
-                    result_matrix.add_row_by_key(meta_c_key, 
-                                                        key2nonkeydict[c_key], 
-                                                        serialize=False)
+                        rows[meta_c_key] = key2nonkeydict[c_key]
 
                 # out log hash
                 if crit2tool2outhashfile[criterion] is not None:
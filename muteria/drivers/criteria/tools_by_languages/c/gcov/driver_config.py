@@ -3,11 +3,14 @@ ERROR_HANDLER = common_mix.ErrorHandler
 
 class DriverConfigGCov:
     def __init__(self, allow_missing_coverage=False, use_gdb_wrapper=True, \
-                                                                    **kwargs):
+                                                use_json_stream=True, **kwargs):
         ERROR_HANDLER.assert_true(type(allow_missing_coverage) == bool, \
                 "invalid allow_missing_coverage type. Must be bool", __file__)
         self.allow_missing_coverage = allow_missing_coverage
         self.use_gdb_wrapper = use_gdb_wrapper
+        ERROR_HANDLER.assert_true(type(use_json_stream) == bool, \
+                "invalid use_json_stream type. Must be bool", __file__)
+        self.use_json_stream = use_json_stream
     #~ def __init__()
 
     def get_allow_missing_coverage(self):
@@ -17,4 +20,8 @@ class DriverConfigGCov:
     def get_use_gdb_wrapper(self):
         return self.use_gdb_wrapper
     #~ def get_use_gdb_wrapper()
+
+    def get_use_json_stream(self):
+        return self.use_json_stream
+    #~ def get_use_json_stream()
 #~ class DriverConfigGCov
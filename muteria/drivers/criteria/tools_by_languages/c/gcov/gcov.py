@@ -6,9 +6,11 @@ from __future__ import print_function
 import os
 import sys
 import re
+import json
 import shutil
 import shlex
 import logging
+import tempfile
 import subprocess
 
 import muteria.common.mix as common_mix
@@ -28,6 +30,9 @@ from muteria.drivers.criteria.tools_by_languages.c.gcov.driver_config \
 ERROR_HANDLER = common_mix.ErrorHandler
 
 class CriteriaToolGCov(BaseCriteriaTool):
+    # Whether a gcov program supports '--json-format --stdout' (per program)
+    _json_stream_support = {}
+
     def __init__(self, *args, **kwargs):
         BaseCriteriaTool.__init__(self, *args, **kwargs)
 
@@ -54,6 +59,12 @@ class CriteriaToolGCov(BaseCriteriaTool):
                                         self.instrumented_code_storage_dir, \
                                                     "tmp_gcov_gdb_wrapper.sh")
 
+        # Coverage parsed from the gcov json stream, per result_dir_tmp
+        self.streamed_coverage_data = {}
+        # Map of the source names found by gcov to the source of interest
+        # (None when not of interest). Static for an instrumentation
+        self.gcov_src_to_src_of_interest = None
+
         # clean any possible gcda file
         for file_ in self._get_gcda_list():
             os.remove(file_)
@@ -66,8 +77,10 @@ class CriteriaToolGCov(BaseCriteriaTool):
         return gcov_files
     #~ def _get_gcov_list()
 
-    def _get_gcda_list(self):
-        gcda_files = self._recursive_list_files(self.gc_files_dir, '.gcda')
+    def _get_gcda_list(self, gc_files_dir=None):
+        if gc_files_dir is None:
+            gc_files_dir = self.gc_files_dir
+        gcda_files = self._recursive_list_files(gc_files_dir, '.gcda')
         return gcda_files
     #~ def _get_gcda_list()
 
@@ -81,6 +94,63 @@ class CriteriaToolGCov(BaseCriteriaTool):
         return filtered_files
     #~ def _recursive_list_files()
 
+    def _get_gcov_prog(self):
+        prog = 'gcov'
+        if self.custom_binary_dir is not None:
+            prog = os.path.join(self.custom_binary_dir, prog)
+            ERROR_HANDLER.assert_true(os.path.isfile(prog), \
+                            "The tool {} is missing from the specified dir {}"\
+                                        .format(os.path.basename(prog), \
+                                            self.custom_binary_dir), __file__)
+        return prog
+    #~ def _get_gcov_prog()
+
+    @classmethod
+    def _gcov_supports_json_stream(cls, prog):
+        """ Check (once per program) that gcov can write its json
+            intermediate format on stdout (gcc >= 9)
+        """
+        if prog not in cls._json_stream_support:
+            ret, out, _ = DriversUtils.execute_and_get_retcode_out_err(\
+                                                prog, args_list=['--help'])
+            cls._json_stream_support[prog] = (ret == 0 and \
+                                            '--json-format' in out and \
+                                            '--stdout' in out)
+        return cls._json_stream_support[prog]
+    #~ def _gcov_supports_json_stream()
+
+    def _get_source_of_interest(self, src_file):
+        """ Get the source of interest (as in the repository src map)
+            corresponding to the source file reported by gcov, or None
+            if the file is not of interest
+        """
+        if self.gcov_src_to_src_of_interest is None:
+            self.gcov_src_to_src_of_interest = {}
+        if src_file in self.gcov_src_to_src_of_interest:
+            return self.gcov_src_to_src_of_interest[src_file]
+
+        _, src_map = self.code_builds_factory.repository_manager.\
+                                                    get_relative_exe_path_map()
+        s_cand = os.path.normpath(src_file)
+        if not s_cand in src_map:
+            norm_src = s_cand
+            s_cand = None
+            for s in src_map.keys():
+                if s.endswith(os.sep+norm_src):
+                    ERROR_HANDLER.assert_true(s_cand is None,\
+                                          "multiple candidate, maybe same "+\
+                                          "source name in different dirs "+\
+                                          "for source {}".format(norm_src), \
+                                                                    __file__)
+                    # ensure compatibility in matrices
+                    s_cand = s
+            # If src file does not represent (not equal and not relatively
+            # equal, for case where build happens not in rootdir),
+            # src not in considered (s_cand is None)
+        self.gcov_src_to_src_of_interest[src_file] = s_cand
+        return s_cand
+    #~ def _get_source_of_interest()
+
     class InstrumentCallbackObject(DefaultCallbackObject):
         def after_command(self):
             if self.op_retval != common_mix.GlobalConstants.COMMAND_SUCCESS:
@@ -240,20 +310,49 @@ class CriteriaToolGCov(BaseCriteriaTool):
         return {e:None for e in enabled_criteria}
     #~ def _get_criteria_environment_vars()
 
+    def _can_collect_coverage_in_parallel(self):
+        # The gcda files of each worker are written in its own directory
+        # and the json stream is used (no '.gcov' files written)
+        return self.driver_config.get_use_json_stream() and \
+                        self._gcov_supports_json_stream(self._get_gcov_prog())
+    #~ def _can_collect_coverage_in_parallel()
+
+    def _get_worker_criteria_environment_vars(self, worker_dir, \
+                                            result_dir_tmp, enabled_criteria):
+        ''' The gcda files are written in the worker's gcno_gcda dir, 
+            where the gcno files are linked
+        '''
+        worker_gc_files_dir = os.path.join(worker_dir, "gcno_gcda")
+        for gcno_file in self._recursive_list_files(self.gc_files_dir, \
+                                                                    '.gcno'):
+            link = os.path.join(worker_gc_files_dir, \
+                                os.path.relpath(gcno_file, self.gc_files_dir))
+            if not os.path.isdir(os.path.dirname(link)):
+                os.makedirs(os.path.dirname(link))
+            os.symlink(gcno_file, link)
+        # The gcda path (in gc_files_dir) is stripped of gc_files_dir
+        prefix_strip = len(os.path.abspath(self.gc_files_dir)\
+                                                .strip(os.sep).split(os.sep))
+        env_vars = {
+                    'GCOV_PREFIX': worker_gc_files_dir,
+                    'GCOV_PREFIX_STRIP': str(prefix_strip),
+                }
+        return {e: env_vars for e in enabled_criteria}
+    #~ def _get_worker_criteria_environment_vars()
+
     def _collect_temporary_coverage_data(self, criteria_name_list, \
                                             test_execution_verdict, \
                                             used_environment_vars, \
                                             result_dir_tmp, \
                                             testcase):
-        ''' get gcov files from gcda files into result_dir_tmp
+        ''' get gcov files from gcda files into result_dir_tmp.
+            When the json stream is used, the coverage is directly parsed
+            from the gcov output (no '.gcov' file is written)
         '''
-        prog = 'gcov'
-        if self.custom_binary_dir is not None:
-            prog = os.path.join(self.custom_binary_dir, prog)
-            ERROR_HANDLER.assert_true(os.path.isfile(prog), \
-                            "The tool {} is missing from the specified dir {}"\
-                                        .format(os.path.basename(prog), \
-                                            self.custom_binary_dir), __file__)
+        prog = self._get_gcov_prog()
+
+        use_json_stream = self.driver_config.get_use_json_stream() and \
+                                    self._gcov_supports_json_stream(prog)
 
         cov2flags = {
                     TestCriteria.STATEMENT_COVERAGE: [],
@@ -265,25 +364,48 @@ class CriteriaToolGCov(BaseCriteriaTool):
         for criterion in criteria_name_list:
             args_list += cov2flags[criterion]
 
-        gcda_files = self._get_gcda_list()
+        if used_environment_vars is not None and \
+                                    'GCOV_PREFIX' in used_environment_vars:
+            # Worker of parallel collection
+            gcda_files = self._get_gcda_list(\
+                                        used_environment_vars['GCOV_PREFIX'])
+        else:
+            gcda_files = self._get_gcda_list()
 
         raw_filename_list = [os.path.splitext(f)[0] for f in gcda_files]
+
+        if use_json_stream:
+            if len(gcda_files) == 0:
+                if not self.driver_config.get_allow_missing_coverage():
+                    ERROR_HANDLER.error_exit(\
+                        "Testcase '{}' did not generate gcda, {}".format(\
+                            testcase, "when allow missing coverage is disabled"))
+            # The json format always has the function data (the function
+            # flag would add text summaries to the output)
+            args_list = ['--json-format', '--stdout']
+            if TestCriteria.BRANCH_COVERAGE in criteria_name_list:
+                args_list.append('-b')
+            self.streamed_coverage_data[result_dir_tmp] = \
+                            self._stream_json_coverage(prog, args_list, \
+                                        raw_filename_list, criteria_name_list)
+            # delete gcda
+            for gcda_f in gcda_files:
+                os.remove(gcda_f)
+            return
+
         args_list += raw_filename_list
         
         if len(gcda_files) > 0:
             # TODO: When gcov generate coverage for different files with
             # same name filename but located at diferent dir. Avoid override.
-            # Go where the gcov will be looked for
-            cwd = os.getcwd()
-            os.chdir(self.gc_files_dir)
+            # Run where the gcov will be looked for
 
             # collect gcda (gcno)
             r, _, err_str = DriversUtils.execute_and_get_retcode_out_err(\
                                         prog=prog, \
                                         args_list=args_list, out_on=False, \
-                                        err_on=True, merge_err_to_out=False)
-
-            os.chdir(cwd)
+                                        err_on=True, merge_err_to_out=False, \
+                                        cwd=self.gc_files_dir)
             
             if r != 0: # or err_str:
                 ERROR_HANDLER.error_exit("Program {} {}.".format(prog,\
@@ -323,93 +445,154 @@ class CriteriaToolGCov(BaseCriteriaTool):
                                                 self.gcov_files_list_filename))
     #~ def _collect_temporary_coverage_data()
 
+    def _stream_json_coverage(self, prog, args_list, raw_filename_list, \
+                                                            enabled_criteria):
+        ''' Run gcov with json output on stdout and parse it as a stream
+            (one json object per data file). The gcov source files are
+            not needed.
+            return: the dict of criteria with covering count
+        '''
+        res = {c: {} for c in enabled_criteria}
+
+        if len(raw_filename_list) == 0:
+            return res
+
+        n_data_files = 0
+        err_file = tempfile.TemporaryFile()
+        p = subprocess.Popen([prog] + args_list + raw_filename_list, \
+                                        cwd=self.gc_files_dir, \
+                                        stdout=subprocess.PIPE, \
+                                        stderr=err_file)
+        for raw_line in p.stdout:
+            if not raw_line.startswith(b'{'):
+                continue
+            n_data_files += 1
+            for file_obj in json.loads(raw_line.decode('UTF-8', \
+                                                'backslashreplace'))['files']:
+                self._add_json_file_coverage(file_obj, res)
+        r = p.wait()
+        err_file.seek(0)
+        err_str = err_file.read().decode('UTF-8', 'backslashreplace')
+        err_file.close()
+
+        if r != 0 or n_data_files != len(raw_filename_list):
+            ERROR_HANDLER.error_exit("Program {} {}.".format(prog,\
+                        'collecting coverage is problematic. ')+
+                        "The error msg is {}. \nThe command:\n{}".format(\
+                            err_str, " ".join([prog] + args_list + \
+                                                raw_filename_list)), __file__)
+        return res
+    #~ def _stream_json_coverage()
+
+    def _add_json_file_coverage(self, file_obj, res):
+        ''' Add the coverage of a source file object of the gcov json
+            format into res (the dict of criteria with covering count).
+            The branch ids are the ordinals of the branches in their line
+        '''
+        func_cov = res.get(TestCriteria.FUNCTION_COVERAGE, None)
+        branch_cov = res.get(TestCriteria.BRANCH_COVERAGE, None)
+        statement_cov = res.get(TestCriteria.STATEMENT_COVERAGE, {})
+
+        src_file = self._get_source_of_interest(file_obj['file'])
+        if src_file is None:
+            return
+        if func_cov is not None:
+            for func in file_obj['functions']:
+                ident = DriversUtils.make_meta_element(func['name'], \
+                                                                    src_file)
+                func_cov[ident] = func['execution_count']
+        # A line may have several entries (one per function)
+        n_line_branches = {}
+        for line in file_obj['lines']:
+            line_elem = DriversUtils.make_meta_element(\
+                                        str(line['line_number']), src_file)
+            statement_cov[line_elem] = line['count'] + \
+                                            statement_cov.get(line_elem, 0)
+            if branch_cov is not None:
+                b_start = n_line_branches.get(line_elem, 0)
+                for b_ind, branch in enumerate(line['branches']):
+                    ident = DriversUtils.make_meta_element(\
+                                            str(b_start + b_ind), line_elem)
+                    branch_cov[ident] = branch['count']
+                n_line_branches[line_elem] = b_start + len(line['branches'])
+    #~ def _add_json_file_coverage()
+
+    def _add_dot_gcov_coverage(self, gcov_lines, res):
+        ''' Add the coverage of the lines of a '.gcov' file into res (the
+            dict of criteria with covering count).
+            The branch ids are the ordinals of the branches in their line,
+            as in the json format ('branch N' also counts the calls)
+        '''
+        func_cov = res.get(TestCriteria.FUNCTION_COVERAGE, None)
+        branch_cov = res.get(TestCriteria.BRANCH_COVERAGE, None)
+        statement_cov = res.get(TestCriteria.STATEMENT_COVERAGE, {})
+
+        last_line = None
+        src_file = None
+        n_line_branches = {}
+        for raw_line in gcov_lines:
+            line = raw_line.strip()
+            col_split = [v.strip() for v in line.split(':')]
+
+            if len(col_split) > 2 and col_split[1] == '0':
+                # preamble
+                if col_split[2] == "Source":
+                    src_file = self._get_source_of_interest(col_split[3])
+                    if src_file is None:
+                        # src not in considered
+                        return
+            elif line.startswith("function "):
+                # match function
+                if func_cov is not None:
+                    parts = line.split()
+                    ident = DriversUtils.make_meta_element(parts[1], \
+                                                                    src_file)
+                    func_cov[ident] = int(parts[3])
+            elif line.startswith("branch "):
+                # match branch
+                if branch_cov is not None:
+                    parts = line.split()
+                    b_ind = n_line_branches.get(last_line, 0)
+                    n_line_branches[last_line] = b_ind + 1
+                    ident = DriversUtils.make_meta_element(str(b_ind), \
+                                                                    last_line)
+                    if parts[2:4] == ['never', 'executed']:
+                        branch_cov[ident] = 0
+                    else:
+                        branch_cov[ident] = int(parts[3])
+
+            elif len(col_split) > 2 and re.match(r"^\d+$", col_split[1]):
+                # match line
+                if col_split[0] == '-':
+                    continue
+                last_line = DriversUtils.make_meta_element(col_split[1], \
+                                                                    src_file)
+                if col_split[0] in ('#####', '====='):
+                    exec_count = 0
+                else:
+                    exec_count = int(re.findall(r'^\d+', col_split[0])[0])
+                statement_cov[last_line] = exec_count
+    #~ def _add_dot_gcov_coverage()
+
     def _extract_coverage_data_of_a_test(self, enabled_criteria, \
                                     test_execution_verdict, result_dir_tmp):
         ''' read json files and extract data
             return: the dict of criteria with covering count
             # TODO: Restrict to returning coverage of specified headers files
         '''
+        if result_dir_tmp in self.streamed_coverage_data:
+            return self.streamed_coverage_data.pop(result_dir_tmp)
+
         gcov_list = common_fs.loadJSON(os.path.join(result_dir_tmp,\
                                                 self.gcov_files_list_filename))
         
         res = {c: {} for c in enabled_criteria}
 
-        func_cov = None
-        branch_cov = None
-        statement_cov = {}
-        if TestCriteria.FUNCTION_COVERAGE in enabled_criteria:
-            func_cov = res[TestCriteria.FUNCTION_COVERAGE]
-        if TestCriteria.BRANCH_COVERAGE in enabled_criteria:
-            branch_cov = res[TestCriteria.BRANCH_COVERAGE]
-        if TestCriteria.STATEMENT_COVERAGE in enabled_criteria:
-            statement_cov = res[TestCriteria.STATEMENT_COVERAGE]
-
-        # Sources of interest
-        _, src_map = self.code_builds_factory.repository_manager.\
-                                                    get_relative_exe_path_map()
-        
         #logging.debug("gcov_list: {}".format(gcov_list))
         
         for gcov_file in gcov_list:
             with open(gcov_file) as fp:
-                last_line = None
-                src_file = None
-                for raw_line in fp:
-                    line = raw_line.strip()
-                    col_split = [v.strip() for v in line.split(':')]
-
-                    if len(col_split) > 2 and col_split[1] == '0':
-                        # preamble
-                        if col_split[2] == "Source":
-                            src_file = os.path.normpath(col_split[3])
-                            if not src_file in src_map:
-                                s_cand = None
-                                for s in src_map.keys():
-                                    if s.endswith(os.sep+src_file):
-                                        ERROR_HANDLER.assert_true(s_cand is None,\
-                                              "multiple candidate, maybe same "+\
-                                              "source name in different dirs "+\
-                                              "for source {}".format(src_file), \
-                                                                        __file__)
-                                        s_cand = s
-                                if s_cand is None:
-                                    # If src file does not represent (not equal
-                                    # and not relatively equal, for case where
-                                    # build happens not in rootdir),
-                                    # src not in considered
-                                    break
-                                else:
-                                    # ensure compatibility in matrices
-                                    src_file = s_cand
-                    elif line.startswith("function "):
-                        # match function
-                        parts = line.split()
-                        ident = DriversUtils.make_meta_element(parts[1], \
-                                                                    src_file)
-                        func_cov[ident] = int(parts[3])
-                    elif line.startswith("branch "):
-                        # match branch
-                        parts = line.split()
-                        ident = DriversUtils.make_meta_element(parts[1], \
-                                                                    last_line)
-                        if parts[2:4] == ['never', 'executed']:
-                            branch_cov[ident] = 0
-                        else:
-                            branch_cov[ident] = int(parts[3])
-
-                    elif len(col_split) > 2 and \
-                                            re.match(r"^\d+$", col_split[1]):
-                        # match line
-                        if col_split[0] == '-':
-                            continue
-                        last_line = DriversUtils.make_meta_element(\
-                                                        col_split[1], src_file)
-                        if col_split[0] in ('#####', '====='):
-                            exec_count = 0
-                        else:
-                            exec_count = \
-                                    int(re.findall(r'^\d+', col_split[0])[0])
-                        statement_cov[last_line] = exec_count
+                self._add_dot_gcov_coverage(fp, res)
 
         # delete gcov files
         for gcov_f in self._get_gcov_list():
@@ -434,6 +617,7 @@ class CriteriaToolGCov(BaseCriteriaTool):
                 self._dir_chmod777(self.gc_files_dir)
                 shutil.rmtree(self.gc_files_dir)
         os.mkdir(self.gc_files_dir, mode=0o777)
+        self.gcov_src_to_src_of_interest = None
 
         prog = 'gcc'
         if self.custom_binary_dir is not None:
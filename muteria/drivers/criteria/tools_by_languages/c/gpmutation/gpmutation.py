@@ -168,8 +168,18 @@ class CriteriaToolGPMutation(BaseCriteriaTool):
                                         element_id, os.path.basename(map_key)))
         # If archiving
         if self.archive_separated:
-            archive_path = common_fs.TarGz.get_archive_filename_of(\
+            archive_path = common_fs.IndexedArchive.get_archive_filename_of(\
                                                         self.separate_muts_dir)
+            # Migrate the archive of previous versions (tar.gz)
+            tar_archive_path = common_fs.TarGz.get_archive_filename_of(\
+                                                        self.separate_muts_dir)
+            if not os.path.isfile(archive_path) and \
+                                            os.path.isfile(tar_archive_path):
+                err_msg = common_fs.IndexedArchive.migrateFromTarGz(\
+                                                            tar_archive_path)
+                ERROR_HANDLER.assert_true(err_msg is None, \
+                            "failed to migrate archive, err: "+str(err_msg), \
+                                                                    __file__)
             ERROR_HANDLER.assert_true(os.path.isfile(archive_path), \
                                     "Archived separated mutant file missing",\
                                     __file__)
@@ -177,8 +187,8 @@ class CriteriaToolGPMutation(BaseCriteriaTool):
                 shutil.rmtree(self.separate_muts_dir)
             # Extract the selected
             for arch_name in rel_names:
-                err_msg = common_fs.TarGz.extractFromArchive(archive_path, \
-                                                                    arch_name)
+                err_msg = common_fs.IndexedArchive.extractFromArchive(\
+                                        archive_path, arch_name, use_mmap=True)
                 ERROR_HANDLER.assert_true(err_msg is None, \
                             "failed to extract, err: "+str(err_msg), __file__)
         return mut_code
@@ -314,8 +324,8 @@ class CriteriaToolGPMutation(BaseCriteriaTool):
 
         # Archive separated if on
         if self.archive_separated:
-            err_msg = common_fs.TarGz.compressDir(self.separate_muts_dir, \
-                                                    remove_in_directory=True)
+            err_msg = common_fs.IndexedArchive.compressDir(\
+                            self.separate_muts_dir, remove_in_directory=True)
             ERROR_HANDLER.assert_true(err_msg is None,\
                                 "Compression failed: "+str(err_msg), __file__)
     #~ def _do_instrument_code()
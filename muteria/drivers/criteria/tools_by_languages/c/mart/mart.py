@@ -167,8 +167,18 @@ class CriteriaToolMart(BaseCriteriaTool):
                                                                 element_id, v))
         # If archiving
         if self.archive_separated:
-            archive_path = common_fs.TarGz.get_archive_filename_of(\
+            archive_path = common_fs.IndexedArchive.get_archive_filename_of(\
                                                         self.separate_muts_dir)
+            # Migrate the archive of previous versions (tar.gz)
+            tar_archive_path = common_fs.TarGz.get_archive_filename_of(\
+                                                        self.separate_muts_dir)
+            if not os.path.isfile(archive_path) and \
+                                            os.path.isfile(tar_archive_path):
+                err_msg = common_fs.IndexedArchive.migrateFromTarGz(\
+                                                            tar_archive_path)
+                ERROR_HANDLER.assert_true(err_msg is None, \
+                            "failed to migrate archive, err: "+str(err_msg), \
+                                                                    __file__)
             ERROR_HANDLER.assert_true(os.path.isfile(archive_path), \
                                     "Archived separated mutant file missing",\
                                     __file__)
@@ -176,8 +186,8 @@ class CriteriaToolMart(BaseCriteriaTool):
                 shutil.rmtree(self.separate_muts_dir)
             # Extract the selected
             for arch_name in rel_names:
-                err_msg = common_fs.TarGz.extractFromArchive(archive_path, \
-                                                                    arch_name)
+                err_msg = common_fs.IndexedArchive.extractFromArchive(\
+                                        archive_path, arch_name, use_mmap=True)
                 ERROR_HANDLER.assert_true(err_msg is None, \
                             "failed to extract, err: "+str(err_msg), __file__)
         return mut_code
@@ -209,6 +219,11 @@ class CriteriaToolMart(BaseCriteriaTool):
         return res
     #~ def _get_criteria_environment_vars()
 
+    def _can_collect_coverage_in_parallel(self):
+        # The logs are written in result_dir_tmp
+        return True
+    #~ def _can_collect_coverage_in_parallel()
+
     def _collect_temporary_coverage_data(self, criteria_name_list, \
                                             test_execution_verdict, \
                                             used_environment_vars, \
@@ -397,12 +412,9 @@ class CriteriaToolMart(BaseCriteriaTool):
                                                                     __file__)
 
         
-        # Execute Mart
-        cwd = os.getcwd()
-        os.chdir(self.mutant_data)
+        # Execute Mart (from the mutant data dir)
         ret, out, err = DriversUtils.execute_and_get_retcode_out_err(\
-                                                        prog, args_list=args)
-        os.chdir(cwd)
+                                    prog, args_list=args, cwd=self.mutant_data)
 
         if (ret != 0):
             logging.error(out)
@@ -430,8 +442,8 @@ class CriteriaToolMart(BaseCriteriaTool):
 
         # Archive separated if on
         if self.archive_separated:
-            err_msg = common_fs.TarGz.compressDir(self.separate_muts_dir, \
-                                                    remove_in_directory=True)
+            err_msg = common_fs.IndexedArchive.compressDir(\
+                            self.separate_muts_dir, remove_in_directory=True)
             ERROR_HANDLER.assert_true(err_msg is None,\
                                 "Compression failed: "+str(err_msg), __file__)
     #~ def _do_instrument_code()
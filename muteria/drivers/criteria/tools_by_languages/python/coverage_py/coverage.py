@@ -126,6 +126,22 @@ class CriteriaToolCoveragePy(BaseCriteriaTool):
                 } for criterion in enabled_criteria}
     #~ def _get_criteria_environment_vars()
 
+    def _can_collect_coverage_in_parallel(self):
+        # Each worker has its own data file (COVERAGE_FILE)
+        return True
+    #~ def _can_collect_coverage_in_parallel()
+
+    def _get_worker_criteria_environment_vars(self, worker_dir, \
+                                            result_dir_tmp, enabled_criteria):
+        res = self._get_criteria_environment_vars(result_dir_tmp, \
+                                                            enabled_criteria)
+        data_file = os.path.join(worker_dir, \
+                                        os.path.basename(self.raw_data_file))
+        for criterion in res:
+            res[criterion]["COVERAGE_FILE"] = data_file
+        return res
+    #~ def _get_worker_criteria_environment_vars()
+
     class PathAliases(object):
         def __init__(self, data_files, exe_rel_files, inst_top_dir, \
                                                         top_out_dir, repo_dir):
@@ -169,7 +185,13 @@ class CriteriaToolCoveragePy(BaseCriteriaTool):
                                                 testcase):
         ''' extract coverage data into json file in result_dir_tmp
         '''
-        cov_obj = coverage.Coverage(config_file=self.config_file)
+        raw_data_file = self.raw_data_file
+        if used_environment_vars is not None and \
+                                'COVERAGE_FILE' in used_environment_vars:
+            # Worker of parallel collection
+            raw_data_file = used_environment_vars['COVERAGE_FILE']
+        cov_obj = coverage.Coverage(data_file=raw_data_file, \
+                                                config_file=self.config_file)
         cov_obj.combine()
         tmp_dat_obj = cov_obj.get_data()
         
@@ -180,24 +202,28 @@ class CriteriaToolCoveragePy(BaseCriteriaTool):
             self.exes_rel
         except AttributeError:
             obj = common_fs.loadJSON(self.instrumentation_details)
-            self.exes_abs = []
-            self.exes_rel = []
+            exes_abs = []
+            exes_rel = []
             for rp, ap in list(obj.items()):
-                self.exes_rel.append(rp)
-                self.exes_abs.append(ap)
-            self.exes_rel, self.exes_abs = zip(*sorted(\
-                                            zip(self.exes_rel, self.exes_abs),\
+                exes_rel.append(rp)
+                exes_abs.append(ap)
+            exes_rel, exes_abs = zip(*sorted(zip(exes_rel, exes_abs),\
                                             key=lambda x: x.count(os.path.sep)\
                                             ))
             
             # get executables stmt and branches
-            self.executable_lines = {}
-            self.executable_arcs = {}
-            for fn in self.exes_abs:
+            executable_lines = {}
+            executable_arcs = {}
+            for fn in exes_abs:
                 pser = coverage.parser.PythonParser(filename=fn)
                 pser.parse_source() 
-                self.executable_lines[fn] = pser.statements
-                self.executable_arcs[fn] = pser.arcs() 
+                executable_lines[fn] = pser.statements
+                executable_arcs[fn] = pser.arcs() 
+            # Set exes_rel last, other workers may be checking it
+            self.executable_lines = executable_lines
+            self.executable_arcs = executable_arcs
+            self.exes_abs = exes_abs
+            self.exes_rel = exes_rel
 
 
         dat_obj = coverage.CoverageData()
@@ -235,7 +261,7 @@ class CriteriaToolCoveragePy(BaseCriteriaTool):
 
         cov_obj.erase()
         # clean any possible raw data file
-        for file_ in glob.glob(self.raw_data_file+"*"):
+        for file_ in glob.glob(raw_data_file+"*"):
             os.remove(file_)
     #~ def _collect_temporary_coverage_data()
 
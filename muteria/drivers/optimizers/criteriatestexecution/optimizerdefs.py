@@ -24,6 +24,10 @@ class CriteriaOptimizers(common_mix.EnumAutoName):
                                         ".strongmutation_by_mutantcoverage", \
                                         package=crit_opt.__name__
                                     ).CriteriaTestExecutionOptimizer
+    SM_PRIORITIZED_BY_KILL_HISTORY = importlib.import_module(\
+                                        ".kill_history_prioritization", \
+                                        package=crit_opt.__name__
+                                    ).CriteriaTestExecutionOptimizer
     # Any
     OPTIMIZED_FROM_DICT = importlib.import_module(".fromdict", \
                                         package=crit_opt.__name__
@@ -46,6 +50,7 @@ def check_is_right_optimizer(criterion, optimizer):
         TestCriteria.STRONG_MUTATION: {
             CriteriaOptimizers.SM_OPTIMIZED_BY_MCOV,
             CriteriaOptimizers.SM_OPTIMIZED_BY_WM,
+            CriteriaOptimizers.SM_PRIORITIZED_BY_KILL_HISTORY,
         }
     }
     generic = [
@@ -0,0 +1,235 @@
+#
+# [LICENCE]
+#
+""" Strong mutation test execution optimizer that orders the tests of each
+    mutant using the history of the test executions (the tests that killed
+    the mutant before and the kill rate of each test), the weak mutation and
+    mutant coverage matrices when available, and the tests execution times:
+    cheap likely killers are executed first.
+    The history is updated through `feedback` and persisted in the
+    controller data, across runs.
+"""
+
+from __future__ import print_function
+import os
+import sys
+import copy
+import logging
+
+import numpy as np
+
+import muteria.common.fs as common_fs
+import muteria.common.mix as common_mix
+import muteria.common.matrices as common_matrices
+
+import muteria.controller.explorer as explorer
+from muteria.drivers import DriversUtils
+from muteria.drivers.criteria import TestCriteria
+
+from muteria.drivers.optimizers.criteriatestexecution.\
+                                base_criteria_test_execution_optimizer \
+                                    import BaseCriteriaTestExecutionOptimizer
+
+from muteria.drivers.optimizers.testexecution.tools.default \
+                                                import TestExecutionOptimizer
+
+ERROR_HANDLER = common_mix.ErrorHandler
+
+class CriteriaTestExecutionOptimizer(BaseCriteriaTestExecutionOptimizer):
+    # Factors applied to the kill rate of a test for a mutant that it
+    # weakly kills (or covers), does not weakly kill, or does not cover
+    WEAKLY_KILLED_FACTOR = 4.0
+    NOT_WEAKLY_KILLED_FACTOR = 0.05
+    NOT_COVERED_FACTOR = 0.01
+    # Execution time of the tests without recorded time, when no test has
+    # one (seconds)
+    DEFAULT_EXECUTION_TIME = 1.0
+    MIN_EXECUTION_TIME = 0.001
+    # Number of feedbacks between two saves of the history
+    MODEL_SAVE_PERIOD = 100
+
+    # History keys
+    KILLS_KEY = "kills"
+    RUNS_KEY = "runs"
+    KILLERS_KEY = "killers"
+
+    #######################################################################
+    ##################### Methods implemented ############################
+    #######################################################################
+
+    @classmethod
+    def installed(cls, custom_binary_dir=None):
+        """ Check that the tool is installed
+            :return: bool reprenting whether the tool is installed or not
+                    (executable accessible on the path)
+                    - True: the tool is installed and works
+                    - False: the tool is not installed or do not work
+        """
+        return True
+    #~ def installed()
+
+    def reset (self, toolalias, test_objective_list, test_list, \
+                                    test_to_execution_time=None, **kwargs):
+        """ Reset the optimizer
+            :param test_to_execution_time: dict of the recorded execution
+                    time of the tests (None when not recorded)
+        """
+        self.toolalias = toolalias
+        self.test_objective_ordered_list = copy.deepcopy(test_objective_list)
+        self.pointer = 0
+        # The test orders are computed when the test objective is executed,
+        # to use the feedback of the previous ones
+        self.test_objective_to_test_execution_optimizer = {
+            to: None for to in self.test_objective_ordered_list
+        }
+        self.test_list = list(test_list)
+
+        # Execution times
+        if test_to_execution_time is None:
+            test_to_execution_time = {}
+        known_times = [t for t in test_to_execution_time.values() \
+                                                            if t is not None]
+        if len(known_times) > 0:
+            default_time = float(np.median(known_times))
+        else:
+            default_time = self.DEFAULT_EXECUTION_TIME
+        self.test_to_execution_time = {}
+        for test in self.test_list:
+            exec_time = test_to_execution_time.get(test, None)
+            if exec_time is None:
+                exec_time = default_time
+            self.test_to_execution_time[test] = \
+                                    max(exec_time, self.MIN_EXECUTION_TIME)
+
+        # Weak mutation and mutant coverage, when available
+        self.weakly_killing_tests = \
+                        self._get_matrix_active_tests(\
+                                                TestCriteria.WEAK_MUTATION)
+        self.covering_tests = \
+                        self._get_matrix_active_tests(\
+                                        TestCriteria.MUTANT_COVERAGE)
+
+        # History
+        self.history_file = self.explorer.get_file_pathname(\
+                    explorer.CRITERIA_TEST_EXECUTION_HISTORY[self.criterion])
+        if os.path.isfile(self.history_file):
+            self.history = common_fs.loadJSON(self.history_file)
+        else:
+            self.history = {self.KILLS_KEY: {}, self.RUNS_KEY: {}, \
+                                                        self.KILLERS_KEY: {}}
+        self.n_unsaved_feedbacks = 0
+    #~ def reset()
+
+    def get_test_execution_optimizer(self, test_objective):
+        """ Get an initialized test execution optimizer
+            (the user should not reset)
+        """
+        ERROR_HANDLER.assert_true(test_objective in \
+                            self.test_objective_to_test_execution_optimizer, \
+                                                    "Invalid test objective")
+        if self.test_objective_to_test_execution_optimizer[test_objective] \
+                                                                    is None:
+            teo = TestExecutionOptimizer(self.config, self.explorer)
+            teo.reset(None, self._get_ordered_tests(test_objective), \
+                                                            disable_reset=True)
+            self.test_objective_to_test_execution_optimizer[test_objective] \
+                                                                        = teo
+        return self.test_objective_to_test_execution_optimizer[test_objective]
+    #~ def get_test_execution_optimizer()
+
+    def feedback (self, test_objective, test_to_verdict, **kwargs):
+        """ Update the history with the verdicts of the tests executed on
+            the test objective
+        """
+        kills = self.history[self.KILLS_KEY]
+        runs = self.history[self.RUNS_KEY]
+        killer = None
+        for test, verdict in test_to_verdict.items():
+            if verdict == common_mix.GlobalConstants.FAIL_TEST_VERDICT:
+                kills[test] = kills.get(test, 0) + 1
+                runs[test] = runs.get(test, 0) + 1
+                if killer is None or self._get_execution_time(test) < \
+                                            self._get_execution_time(killer):
+                    killer = test
+            elif verdict == common_mix.GlobalConstants.PASS_TEST_VERDICT:
+                runs[test] = runs.get(test, 0) + 1
+        meta_to = DriversUtils.make_meta_element(test_objective, \
+                                                                self.toolalias)
+        if killer is not None:
+            self.history[self.KILLERS_KEY][meta_to] = killer
+        elif test_to_verdict and all(v is not None \
+                                            for v in test_to_verdict.values()):
+            # Not killed anymore
+            self.history[self.KILLERS_KEY].pop(meta_to, None)
+
+        self.n_unsaved_feedbacks += 1
+        if self.n_unsaved_feedbacks >= self.MODEL_SAVE_PERIOD or \
+                                            not self.has_next_test_objective():
+            self._save_history()
+    #~ def feedback()
+
+    ##### Private methods #####
+
+    def _get_execution_time(self, test):
+        return self.test_to_execution_time.get(test, \
+                                                self.DEFAULT_EXECUTION_TIME)
+    #~ def _get_execution_time()
+
+    def _get_matrix_active_tests(self, criterion):
+        """ Get the dict of the tests active on each test objective, from the
+            temporary matrix of the criterion, or None if not available
+        """
+        matrix_file = explorer.TMP_CRITERIA_MATRIX[criterion]
+        if not self.explorer.file_exists(matrix_file):
+            return None
+        matrix = common_matrices.ExecutionMatrix(\
+                    filename=self.explorer.get_existing_file_pathname(\
+                                                                matrix_file))
+        return {to: set(tests) for to, tests in \
+                                matrix.query_active_columns_of_rows().items()}
+    #~ def _get_matrix_active_tests()
+
+    def _get_ordered_tests(self, test_objective):
+        """ Order the tests by decreasing likelihood to kill the test
+            objective per time unit. The test that killed it before is first
+        """
+        meta_to = DriversUtils.make_meta_element(test_objective, \
+                                                                self.toolalias)
+        kills = self.history[self.KILLS_KEY]
+        runs = self.history[self.RUNS_KEY]
+        weakly_killing = None
+        if self.weakly_killing_tests is not None:
+            weakly_killing = self.weakly_killing_tests.get(meta_to, None)
+        covering = None
+        if self.covering_tests is not None:
+            covering = self.covering_tests.get(meta_to, None)
+
+        def _score(test):
+            # Laplace smoothed kill rate
+            score = (kills.get(test, 0) + 1.0) / (runs.get(test, 0) + 2.0)
+            if weakly_killing is not None:
+                if test in weakly_killing:
+                    score *= self.WEAKLY_KILLED_FACTOR
+                else:
+                    score *= self.NOT_WEAKLY_KILLED_FACTOR
+            elif covering is not None:
+                if test in covering:
+                    score *= self.WEAKLY_KILLED_FACTOR
+                else:
+                    score *= self.NOT_COVERED_FACTOR
+            return score / self._get_execution_time(test)
+        #~ def _score()
+
+        ordered = sorted(self.test_list, key=_score, reverse=True)
+        killer = self.history[self.KILLERS_KEY].get(meta_to, None)
+        if killer is not None and killer in self.test_to_execution_time:
+            ordered.remove(killer)
+            ordered.insert(0, killer)
+        return ordered
+    #~ def _get_ordered_tests()
+
+    def _save_history(self):
+        common_fs.dumpJSON(self.history, self.history_file)
+        self.n_unsaved_feedbacks = 0
+    #~ def _save_history()
+#~ class CriteriaTestExecutionOptimizer
@@ -51,6 +51,8 @@ import muteria.common.fs as common_fs
 from muteria.drivers import DriversUtils
 
 from muteria.drivers.checkpoint_handler import CheckPointHandler
+from muteria.drivers.testgeneration.test_execution_times import \
+                                                        TestExecutionTimes
 from muteria.repositoryandcode.callback_object import DefaultCallbackObject
 
 ERROR_HANDLER = common_mix.ErrorHandler
@@ -59,6 +61,12 @@ class BaseTestcaseTool(abc.ABC):
     '''
     '''
 
+    # Value of the collect_output argument of `_execute_a_test` requesting
+    # the output log as the tuple (length, hash), computed while the test
+    # runs (see `StreamingOutlogHasher`). Tools not supporting it treat it
+    # as True and collect the whole output.
+    COLLECT_HASHED_OUTPUT = "hashed"
+
     def __init__(self, tests_working_dir, code_builds_factory, config, \
                                         head_explorer, checkpointer, \
                                         parent_meta_tool=None):
@@ -95,8 +103,10 @@ class BaseTestcaseTool(abc.ABC):
         # Verify indirect Arguments Variables
 
         # Initialize Other Fields
-        self.test_execution_time = {}
         self.test_execution_time_storage_file = os.path.join(\
+                self.tests_working_dir, "test_to_execution_time_samples.json")
+        # Former storage, with a single time per test
+        legacy_test_execution_time_storage_file = os.path.join(\
                         self.tests_working_dir, "test_to_execution_time.json")
         self.shared_loc = multiprocessing.RLock()
 
@@ -105,9 +115,15 @@ class BaseTestcaseTool(abc.ABC):
         if not os.path.isdir(self.tests_working_dir):
             self.clear_working_dir()
 
-        if os.path.isfile(self.test_execution_time_storage_file):
-            self.test_execution_time = common_fs.loadJSON(\
-                                        self.test_execution_time_storage_file)
+        self.test_execution_time = TestExecutionTimes(\
+                            self.test_execution_time_storage_file, \
+                            self.config.RECORDED_TEST_TIME_SAMPLES, \
+                            self.config.RECORDED_TEST_TIME_PERCENTILE, \
+                            self.config.RECORDED_TEST_TIMEOUT_FACTOR, \
+                            self.config.RECORDED_TEST_TIMEOUT_MARGIN)
+        if os.path.isfile(legacy_test_execution_time_storage_file):
+            self.test_execution_time.load_legacy(\
+                                    legacy_test_execution_time_storage_file)
 
         # decompress potential test storage archive
         if self.compress_test_storage_dir:
@@ -209,7 +225,13 @@ class BaseTestcaseTool(abc.ABC):
                                         with_output_summary=True, \
                                         hash_outlog=True, \
                                         copy_exe_to_repo=True):
-        callback_func = self._execute_testcase
+        repo_mgr = self.code_builds_factory.repository_manager
+        def callback_func(**kwargs):
+            # The tests run in leased checkouts, synchronized with the 
+            # repository that custom_read_access locks
+            with repo_mgr.lend_lock_to_slot_syncs():
+                return self._execute_testcase(**kwargs)
+        #~ def callback_func()
         cb_obj = self.RepoRuntestsCallbackObject()
         cb_obj.set_post_callback_args((callback_func,
                                 {
@@ -224,7 +246,6 @@ class BaseTestcaseTool(abc.ABC):
                                     "with_output_summary":with_output_summary,\
                                     "hash_outlog":hash_outlog,
                                 }, copy_exe_to_repo))
-        repo_mgr = self.code_builds_factory.repository_manager
         _, exec_verdict = repo_mgr.custom_read_access(cb_obj)
         # revert exes
         self.code_builds_factory.set_repo_to_build_default()
@@ -238,7 +259,13 @@ class BaseTestcaseTool(abc.ABC):
                                 with_output_summary=True, hash_outlog=True, \
                                 parallel_count=1, \
                                 copy_exe_to_repo=True):
-        callback_func = self._runtests
+        repo_mgr = self.code_builds_factory.repository_manager
+        def callback_func(**kwargs):
+            # The tests run in leased checkouts, synchronized with the 
+            # repository that custom_read_access locks
+            with repo_mgr.lend_lock_to_slot_syncs():
+                return self._runtests(**kwargs)
+        #~ def callback_func()
         cb_obj = self.RepoRuntestsCallbackObject()
         cb_obj.set_post_callback_args((callback_func,
                                 {
@@ -255,7 +282,6 @@ class BaseTestcaseTool(abc.ABC):
                                     "hash_outlog":hash_outlog, \
                                     "parallel_count": parallel_count,
                                 }, copy_exe_to_repo))
-        repo_mgr = self.code_builds_factory.repository_manager
         _, exec_verdicts = repo_mgr.custom_read_access(cb_obj)
         # revert exes
         self.code_builds_factory.set_repo_to_build_default()
@@ -286,9 +312,8 @@ class BaseTestcaseTool(abc.ABC):
                 ERROR_HANDLER.assert_true(use_recorded_timeout_times > 0, \
                                         "use_recorded_timeout_times must be "
                                         "positive if not None", __file__)
-                if testcase in self.test_execution_time:
-                    timeout = self.test_execution_time[testcase] * \
-                                                use_recorded_timeout_times
+                timeout = self.test_execution_time.get_timeout(testcase, \
+                                                use_recorded_timeout_times)
         else:
             ERROR_HANDLER.assert_true(use_recorded_timeout_times is None, \
                                 "use_recorded_timeout_times must not be set "
@@ -307,10 +332,13 @@ class BaseTestcaseTool(abc.ABC):
                                                     hash_outlog=hash_outlog)
 
         # Record exec time if not existing
+        exec_time = time.time() - start_time
+        if use_recorded_timeout_times is not None and timeout is not None:
+            self._account_recorded_timeout(testcase, \
+                                use_recorded_timeout_times, execoutlog_hash, \
+                                exec_time=exec_time, timeout=timeout)
         if recalculate_execution_times:
-            self.test_execution_time[testcase] = \
-                                max(1, int(time.time() - start_time)) \
-                                    * self.config.RECORDED_TEST_TIMEOUT_FACTOR
+            self.test_execution_time.add_sample(testcase, exec_time)
 
         self._restore_env_vars()
         self._restore_default_executable(exe_path_map, env_vars, \
@@ -370,8 +398,10 @@ class BaseTestcaseTool(abc.ABC):
                 ERROR_HANDLER.assert_true(use_recorded_timeout_times > 0, \
                                         "use_recorded_timeout_times must be "
                                         "positive if not None", __file__)
-                per_test_timeout.update({x: (y * use_recorded_timeout_times) \
-                                for x, y in self.test_execution_time.items()})
+                per_test_timeout.update({x: \
+                                self.test_execution_time.get_timeout(x, \
+                                                use_recorded_timeout_times) \
+                                for x in self.test_execution_time.get_tests()})
         else:
             ERROR_HANDLER.assert_true(use_recorded_timeout_times is None, \
                                 "use_recorded_timeout_times must not be set "
@@ -402,11 +432,16 @@ class BaseTestcaseTool(abc.ABC):
             #    logging.debug("KTEST {} is done".format(testcase))
 
             # Record exec time if not existing
+            exec_time = time.time() - start_time
+            if use_recorded_timeout_times is not None and \
+                                        per_test_timeout[testcase] is not None:
+                self._account_recorded_timeout(testcase, \
+                                use_recorded_timeout_times, execoutlog_hash, \
+                                exec_time=exec_time, \
+                                timeout=per_test_timeout[testcase])
             with self.shared_loc:
                 if recalculate_execution_times:
-                    self.test_execution_time[testcase] = \
-                                     max(1, int(time.time() - start_time)) \
-                                 * self.config.RECORDED_TEST_TIMEOUT_FACTOR
+                    self.test_execution_time.add_sample(testcase, exec_time)
 
                 test_failed_verdicts[testcase] = test_failed
                 test_outlog_hash[testcase] = execoutlog_hash
@@ -428,8 +463,7 @@ class BaseTestcaseTool(abc.ABC):
                     break
         
         if recalculate_execution_times:
-            common_fs.dumpJSON(self.test_execution_time, \
-                            self.test_execution_time_storage_file, pretty=True)
+            self.test_execution_time.serialize()
 
         # Restore back the exes
         self._restore_env_vars()
@@ -458,25 +492,182 @@ class BaseTestcaseTool(abc.ABC):
         return test_failed_verdicts, test_outlog_hash
     #~ def _runtests()
 
+    def runtests_in_sandbox(self, testcases, exe_path_map, env_vars, \
+                                stop_on_failure=False, \
+                                use_recorded_timeout_times=None, \
+                                with_output_summary=True, hash_outlog=True):
+        '''
+        Execute the list of test cases, sequentially, with the executables
+        of exe_path_map, which are in a directory owned by the caller
+        (sandbox). Unlike `runtests`, there is no checkpointing and the
+        process environment is not changed (env_vars are passed to the
+        test execution). Thus, several calls can run at once (one per
+        worker), each with different executables.
+        The tool must support it (see `can_run_tests_in_sandbox`).
+
+        :returns: pair of dict of testcase and their failed verdict and
+                test execution output log hash data object or None
+                (same as `runtests`)
+        '''
+        ERROR_HANDLER.assert_true(self.can_run_tests_in_sandbox(), \
+                    "The tool {} cannot run tests in sandbox".format(\
+                                    self.get_toolalias()), __file__)
+        for exe in exe_path_map.values():
+            ERROR_HANDLER.assert_true(exe is not None, \
+                        "The executables must be specified when running "
+                                                "in sandbox", __file__)
+
+        timeouts = {}
+        for testcase in testcases:
+            timeout = None
+            if use_recorded_timeout_times is not None:
+                timeout = self.test_execution_time.get_timeout(testcase, \
+                                                use_recorded_timeout_times)
+            if timeout is None:
+                timeout = self.config.ONE_TEST_EXECUTION_TIMEOUT
+            timeouts[testcase] = timeout
+
+        test_failed_verdicts = {}
+        test_outlog_hash = {}
+        results = self._execute_tests_in_sandbox(testcases, exe_path_map, \
+                                    env_vars, timeouts, \
+                                    collect_output=\
+                                        self._get_collect_output_mode(\
+                                            with_output_summary, hash_outlog))
+        try:
+            for testcase, verdict, output_err in results:
+                test_failed, execoutlog_hash = self._oracle_summarize(\
+                                    verdict, output_err, \
+                                    with_output_summary=with_output_summary, \
+                                    hash_outlog=hash_outlog)
+                test_failed_verdicts[testcase] = test_failed
+                test_outlog_hash[testcase] = execoutlog_hash
+                if use_recorded_timeout_times is not None and \
+                            self.test_execution_time.has_test(testcase):
+                    self._account_recorded_timeout(testcase, \
+                                use_recorded_timeout_times, execoutlog_hash)
+                if stop_on_failure and test_failed != \
+                                common_mix.GlobalConstants.PASS_TEST_VERDICT:
+                    break
+        finally:
+            results.close()
+
+        if stop_on_failure:
+            # Make sure the non executed test has the uncertain value (None)
+            for testcase in set(testcases) - set(test_failed_verdicts):
+                test_failed_verdicts[testcase] = \
+                            common_mix.GlobalConstants.UNCERTAIN_TEST_VERDICT
+                test_outlog_hash[testcase] = common_matrices.\
+                                        OutputLogData.UNCERTAIN_TEST_OUTLOGDATA
+
+        if not with_output_summary:
+            test_outlog_hash = None
+
+        return test_failed_verdicts, test_outlog_hash
+    #~ def runtests_in_sandbox()
+
+    def _execute_tests_in_sandbox(self, testcases, exe_path_map, env_vars, \
+                                                timeouts, collect_output=False):
+        """ Execute the tests with `_execute_a_test_in_sandbox`, for
+            `runtests_in_sandbox`. Re-implement this if the tool implements
+            ways to faster execute multiple test cases.
+            :param timeouts: dict of testcase and its timeout
+            :return: generator of tuples (testcase, verdict, output_err)
+        """
+        for testcase in testcases:
+            verdict, output_err = self._execute_a_test_in_sandbox(testcase, \
+                                        exe_path_map, env_vars, \
+                                        timeout=timeouts[testcase], \
+                                        collect_output=collect_output)
+            yield testcase, verdict, output_err
+    #~ def _execute_tests_in_sandbox()
+
     def _oracle_execute_a_test (self, testcase, exe_path_map, env_vars, \
                                         callback_object=None, timeout=None,
-                                with_output_summary=True, hash_outlog=True):
+                                with_output_summary=True, hash_outlog=True, \
+                                sandboxed=False):
         """ Execute a test and use the specified oracles to check
             Also collect the output
 
-            :param hash_outlog: (bool) Choose to hash or not at runtime 
+            :param hash_outlog: (bool) Choose to hash or not at runtime
                                 (flakiness check)
+            :param sandboxed: (bool) Execute with `_execute_a_test_in_sandbox`
         """
 
         if timeout is None:
             timeout = self.config.ONE_TEST_EXECUTION_TIMEOUT
-        
+
+        if sandboxed:
+            execute_a_test_func = self._execute_a_test_in_sandbox
+        else:
+            execute_a_test_func = self._execute_a_test
+
         #logging.debug(str(timeout))
-        verdict, output_err = self._execute_a_test(\
+        verdict, output_err = execute_a_test_func(\
                                             testcase,exe_path_map, env_vars,\
                                             callback_object=callback_object, \
                                             timeout=timeout, \
-                                            collect_output=with_output_summary)
+                                            collect_output=\
+                                        self._get_collect_output_mode(\
+                                            with_output_summary, hash_outlog))
+        return self._oracle_summarize(verdict, output_err, \
+                                    with_output_summary=with_output_summary, \
+                                    hash_outlog=hash_outlog)
+    #~ def _oracle_execute_a_test()
+
+    def _account_recorded_timeout(self, testcase, timeout_times, \
+                            outlog_summary, exec_time=None, timeout=None):
+        """ Account the time saved by the recorded timeout of the test if
+            its execution timed out (according to the output summary, or
+            else to exec_time and timeout)
+        """
+        if outlog_summary is not None:
+            timedout = outlog_summary[common_matrices.OutputLogData.TIMEDOUT]
+            if type(timedout) in (tuple, list):
+                timedout = any(timedout)
+            timedout = (timedout is True)
+        elif exec_time is not None:
+            timedout = (exec_time >= timeout)
+        else:
+            return
+        if timedout:
+            self.test_execution_time.account_timed_out(testcase, \
+                                                                timeout_times)
+    #~ def _account_recorded_timeout()
+
+    def get_timeout_savings(self):
+        """ Pair of the number of timed out test executions with a recorded
+            timeout and the wall time saved on them by the adaptive
+            timeouts (see `TestExecutionTimes`)
+        """
+        return self.test_execution_time.get_timeout_savings()
+    #~ def get_timeout_savings()
+
+    def get_recorded_execution_time(self, testcase):
+        """ Recorded execution time of the test (seconds), or None if the
+            test has no recorded time
+        """
+        if not self.test_execution_time.has_test(testcase):
+            return None
+        return self.test_execution_time.get_recorded_time(testcase)
+    #~ def get_recorded_execution_time()
+
+    def _get_collect_output_mode(self, with_output_summary, hash_outlog):
+        """ Get the collect_output argument of `_execute_a_test`. The
+            output is hashed while the test runs when it is to be hashed
+            and there is no custom output cleaner, that needs it whole.
+        """
+        if with_output_summary and hash_outlog and \
+                            not self.code_builds_factory.repository_manager\
+                                        .has_test_exec_output_cleaner_func():
+            return self.COLLECT_HASHED_OUTPUT
+        return with_output_summary
+    #~ def _get_collect_output_mode()
+
+    def _oracle_summarize(self, verdict, output_err, with_output_summary=True,\
+                                                            hash_outlog=True):
+        """ Get the verdict and the output summary of an executed test
+        """
         if with_output_summary:
             retcode, outlog, timedout = output_err
             # case where the log exeeded the max alowed ytes size
@@ -507,7 +698,7 @@ class BaseTestcaseTool(abc.ABC):
             outlog_summary = None
 
         return verdict, outlog_summary
-    #~ def _oracle_execute_a_test()
+    #~ def _oracle_summarize()
 
     def generate_tests (self, exe_path_map, \
                             meta_criteria_tool_obj=None, \
@@ -609,7 +800,35 @@ class BaseTestcaseTool(abc.ABC):
     def can_run_tests_in_parallel(self):
         return False
     #~ def can_run_tests_in_parallel()
-    
+
+    def can_generate_tests_concurrently(self):
+        """ Whether `generate_tests` can run at the same time as the test
+            generation of other tools (it does not change any process wide
+            state such as the environment or the working directory).
+        """
+        return False
+    #~ def can_generate_tests_concurrently()
+
+    def can_run_tests_in_sandbox(self):
+        """ Whether `runtests_in_sandbox` is supported (the tool implements
+            `_execute_a_test_in_sandbox`).
+        """
+        return False
+    #~ def can_run_tests_in_sandbox()
+
+    def _execute_a_test_in_sandbox (self, testcase, exe_path_map, env_vars, \
+                    callback_object=None, timeout=None, collect_output=None):
+        """ Execute a test using directly the executables of exe_path_map
+            (no `_prepare_executable` is done) and the env_vars, without
+            changing any state shared with other executions.
+            Implement this and `can_run_tests_in_sandbox` to support
+            `runtests_in_sandbox`.
+        """
+        ERROR_HANDLER.error_exit("{} {}".format(\
+                        "_execute_a_test_in_sandbox not implemented for", \
+                                        self.get_toolalias()), __file__)
+    #~ def _execute_a_test_in_sandbox()
+
     def get_test_format_class (self):
         """ Can be useful for test fdupes
         """
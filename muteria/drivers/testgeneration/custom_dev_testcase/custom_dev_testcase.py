@@ -165,14 +165,17 @@ class CustomTestcases(BaseTestcaseTool):
                 env_vars.update(st_env_vars)
 
         def _inner_exec_test(direct_collect_outlog):
-            pre,verdict,post = rep_mgr.run_dev_test(\
+            # Lease a checkout of the repo (each lease has its own lock)
+            with rep_mgr.lease_repository_slot() as repo_slot:
+                pre,verdict,post = rep_mgr.run_dev_test(\
                                 dev_test_name=runner_testcase,\
                                 exe_path_map=exe_path_map, \
                                 env_vars=env_vars, \
                                 timeout=timeout,\
                                 collected_output=(collected_output \
                                         if direct_collect_outlog else None),\
-                                callback_object=callback_object)
+                                callback_object=callback_object, \
+                                repo_slot=repo_slot)
             ERROR_HANDLER.assert_true(\
                             pre == common_mix.GlobalConstants.COMMAND_SUCCESS,\
                                             "before command failed", __file__)
@@ -207,12 +210,54 @@ class CustomTestcases(BaseTestcaseTool):
             if collect_output:
                 self.wrapper_obj.collect_output(exe_path_map, \
                                   collected_output, testcase, \
-                                  self.config.OUTLOG_MAX_ALLOWED_BYTES_SIZE)
+                                  self.config.OUTLOG_MAX_ALLOWED_BYTES_SIZE, \
+                                  hash_outlog=(collect_output == \
+                                                self.COLLECT_HASHED_OUTPUT))
             self.wrapper_obj.cleanup_logs(exe_path_map)
 
         return verdict, collected_output
     #~ def _execute_a_test()
 
+    def _execute_a_test_in_sandbox (self, testcase, exe_path_map, env_vars, \
+                                callback_object=None, timeout=None, \
+                                                    collect_output=None):
+        """ Execute a test in a leased checkout of the repo, where the 
+            executables of exe_path_map are first copied
+        """
+        if timeout is None:
+            timeout = self.config.ONE_TEST_EXECUTION_TIMEOUT
+
+        rep_mgr = self.code_builds_factory.repository_manager
+
+        collected_output = [] if collect_output else None
+
+        with rep_mgr.lease_repository_slot() as repo_slot:
+            rep_mgr.copy_into_repository_slot(repo_slot, exe_path_map)
+            pre,verdict,post = rep_mgr.run_dev_test(\
+                                dev_test_name=testcase,\
+                                exe_path_map=exe_path_map, \
+                                env_vars=env_vars, \
+                                timeout=timeout,\
+                                collected_output=collected_output,\
+                                callback_object=callback_object, \
+                                repo_slot=repo_slot)
+        ERROR_HANDLER.assert_true(\
+                            pre == common_mix.GlobalConstants.COMMAND_SUCCESS,\
+                                            "before command failed", __file__)
+        ERROR_HANDLER.assert_true(\
+                        post != common_mix.GlobalConstants.COMMAND_FAILURE,\
+                                            "after command failed", __file__)
+
+        # abort is test execution error
+        if verdict == common_mix.GlobalConstants.TEST_EXECUTION_ERROR:
+            ERROR_HANDLER.assert_true(\
+                                self.config.TEST_EXECUTION_ERROR_AS_FAIL, \
+                                "Test Execution error in custom_dev_testcase" \
+                                    + " for test: "+testcase, __file__)
+
+        return verdict, collected_output
+    #~ def _execute_a_test_in_sandbox()
+
     def _do_generate_tests (self, exe_path_map, code_builds_factory, \
                                                 meta_criteria_tool_obj=None, \
                                                                 max_time=None):
@@ -252,4 +297,21 @@ class CustomTestcases(BaseTestcaseTool):
         common_fs.dumpJSON(dtl, self.test_list_storage_file)
         #ERROR_HANDLER.assert_true(os.path.isfile(self.test_list_storage_file))
     #~ def _do_generate_tests()
+
+    def can_run_tests_in_parallel(self):
+        """ The tests run in parallel in different checkouts of the repo.
+            The wrapper is installed in the repository itself, thus no
+            parallelism when it is used.
+        """
+        return self.wrapper_obj is None and \
+                    self.code_builds_factory.repository_manager\
+                                                    .get_parallelism() > 1
+    #~ def can_run_tests_in_parallel()
+
+    def can_run_tests_in_sandbox(self):
+        """ Each test runs in a leased checkout of the repo where the
+            executables are copied.
+        """
+        return self.can_run_tests_in_parallel()
+    #~ def can_run_tests_in_sandbox()
 #~ class CustomTestcases
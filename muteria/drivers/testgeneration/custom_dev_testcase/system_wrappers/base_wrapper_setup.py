@@ -9,11 +9,16 @@ import abc
 
 import muteria.common.mix as common_mix
 
+from muteria.drivers import StreamingOutlogHasher
+
 import muteria.drivers.testgeneration.custom_dev_testcase.system_wrappers as \
                                                                 system_wrappers
 
 ERROR_HANDLER = common_mix.ErrorHandler
 
+# Number of characters read at once when hashing the output log
+OUTLOG_READ_CHUNK_SIZE = 1024 * 1024
+
 class BaseSystemTestSplittingWrapper(abc.ABC):
     def get_sub_test_id_env_vars(self, subtest_id):
         return {system_wrappers.TEST_COUNT_ID_ENV_VAR: str(subtest_id)}    
@@ -117,7 +122,11 @@ class BaseSystemWrapper(abc.ABC):
     #~ def cleanup(repo_exe_abs_path):
 
     def collect_output(self, exe_path_map, collected_output, testcase, \
-                                                   max_allowed_outlog_bytes):
+                            max_allowed_outlog_bytes, hash_outlog=False):
+        """ Append the return code, the output log and the timeout flag to
+            collected_output. When hash_outlog is True, the output log is
+            the tuple (length, hash), computed reading the log by chunks.
+        """
         repo_exe_abs_path, _ = self._get_repo_run_path_pairs(exe_path_map)[0]
         o_logfile = repo_exe_abs_path + self.outlog_ext
         o_retcodefile = repo_exe_abs_path + self.outretcode_ext
@@ -142,6 +151,8 @@ class BaseSystemWrapper(abc.ABC):
         # Outlog
         if os.path.getsize(o_logfile) > max_allowed_outlog_bytes:
             collected_output.append((os.path.getsize(o_logfile), None))
+        elif hash_outlog:
+            collected_output.append(self._get_outlog_len_and_hash(o_logfile))
         else:
             try:
                 with open(o_logfile) as f:
@@ -163,6 +174,26 @@ class BaseSystemWrapper(abc.ABC):
         collected_output.append(timedout) 
     #~ def collect_output()
 
+    @staticmethod
+    def _get_outlog_len_and_hash(o_logfile):
+        """ Same decoding as collect_output, with the fallback encoding
+            on decoding error
+        """
+        for encoding in (None, 'ISO-8859-1'):
+            outlog_hasher = StreamingOutlogHasher()
+            try:
+                with open(o_logfile, encoding=encoding) as f:
+                    while True:
+                        chunk = f.read(OUTLOG_READ_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        outlog_hasher.update(chunk)
+                return outlog_hasher.get_len_and_hash()
+            except UnicodeDecodeError:
+                if encoding is not None:
+                    raise
+    #~ def _get_outlog_len_and_hash()
+
     def install_wrapper(self, exe_path_map, collect_output):
         repo_exe_abs_path, run_exe_abs_path = \
                                 self._get_repo_run_path_pairs(exe_path_map)[0]
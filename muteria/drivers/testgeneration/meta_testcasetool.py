@@ -29,6 +29,7 @@ import muteria.common.mix as common_mix
 
 from muteria.drivers import ToolsModulesLoader
 from muteria.drivers import DriversUtils
+from muteria.repositoryandcode.code_builds_factory import CodeBuildsFactory
 
 from muteria.drivers.checkpoint_handler import CheckPointHandler
 
@@ -461,13 +462,8 @@ class MetaTestcaseTool(object):
         # For fdupes
         if len(self.tests_duplicates_map) > 0:
             meta_testcases_backup = meta_testcases
-            meta_testcases = set(meta_testcases)
-            dups_remove_meta_testcases = meta_testcases & \
-                                                set(self.tests_duplicates_map)
-            dup_toadd_test = {self.tests_duplicates_map[v] for v in \
-                                dups_remove_meta_testcases} - meta_testcases
-            meta_testcases = (meta_testcases - dups_remove_meta_testcases) \
-                                                            | dup_toadd_test
+            meta_testcases, dups_remove_meta_testcases, dup_toadd_test = \
+                                    self._fdupes_reduce_tests(meta_testcases)
 
         testcases_by_tool = {}
         for meta_testcase in meta_testcases:
@@ -662,15 +658,8 @@ class MetaTestcaseTool(object):
         # For fdupes
         if len(self.tests_duplicates_map) > 0:
             meta_testcases = meta_testcases_backup
-            for i in (0,1):
-                for mtest in dups_remove_meta_testcases:
-                    # add to results
-                    meta_test_failedverdicts_outlog[i][mtest] = copy.deepcopy(\
-                                        meta_test_failedverdicts_outlog[i]\
-                                            [self.tests_duplicates_map[mtest]])
-                for mtest in dup_toadd_test:
-                    # remove from results
-                    del meta_test_failedverdicts_outlog[i][mtest]
+            self._fdupes_expand_results(meta_test_failedverdicts_outlog, \
+                                dups_remove_meta_testcases, dup_toadd_test)
 
         if fault_test_execution_matrix_file is not None:
             # Load or Create the matrix 
@@ -726,6 +715,148 @@ class MetaTestcaseTool(object):
         return meta_test_failedverdicts_outlog
     #~ def runtests()
 
+    def _fdupes_reduce_tests(self, meta_testcases):
+        """ Replace the duplicate tests by the kept duplicate
+            :return: triple of the list of tests to execute (in the order
+                    of meta_testcases), the set of removed duplicate tests
+                    and the set of added kept tests
+        """
+        meta_testcases_set = set(meta_testcases)
+        dups_remove_meta_testcases = meta_testcases_set & \
+                                                set(self.tests_duplicates_map)
+        dup_toadd_test = {self.tests_duplicates_map[v] for v in \
+                            dups_remove_meta_testcases} - meta_testcases_set
+        # Keep the order of the tests (the kept test takes the place of the
+        # first of its duplicates)
+        reduced = []
+        seen = set()
+        for meta_testcase in meta_testcases:
+            meta_testcase = self.tests_duplicates_map.get(meta_testcase, \
+                                                                meta_testcase)
+            if meta_testcase not in seen:
+                seen.add(meta_testcase)
+                reduced.append(meta_testcase)
+        return reduced, dups_remove_meta_testcases, dup_toadd_test
+    #~ def _fdupes_reduce_tests()
+
+    def _fdupes_expand_results(self, meta_test_failedverdicts_outlog, \
+                                dups_remove_meta_testcases, dup_toadd_test):
+        """ Revert `_fdupes_reduce_tests` on the pair of verdicts and 
+            outlogs
+        """
+        for i in (0,1):
+            if meta_test_failedverdicts_outlog[i] is None:
+                continue
+            for mtest in dups_remove_meta_testcases:
+                # add to results
+                meta_test_failedverdicts_outlog[i][mtest] = copy.deepcopy(\
+                                        meta_test_failedverdicts_outlog[i]\
+                                            [self.tests_duplicates_map[mtest]])
+            for mtest in dup_toadd_test:
+                # remove from results
+                del meta_test_failedverdicts_outlog[i][mtest]
+    #~ def _fdupes_expand_results()
+
+    def can_run_tests_in_sandbox(self, meta_testcases=None):
+        """ Check whether `runtests_in_sandbox` is supported by the tools
+            of the tests meta_testcases (all the tools if None)
+        """
+        if meta_testcases is None:
+            ttoolaliases = set(self.testcases_configured_tools)
+        else:
+            ttoolaliases = {DriversUtils.reverse_meta_element(mt)[0] \
+                                                    for mt in meta_testcases}
+        for ttoolalias in ttoolaliases:
+            ttool = \
+                self.testcases_configured_tools[ttoolalias][self.TOOL_OBJ_KEY]
+            if not ttool.can_run_tests_in_sandbox():
+                return False
+        return True
+    #~ def can_run_tests_in_sandbox()
+
+    def runtests_in_sandbox(self, meta_testcases, exe_path_map, env_vars, \
+                                stop_on_failure=False, \
+                                use_recorded_timeout_times=None, \
+                                with_output_summary=True, \
+                                hash_outlog=None):
+        '''
+        Same as `runtests` but the executables of exe_path_map are in a 
+        directory owned by the caller and there is no checkpointing,
+        nor change of the process environment. Used to run the tests
+        on different executables at once (one call per worker).
+        Check support with `can_run_tests_in_sandbox`.
+
+        :returns: pair of dict of testcase and their failed verdict and
+                  dict of test execution output log hash data or None
+        '''
+        ERROR_HANDLER.assert_true(len(meta_testcases) == \
+                                                len(set(meta_testcases)), \
+                                        "not all tests are unique", __file__)
+
+        if hash_outlog is None:
+            hash_outlog = self.hash_outlog
+
+        # For fdupes
+        meta_testcases_backup = meta_testcases
+        if len(self.tests_duplicates_map) > 0:
+            meta_testcases, dups_remove_meta_testcases, dup_toadd_test = \
+                                    self._fdupes_reduce_tests(meta_testcases)
+
+        testcases_by_tool = {}
+        for meta_testcase in meta_testcases:
+            ttoolalias, testcase = \
+                            DriversUtils.reverse_meta_element(meta_testcase)
+            if ttoolalias not in testcases_by_tool:
+                testcases_by_tool[ttoolalias] = []
+            testcases_by_tool[ttoolalias].append(testcase)
+
+        meta_test_failedverdicts_outlog = [{}, {}]
+        found_a_failure = False
+        for ttoolalias, testcases in testcases_by_tool.items():
+            ttool = \
+                self.testcases_configured_tools[ttoolalias][self.TOOL_OBJ_KEY]
+            if found_a_failure:
+                test_failed_verdicts = {tc: common_mix.GlobalConstants.\
+                                    UNCERTAIN_TEST_VERDICT for tc in testcases}
+                test_execoutput = {tc: common_matrices.OutputLogData.\
+                                UNCERTAIN_TEST_OUTLOGDATA for tc in testcases}
+            else:
+                test_failed_verdicts, test_execoutput = \
+                            ttool.runtests_in_sandbox(testcases, \
+                                    exe_path_map, env_vars, \
+                                    stop_on_failure=stop_on_failure, \
+                                    use_recorded_timeout_times=\
+                                                use_recorded_timeout_times, \
+                                    with_output_summary=with_output_summary, \
+                                    hash_outlog=hash_outlog)
+            for testcase in test_failed_verdicts:
+                meta_testcase = DriversUtils.make_meta_element(testcase, \
+                                                                    ttoolalias)
+                meta_test_failedverdicts_outlog[0][meta_testcase] = \
+                                                test_failed_verdicts[testcase]
+                if with_output_summary:
+                    meta_test_failedverdicts_outlog[1][meta_testcase] = \
+                                                    test_execoutput[testcase]
+                if stop_on_failure and test_failed_verdicts[testcase] == \
+                                common_mix.GlobalConstants.FAIL_TEST_VERDICT:
+                    found_a_failure = True
+
+        if not with_output_summary:
+            meta_test_failedverdicts_outlog[1] = None
+
+        # For fdupes
+        if len(self.tests_duplicates_map) > 0:
+            meta_testcases = meta_testcases_backup
+            self._fdupes_expand_results(meta_test_failedverdicts_outlog, \
+                                dups_remove_meta_testcases, dup_toadd_test)
+
+        ERROR_HANDLER.assert_true(len(meta_test_failedverdicts_outlog[0]) == \
+                                                        len(meta_testcases), \
+                    "mismatch between number of tests and reported verdicts",\
+                                                                     __file__)
+        return meta_test_failedverdicts_outlog
+    #~ def runtests_in_sandbox()
+
     def get_candidate_tools_aliases(self, test_tool_type_list):
         candidate_tools_aliases = []
         for test_tool_type in test_tool_type_list:
@@ -767,8 +898,11 @@ class MetaTestcaseTool(object):
         :type \test_generation_guidance_obj:
         :param \test_generation_guidance_obj:
     
-        :type \parallel_testgen_count:
-        :param \parallel_testgen_count:
+        :type \parallel_testgen_count: int
+        :param \parallel_testgen_count: Maximum number of tools generating
+                        tests at the same time. Only the tools that
+                        `can_generate_tests_concurrently` are run concurrently
+                        and each gets its own code builds factory.
 
         :type restart_checkointer: bool
         :param restart_checkointer: Decide whether to discard checkpoint
@@ -787,8 +921,6 @@ class MetaTestcaseTool(object):
         # bellow:
         ERROR_HANDLER.assert_true(test_generation_guidance_obj is None, \
                 "FIXME: Must first implement support for test gen guidance")
-        ERROR_HANDLER.assert_true(parallel_testgen_count <= 1, \
-                "FIXME: Must first implement support for parallel test gen")
         #~ FXIMEnd
 
         # Check arguments Validity
@@ -822,6 +954,8 @@ class MetaTestcaseTool(object):
             return
 
         # Generate
+        cand_alias_joblib = []
+        cand_alias_for = []
         for ttoolalias in candidate_tools_aliases:
             ttool = self.testcases_configured_tools[ttoolalias]\
                                                             [self.TOOL_OBJ_KEY]
@@ -837,16 +971,56 @@ class MetaTestcaseTool(object):
             if checkpoint_handler.is_to_execute(func_name=cp_func_name, \
                                                 taskid=cp_task_id, \
                                                 tool=ttoolalias):
+                if ttool.can_generate_tests_concurrently():
+                    cand_alias_joblib.append(ttoolalias)
+                else:
+                    cand_alias_for.append(ttoolalias)
 
-                # Actual Execution
-                ttool.generate_tests(exe_path_map, \
+        if parallel_testgen_count <= 1 or len(cand_alias_joblib) <= 1:
+            cand_alias_for = cand_alias_joblib + cand_alias_for
+            cand_alias_joblib = []
+
+        shared_loc = multiprocessing.RLock()
+        cb_factories_dir = os.path.join(self.tests_working_dir, \
+                                                    "_testgen_cb_factories_")
+
+        def tool_test_generation(ttoolalias, concurrent):
+            ttool = self.testcases_configured_tools[ttoolalias]\
+                                                            [self.TOOL_OBJ_KEY]
+            code_builds_factory = None
+            if concurrent:
+                # Own build copy, the conversions of the tools are tracked
+                # separately (the repository is protected by its lock)
+                code_builds_factory = CodeBuildsFactory(\
+                                self.code_builds_factory.repository_manager, \
+                                workdir=os.path.join(cb_factories_dir, \
+                                                                ttoolalias))
+
+            # Actual Execution
+            ttool.generate_tests(exe_path_map, \
                             meta_criteria_tool_obj=meta_criteria_tool_obj, \
+                            code_builds_factory_override=code_builds_factory, \
                             max_time=max_time)
 
-                # @Checkpoint: Checkpointing
+            # @Checkpoint: Checkpointing
+            with shared_loc:
                 checkpoint_handler.do_checkpoint(func_name=cp_func_name, \
                                                 taskid=cp_task_id, \
                                                 tool=ttoolalias)
+        #~ def tool_test_generation()
+
+        if len(cand_alias_joblib) > 0:
+            if os.path.isdir(cb_factories_dir):
+                shutil.rmtree(cb_factories_dir)
+            os.mkdir(cb_factories_dir)
+            parallel_count_ = min(len(cand_alias_joblib), \
+                                                        parallel_testgen_count)
+            joblib.Parallel(n_jobs=parallel_count_, require='sharedmem')\
+                    (joblib.delayed(tool_test_generation)(ttoolalias, True) \
+                        for ttoolalias in cand_alias_joblib)
+            shutil.rmtree(cb_factories_dir)
+        for ttoolalias in cand_alias_for:
+            tool_test_generation(ttoolalias, False)
 
         # Invalidate any existing testcase info so it can be recomputed
         self._invalidate_testcase_info()
@@ -945,6 +1119,32 @@ class MetaTestcaseTool(object):
         return res
     #~ def get_test_tools_by_name()
 
+    def get_timeout_savings(self):
+        """ Pair of the number of timed out test executions with a recorded
+            timeout and the wall time saved on them, over all tools
+        """
+        n_timeouts, saved_time = 0, 0.0
+        for data in self.testcases_configured_tools.values():
+            tool_n_timeouts, tool_saved_time = \
+                                data[self.TOOL_OBJ_KEY].get_timeout_savings()
+            n_timeouts += tool_n_timeouts
+            saved_time += tool_saved_time
+        return n_timeouts, saved_time
+    #~ def get_timeout_savings()
+
+    def get_test_recorded_times(self, meta_testcases):
+        """ Get the recorded execution time (seconds) of each meta test
+            :return: dict meta test -> time, or None if not recorded
+        """
+        res = {}
+        for meta_testcase in meta_testcases:
+            ttoolalias, testcase = \
+                            DriversUtils.reverse_meta_element(meta_testcase)
+            res[meta_testcase] = self.testcases_configured_tools[ttoolalias]\
+                    [self.TOOL_OBJ_KEY].get_recorded_execution_time(testcase)
+        return res
+    #~ def get_test_recorded_times()
+
     def get_checkpoint_state_object(self):
         return self.checkpointer
     #~ def get_checkpoint_state_object()
@@ -0,0 +1,115 @@
+
+from __future__ import print_function
+
+import os
+import threading
+
+import numpy as np
+
+import muteria.common.fs as common_fs
+import muteria.common.mix as common_mix
+
+ERROR_HANDLER = common_mix.ErrorHandler
+
+class TestExecutionTimes(object):
+    """ Recorded execution times of the tests (the latest samples of each
+        test, in seconds) and the timeouts derived from them:
+            percentile of the samples * timeout_factor * timeout_times
+                                                            + timeout_margin
+        Also accounts the time saved on the timed out executions, compared
+        to the former timeouts (integer seconds of the latest sample times
+        timeout_factor * timeout_times).
+    """
+    # Precision of the stored samples (decimals of seconds)
+    SAMPLE_DECIMALS = 3
+
+    def __init__(self, filename, max_samples, percentile, timeout_factor, \
+                                                            timeout_margin):
+        ERROR_HANDLER.assert_true(max_samples >= 1, \
+                                "max_samples must be positive", __file__)
+        ERROR_HANDLER.assert_true(0 <= percentile <= 100, \
+                                "percentile must be in [0, 100]", __file__)
+        self.filename = filename
+        self.max_samples = max_samples
+        self.percentile = percentile
+        self.timeout_factor = timeout_factor
+        self.timeout_margin = timeout_margin
+        self.lock = threading.RLock()
+        # test -> list of samples (oldest first)
+        self.samples = {}
+        self.n_saving_timeouts = 0
+        self.saved_time = 0.0
+        if self.filename is not None and os.path.isfile(self.filename):
+            self.samples = common_fs.loadJSON(self.filename)
+    #~ def __init__()
+
+    def load_legacy(self, legacy_file):
+        """ Load the recorded times of the former format (a single time,
+            multiplied by timeout_factor, per test)
+        """
+        legacy = common_fs.loadJSON(legacy_file)
+        with self.lock:
+            for test, exec_time in legacy.items():
+                if test not in self.samples:
+                    self.samples[test] = \
+                                    [float(exec_time) / self.timeout_factor]
+    #~ def load_legacy()
+
+    def serialize(self):
+        with self.lock:
+            common_fs.dumpJSON(self.samples, self.filename)
+    #~ def serialize()
+
+    def has_test(self, test):
+        return test in self.samples
+    #~ def has_test()
+
+    def get_tests(self):
+        return list(self.samples)
+    #~ def get_tests()
+
+    def add_sample(self, test, exec_time):
+        with self.lock:
+            samples = self.samples.setdefault(test, [])
+            samples.append(round(exec_time, self.SAMPLE_DECIMALS))
+            if len(samples) > self.max_samples:
+                del samples[:len(samples) - self.max_samples]
+    #~ def add_sample()
+
+    def get_recorded_time(self, test):
+        return float(np.percentile(self.samples[test], self.percentile))
+    #~ def get_recorded_time()
+
+    def get_timeout(self, test, timeout_times):
+        """ Timeout of the test, or None if the test has no recorded time
+        """
+        if test not in self.samples:
+            return None
+        return self.get_recorded_time(test) * self.timeout_factor * \
+                                        timeout_times + self.timeout_margin
+    #~ def get_timeout()
+
+    def _get_former_timeout(self, test, timeout_times):
+        return max(1, int(self.samples[test][-1])) * self.timeout_factor * \
+                                                                timeout_times
+    #~ def _get_former_timeout()
+
+    def account_timed_out(self, test, timeout_times):
+        """ Account a timed out execution of test, that used the timeout
+            get_timeout(test, timeout_times)
+        """
+        saved = self._get_former_timeout(test, timeout_times) - \
+                                        self.get_timeout(test, timeout_times)
+        with self.lock:
+            self.n_saving_timeouts += 1
+            self.saved_time += saved
+    #~ def account_timed_out()
+
+    def get_timeout_savings(self):
+        """ Pair of the number of timed out executions accounted and the
+            wall time (seconds) saved on them. Negative when the former
+            timeouts were shorter
+        """
+        return self.n_saving_timeouts, self.saved_time
+    #~ def get_timeout_savings()
+#~ class TestExecutionTimes
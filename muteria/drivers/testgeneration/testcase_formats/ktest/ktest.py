@@ -6,15 +6,48 @@ import re
 import shutil
 import imp
 import logging
-import filecmp
+import hashlib
+import multiprocessing
+import threading
+import tempfile
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
 from distutils.spawn import find_executable
 
+import muteria.common.fs as common_fs
 import muteria.common.mix as common_mix
 
-from muteria.drivers import DriversUtils
+import joblib
+
+from muteria.drivers import DriversUtils, StreamingOutlogHasher
 
 ERROR_HANDLER = common_mix.ErrorHandler
 
+def _get_ktests_data_digests(ktest_tool_file, ktest_files):
+    """ Compute the digest of the args (without the program) and objects of
+        each ktest file. The digest is None for the invalid ktest files.
+        (Module level function to be usable by joblib worker processes)
+    """
+    ktest_tool = imp.load_source("ktest-tool", ktest_tool_file)
+    digests = []
+    for kf in ktest_files:
+        try:
+            b = ktest_tool.KTest.fromfile(kf)
+        except:
+            digests.append(None)
+            continue
+        if len(b.objects) == 0:
+            digests.append(None)
+        else:
+            digests.append(hashlib.sha256(repr((b.args[1:], b.objects))\
+                            .encode('utf-8', 'backslashreplace')).hexdigest())
+    return digests
+#~ def _get_ktests_data_digests()
+
 class KTestTestFormat(object):
     
     @classmethod
@@ -70,40 +103,202 @@ class KTestTestFormat(object):
     def execute_test(cls, executable_file, test_file, env_vars, stdin=None, \
                                         must_exist_dir_list=None, \
                                         timeout=None, collected_output=None, \
-                                        custom_replay_tool_binary_dir=None):
+                                        custom_replay_tool_binary_dir=None, \
+                                        capabilities_cache_file=None, \
+                                        work_dir=None, \
+                                        hash_collected_output=False):
+        """ Replay the ktest test_file with executable_file.
+            capabilities_cache_file, when specified, is the file where the
+            replay tool capabilities are persisted (see
+            `_replay_tool_has_keep_replay_dir`)
+            work_dir, when specified, is a scratch directory owned by the
+            caller, emptied and reused. Otherwise, a private directory is
+            created next to the test file (the same test file can be
+            replayed concurrently by several workers).
+            hash_collected_output, when True, makes the collected output
+            log the tuple (length, hash) computed while the output is
+            produced (see `StreamingOutlogHasher`), without
+            keeping the whole output in memory.
+        """
 
         prog, args = cls._get_replay_prog_args(executable_file, test_file, \
                                                 custom_replay_tool_binary_dir)
 
         # klee-replay may create files or dir. in KLEE version with LLVM-3.4,
         # those are created in a temporary dir set as <cwd>.temps
-        # XXX XXX. make sure each test has its own
-        test_work_dir = test_file+".execdir"
-        klee_replay_temps = test_work_dir + '.temps'
-        for d in (test_work_dir, klee_replay_temps):
-            if os.path.isdir(d):
-                try:
-                    shutil.rmtree(d)
-                except PermissionError:
-                    cls._dir_chmod777(d)
-                    shutil.rmtree(d)
+        # XXX XXX. make sure each replay has its own
+        if work_dir is None:
+            test_work_dir = tempfile.mkdtemp(\
+                            prefix=os.path.basename(test_file)+".execdir.", \
+                            dir=os.path.dirname(os.path.abspath(test_file)))
+        else:
+            test_work_dir = work_dir
+        cls._setup_replay_work_dir(test_work_dir, must_exist_dir_list, \
+                                                                reuse=True)
+
+        # XXX Execution setup
+        tmp_env = os.environ.copy()
+        if env_vars is not None:
+            #for e, v in env_vars.items():
+            #    tmp_env[e] = v
+            tmp_env.update(env_vars)
+
+        try:
+            verdict = cls._replay_in_work_dir(prog, args, test_work_dir, \
+                                        tmp_env, stdin, timeout, \
+                                        collected_output, \
+                                        capabilities_cache_file, \
+                                        hash_collected_output)
+        finally:
+            cls._clean_replay_work_dir(test_work_dir, \
+                                                remove=(work_dir is None))
                 
+        #if must_exist_dir_list is not None:
+        #    try:
+        #        shutil.rmtree(test_work_dir)
+        #    except PermissionError:
+        #        cls._dir_chmod777(test_work_dir)
+        #        shutil.rmtree(test_work_dir)
+
+        return verdict
+    #~ def execute_test()
+
+    @classmethod
+    def execute_tests_batch(cls, jobs, env_vars, scratch_dirs, \
+                                        collect_output=False, \
+                                        custom_replay_tool_binary_dir=None, \
+                                        capabilities_cache_file=None, \
+                                        hash_collected_output=False):
+        """ Replay a batch of ktests with a pool of long lived workers, one
+            per scratch directory of scratch_dirs. The scratch directories
+            are owned by the caller and reused by the worker for all its
+            replays. The environment is set up once per worker.
+
+            :param jobs: iterable of tuples (job_id, executable_file,
+                    test_file, stdin_file, must_exist_dir_list, timeout),
+                    where stdin_file and must_exist_dir_list can be None
+            :return: generator of tuples (job_id, verdict, collected_output)
+                    in the order the replays finish. collected_output is
+                    None when collect_output is False. Closing the generator
+                    stops the workers after their current replay.
+                    See `execute_test` for hash_collected_output.
+        """
+        ERROR_HANDLER.assert_true(len(scratch_dirs) > 0, \
+                                    "scratch_dirs must not be empty", __file__)
+        jobs_iter = iter(jobs)
+        jobs_lock = threading.Lock()
+        results = queue.Queue()
+        stop_event = threading.Event()
+
+        def worker(scratch_dir):
+            try:
+                tmp_env = os.environ.copy()
+                if env_vars is not None:
+                    tmp_env.update(env_vars)
+                while not stop_event.is_set():
+                    with jobs_lock:
+                        job = next(jobs_iter, None)
+                    if job is None:
+                        break
+                    job_id, exe_file, test_file, stdin_file, \
+                                            must_exist_dir_list, timeout = job
+                    prog, args = cls._get_replay_prog_args(exe_file, \
+                                test_file, custom_replay_tool_binary_dir)
+                    cls._setup_replay_work_dir(scratch_dir, \
+                                            must_exist_dir_list, reuse=True)
+                    collected_output = [] if collect_output else None
+                    stdin = None
+                    if stdin_file is not None:
+                        stdin = open(stdin_file)
+                    try:
+                        verdict = cls._replay_in_work_dir(prog, args, \
+                                    scratch_dir, tmp_env, stdin, timeout, \
+                                    collected_output, capabilities_cache_file, \
+                                    hash_collected_output)
+                    finally:
+                        if stdin is not None:
+                            stdin.close()
+                    cls._clean_replay_work_dir(scratch_dir, remove=False)
+                    results.put((True, (job_id, verdict, collected_output)))
+            except BaseException as e:
+                stop_event.set()
+                results.put((False, e))
+            results.put(None)
+        #~ def worker()
+
+        workers = [threading.Thread(target=worker, args=(sd,)) \
+                                                    for sd in scratch_dirs]
+        for w in workers:
+            w.start()
+        try:
+            n_running = len(workers)
+            while n_running > 0:
+                res = results.get()
+                if res is None:
+                    n_running -= 1
+                elif res[0]:
+                    yield res[1]
+                else:
+                    raise res[1]
+        finally:
+            stop_event.set()
+            for w in workers:
+                w.join()
+    #~ def execute_tests_batch()
+
+    @classmethod
+    def _setup_replay_work_dir(cls, test_work_dir, must_exist_dir_list, \
+                                                                reuse=False):
+        """ Create the replay work dir, or empty it if reuse is True
+        """
+        cls._clean_replay_work_dir(test_work_dir, remove=not reuse)
         if not os.path.isdir(test_work_dir):
             os.mkdir(test_work_dir)
-            
         if must_exist_dir_list is not None:
             for d in must_exist_dir_list:
                 td = os.path.join(test_work_dir, d)
                 if not os.path.isdir(td):
                     os.makedirs(td)
+    #~ def _setup_replay_work_dir()
 
-        # XXX Execution setup
-        tmp_env = os.environ.copy()
-        if env_vars is not None:
-            #for e, v in env_vars.items():
-            #    tmp_env[e] = v
-            tmp_env.update(env_vars)
+    @classmethod
+    def _clean_replay_work_dir(cls, test_work_dir, remove=True):
+        """ Remove the replay work dir and its '.temps' dir. When remove is
+            False, the work dir is only emptied (reused)
+        """
+        def rm(path, retry=True):
+            is_dir = os.path.isdir(path) and not os.path.islink(path)
+            try:
+                if is_dir:
+                    shutil.rmtree(path)
+                else:
+                    os.remove(path)
+            except PermissionError:
+                if not retry:
+                    raise
+                cls._dir_chmod777(path if is_dir else test_work_dir)
+                rm(path, retry=False)
+        #~ def rm()
+
+        klee_replay_temps = test_work_dir + '.temps'
+        if os.path.isdir(klee_replay_temps):
+            rm(klee_replay_temps)
+        if os.path.isdir(test_work_dir):
+            if remove:
+                rm(test_work_dir)
+            else:
+                for f in os.listdir(test_work_dir):
+                    rm(os.path.join(test_work_dir, f))
+    #~ def _clean_replay_work_dir()
 
+    @classmethod
+    def _replay_in_work_dir(cls, prog, args, test_work_dir, tmp_env, stdin, \
+                                timeout, collected_output, \
+                                capabilities_cache_file, \
+                                hash_collected_output=False):
+        """ Replay in the prepared test_work_dir, with the environment
+            tmp_env (owned by the caller, the timeout variable is set in it)
+        """
         timeout_return_codes = cls.timedout_retcodes + \
                                         DriversUtils.EXEC_TIMED_OUT_RET_CODE
 
@@ -112,14 +307,14 @@ class KTestTestFormat(object):
             kt_over = 10 # 1second
             timeout += kt_over
         else:
+            tmp_env.pop('KLEE_REPLAY_TIMEOUT', None)
             # DBG
             logging.warning("@KTEST: calling ktest execution without timeout.")
 
         # XXX Get the parsing regexes to use
-        retcode, out, err = DriversUtils.execute_and_get_retcode_out_err(\
-                                prog=prog, args_list=['--help'], \
-                                merge_err_to_out=True)
-        clean_regex, status_regex = cls._get_regexes(out, \
+        clean_regex, status_regex = cls._get_regexes(\
+                                cls._replay_tool_has_keep_replay_dir(prog, \
+                                                    capabilities_cache_file), \
                                                         clean_everything=True)
         
         # XXX Execute the ktest
@@ -135,13 +330,28 @@ class KTestTestFormat(object):
             prog = "stdbuf"
             # TODO: check that stdbuf is installed
             
-        retcode, out, err = DriversUtils.execute_and_get_retcode_out_err(\
+        if hash_collected_output and collected_output is not None:
+            # Clean and hash the output as it is produced
+            outlog_hasher = StreamingOutlogHasher()
+            noise_remover = cls.OutputNoiseRemover(clean_regex, \
+                                        status_regex, outlog_hasher.update)
+            retcode, _, err = DriversUtils.execute_and_get_retcode_out_err(\
+                                prog=prog, args_list=args, env=tmp_env, \
+                                stdin=stdin, \
+                                timeout=timeout, timeout_grace_period=5, \
+                                merge_err_to_out=True, cwd=test_work_dir, \
+                                out_consumer=noise_remover.feed)
+            retcode, exit_status = noise_remover.finish(retcode)
+            out = outlog_hasher.get_len_and_hash()
+        else:
+            retcode, out, err = \
+                            DriversUtils.execute_and_get_retcode_out_err(\
                                 prog=prog, args_list=args, env=tmp_env, \
                                 stdin=stdin, \
                                 timeout=timeout, timeout_grace_period=5, \
                                 merge_err_to_out=True, cwd=test_work_dir)
-        retcode, out, exit_status = cls._remove_output_noise(retcode, out, \
-                                                  clean_regex, status_regex)
+            retcode, out, exit_status = cls._remove_output_noise(retcode, \
+                                            out, clean_regex, status_regex)
         # In klee-replay, when exit_status here is not None, retcode is 0
         # When there is an issue, like timeout, exit_status is None and
         # retcode has the ode of the issue 
@@ -158,22 +368,6 @@ class KTestTestFormat(object):
         #                                        out_on=False, err_on=False, \
         #                                        cwd=test_work_dir)
 
-        # XXX: Go back to previous CWD
-        for d in (test_work_dir, klee_replay_temps):
-            if os.path.isdir(d):
-                try:
-                    shutil.rmtree(d)
-                except PermissionError:
-                    cls._dir_chmod777(d)
-                    shutil.rmtree(d)
-                
-        #if must_exist_dir_list is not None:
-        #    try:
-        #        shutil.rmtree(test_work_dir)
-        #    except PermissionError:
-        #        cls._dir_chmod777(test_work_dir)
-        #        shutil.rmtree(test_work_dir)
-
         if retcode in timeout_return_codes + \
                                     DriversUtils.EXEC_SEGFAULT_OUT_RET_CODE:
             verdict = common_mix.GlobalConstants.FAIL_TEST_VERDICT
@@ -181,7 +375,7 @@ class KTestTestFormat(object):
             verdict = common_mix.GlobalConstants.PASS_TEST_VERDICT
 
         return verdict
-    #~ def execute_test()
+    #~ def _replay_in_work_dir()
 
     @staticmethod
     def _dir_chmod777(dirpath):
@@ -294,8 +488,53 @@ class KTestTestFormat(object):
                     ":\\s+)?(EXIT STATUS: .*?)(\\s+\\([0-9]+\\s+seconds\\))?$")
 
     @classmethod
-    def _get_regexes(cls, out, clean_everything=True):
-        if '--keep-replay-dir' in out:
+    def _replay_tool_has_keep_replay_dir(cls, prog, \
+                                                capabilities_cache_file=None):
+        """ Check whether the replay tool prog has the option
+            '--keep-replay-dir' (newer versions). The '--help' of the tool
+            is probed once per tool path and modification time, and the
+            result is persisted in capabilities_cache_file if specified.
+        """
+        prog_path = prog
+        if not os.path.isabs(prog_path):
+            prog_path = find_executable(prog)
+            ERROR_HANDLER.assert_true(prog_path is not None, \
+                        "Could not fine test replay tool on path", __file__)
+        prog_path = os.path.realpath(prog_path)
+        mtime = os.path.getmtime(prog_path)
+
+        with cls._replay_tool_capabilities_lock:
+            if capabilities_cache_file is not None \
+                        and capabilities_cache_file \
+                                    not in cls._loaded_capabilities_files:
+                cls._loaded_capabilities_files.add(capabilities_cache_file)
+                if os.path.isfile(capabilities_cache_file):
+                    for path, m_cap in common_fs.loadJSON(\
+                                        capabilities_cache_file).items():
+                        cls._replay_tool_capabilities.setdefault(path, \
+                                                                tuple(m_cap))
+
+            if prog_path in cls._replay_tool_capabilities \
+                        and cls._replay_tool_capabilities[prog_path][0] == \
+                                                                    mtime:
+                return cls._replay_tool_capabilities[prog_path][1]
+
+            _, out, _ = DriversUtils.execute_and_get_retcode_out_err(\
+                                prog=prog_path, args_list=['--help'], \
+                                merge_err_to_out=True)
+            has_keep_replay_dir = '--keep-replay-dir' in out
+            cls._replay_tool_capabilities[prog_path] = \
+                                                (mtime, has_keep_replay_dir)
+            if capabilities_cache_file is not None and \
+                        os.path.isdir(os.path.dirname(capabilities_cache_file)):
+                common_fs.dumpJSON(cls._replay_tool_capabilities, \
+                                                    capabilities_cache_file)
+            return has_keep_replay_dir
+    #~ def _replay_tool_has_keep_replay_dir()
+
+    @classmethod
+    def _get_regexes(cls, has_keep_replay_dir, clean_everything=True):
+        if has_keep_replay_dir:
             clean_regex = cls.clean_everything_regex_new if clean_everything \
                                                   else cls.clean_part_regex_new
             status_regex = cls.status_regex_new
@@ -307,55 +546,138 @@ class KTestTestFormat(object):
         return clean_regex, status_regex
     #~ def _get_regexes()
         
-    @classmethod
-    def _remove_output_noise(cls, retcode, out, clean_regex, status_regex):
-        res = []
-        
-        if len(out) > 0 and out[-1] == '\n':
-            out = out[:-1]
-            last_char = "\n" 
-        else:
-            last_char = ""
-
-        # If not None, must be an integer
-        exit_status = None
-
-        found_exit_status = False
-        for line in out.encode('utf-8', 'backslashreplace').splitlines():
-            line = line.decode('utf-8', 'backslashreplace')
-            if status_regex.search(line) is not None:
-                ERROR_HANDLER.assert_true(not found_exit_status,
+    class OutputNoiseRemover(object):
+        """ Remove the replay tool noise from the replay output fed by
+            chunks, and pass the cleaned output by chunks to out_consumer.
+            The output is split into lines like bytes.splitlines. Only the
+            current output line is kept in memory.
+        """
+        line_break_regex = re.compile('\r\n|\r|\n')
+
+        def __init__(self, clean_regex, status_regex, out_consumer):
+            self.clean_regex = clean_regex
+            self.status_regex = status_regex
+            self.out_consumer = out_consumer
+            # Output after the last complete line
+            self.pending = ''
+            # Last complete line (with its line break), not yet processed
+            self.held_line = None
+            self.has_emitted = False
+            # If not None, must be an integer
+            self.exit_status = None
+            self.found_exit_status = False
+            self.found_timed_out = False
+        #~ def __init__()
+
+        def feed(self, out_chunk):
+            self.pending += out_chunk
+            start = 0
+            for match in self.line_break_regex.finditer(self.pending):
+                # A '\r' at the end may be followed by '\n' in next chunk
+                if match.group() == '\r' and \
+                                        match.end() == len(self.pending):
+                    break
+                self._hold_line(self.pending[start:match.end()])
+                start = match.end()
+            self.pending = self.pending[start:]
+        #~ def feed()
+
+        def finish(self, retcode):
+            """ Process the end of the output and return the pair
+                (retcode, exit_status)
+            """
+            if len(self.pending) > 0:
+                # The output does not end with '\n'
+                self._hold_line(self.pending)
+                self.pending = ''
+                self._process_line(self._strip_line_break(self.held_line))
+            elif self.held_line is not None:
+                if self.held_line.endswith('\n'):
+                    if self.held_line != '\n':
+                        self._process_line(\
+                                    self._strip_line_break(self.held_line))
+                    self._emit('\n', as_line=False)
+                else:
+                    self._process_line(\
+                                    self._strip_line_break(self.held_line))
+            self.held_line = None
+
+            if self.found_timed_out and retcode == 0:
+                retcode = KTestTestFormat.timedout_retcodes[0]
+            return retcode, self.exit_status
+        #~ def finish()
+
+        def _hold_line(self, line):
+            if self.held_line is not None:
+                self._process_line(self._strip_line_break(self.held_line))
+            self.held_line = line
+        #~ def _hold_line()
+
+        @staticmethod
+        def _strip_line_break(line):
+            if line.endswith('\r\n'):
+                return line[:-2]
+            if line.endswith('\n') or line.endswith('\r'):
+                return line[:-1]
+            return line
+        #~ def _strip_line_break()
+
+        def _emit(self, text, as_line=True):
+            if as_line and self.has_emitted:
+                text = '\n' + text
+            self.has_emitted = True
+            if len(text) > 0:
+                self.out_consumer(text)
+        #~ def _emit()
+
+        def _process_line(self, line):
+            if self.status_regex.search(line) is not None:
+                ERROR_HANDLER.assert_true(not self.found_exit_status,
                                 "Exit status found multiple times in output", \
                                                                       __file__)
-                found_exit_status = True
-                line = status_regex.sub("\g<2>", line)
+                self.found_exit_status = True
+                line = self.status_regex.sub("\g<2>", line)
                 ls = line.split()
                 if ls[-2] == 'ABNORMAL':
                     try:
-                        exit_status = int(ls[-1])
+                        self.exit_status = int(ls[-1])
                     except ValueError:
                         ERROR_HANDLER.error_exit(\
                                     "Invalid exit status {}".format(ls[-1]), \
                                                                  __file__)
                 elif ls[-1] == 'OUT' and ls[-2] == 'TIMED':
                     # Case where klee-replay call to gdb fails to attach process
-                    if retcode == 0:
-                        retcode = cls.timedout_retcodes[0]
+                    self.found_timed_out = True
                     # klee-replay may pu another exit status
-                    found_exit_status = False
-                res.append("@MUTERIA.KLEE-REPLAY: "+line)
-            elif clean_regex.search(line) is None:
+                    self.found_exit_status = False
+                self._emit("@MUTERIA.KLEE-REPLAY: "+line)
+            elif self.clean_regex.search(line) is None:
                 # None is matched
-                res.append(line)
-
-        res = '\n'.join(res) + last_char
+                self._emit(line)
+        #~ def _process_line()
+    #~ class OutputNoiseRemover
 
-        return retcode, res, exit_status
+    @classmethod
+    def _remove_output_noise(cls, retcode, out, clean_regex, status_regex):
+        res = []
+        noise_remover = cls.OutputNoiseRemover(clean_regex, status_regex, \
+                                                                res.append)
+        noise_remover.feed(out)
+        retcode, exit_status = noise_remover.finish(retcode)
+        return retcode, ''.join(res), exit_status
     #~ def _remove_output_noise()
 
     ktest_extension = '.ktest'
     STDIN_KTEST_DATA_FILE = "muteria-stdin-ktest-data"
 
+    # Replay tool capabilities by tool path: (mtime, has_keep_replay_dir)
+    _replay_tool_capabilities = {}
+    _loaded_capabilities_files = set()
+    _replay_tool_capabilities_lock = threading.Lock()
+
+    # Minimum number of ktests for the fdupes to load them in parallel
+    FDUPES_PARALLEL_LOADING_MIN_KTESTS = 2000
+
     @classmethod
     def ktest_fdupes(cls, *args, custom_replay_tool_binary_dir=None):
         """
@@ -373,12 +695,10 @@ class KTestTestFormat(object):
                 - The second is the list of files that are not valid
                     ktest files.
         """
-        # import ktest
+        # ktest-tool (to load the ktests)
         ktt_dir = os.path.dirname(cls.get_test_replay_tool(
                                         custom_replay_tool_binary_dir=\
                                                 custom_replay_tool_binary_dir))
-        ktest_tool = imp.load_source("ktest-tool", \
-                                        os.path.join(ktt_dir, 'ktest-tool'))
 
         ret_fdupes = []
         invalid = []
@@ -397,60 +717,54 @@ class KTestTestFormat(object):
                         "Invalid file or dir passed (inexistant): "+file_dir, \
                                                                     __file__)
 
-        # apply fdupes: load all ktests and strip the non uniform data 
-        # (.bc file used) then compare the remaining data
-        kt2used_dat = {}
-        kt2stdin = {}
-        for kf in file_set:
-            try:
-                b = ktest_tool.KTest.fromfile(kf)
-                if len(b.objects) == 0:
-                    invalid.append(kf)
-                else:
-                    kt2used_dat[kf] = (b.args[1:], b.objects)
-            except:
+        # apply fdupes: digest the data of each ktest without the non uniform
+        # data (.bc file used), with the STDIN, and group by digest
+        file_list = sorted(file_set)
+        ktt_file = os.path.join(ktt_dir, 'ktest-tool')
+        # Load in parallel the large number of ktests
+        if len(file_list) >= cls.FDUPES_PARALLEL_LOADING_MIN_KTESTS \
+                                        and multiprocessing.cpu_count() > 1:
+            n_chunks = multiprocessing.cpu_count()
+            chunks = [file_list[i::n_chunks] for i in range(n_chunks)]
+            kt2dat_digest = {}
+            for chunk, digests in zip(chunks, joblib.Parallel(\
+                                                    n_jobs=len(chunks))(\
+                        joblib.delayed(_get_ktests_data_digests)(ktt_file, c) \
+                                                            for c in chunks)):
+                kt2dat_digest.update(zip(chunk, digests))
+        else:
+            kt2dat_digest = dict(zip(file_list, \
+                            _get_ktests_data_digests(ktt_file, file_list)))
+
+        stdin2digest = {}
+        digest2kts = {}
+        for kf in file_list:
+            if kt2dat_digest[kf] is None:
                 invalid.append(kf)
+                continue
 
             # STDIN
             stdin_file = os.path.join(os.path.dirname(kf), \
                                                     cls.STDIN_KTEST_DATA_FILE)
-            if os.path.isfile(stdin_file) \
+            if stdin_file not in stdin2digest:
+                stdin2digest[stdin_file] = None
+                if os.path.isfile(stdin_file) \
                                         and os.path.getsize(stdin_file) > 0:
-                kt2stdin[kf] = stdin_file
-            else:
-                kt2stdin[kf] = None
-
-        # do fdupes
-        dup_dict = {}
-        keys = list(kt2used_dat.keys())
-        for ktest_file in keys:
-            if ktest_file in kt2used_dat:
-                ktest_file_dat = kt2used_dat[ktest_file]
-                del kt2used_dat[ktest_file]
-                for other_file in kt2used_dat:
-                    if kt2used_dat[other_file] == ktest_file_dat:
-                        # compare stdin
-                        if kt2stdin[ktest_file] == kt2stdin[other_file] or \
-                                (kt2stdin[ktest_file] is not None \
-                                        and kt2stdin[other_file] is not None \
-                                        and filecmp.cmp(kt2stdin[ktest_file], \
-                                                        kt2stdin[other_file], 
-                                                        shallow=False)):
-                            if ktest_file not in dup_dict:
-                                dup_dict[ktest_file] = []
-                            dup_dict[ktest_file].append(other_file)
-
-                # remove all dupicates from candidates
-                if ktest_file in dup_dict:
-                    for dup_of_kt_file in dup_dict[ktest_file]:
-                        del kt2used_dat[dup_of_kt_file]
+                    with open(stdin_file, 'rb') as f:
+                        stdin2digest[stdin_file] = \
+                                            hashlib.sha256(f.read()).hexdigest()
+
+            key = (kt2dat_digest[kf], stdin2digest[stdin_file])
+            if key not in digest2kts:
+                digest2kts[key] = []
+            digest2kts[key].append(kf)
 
         # Finilize
-        for ktest_file in dup_dict:
-            tmp = [ktest_file] + dup_dict[ktest_file]
-            # sort by decreasing modified age
-            tmp.sort(key=lambda x: os.path.getmtime(x))
-            ret_fdupes.append(tuple(tmp))
+        for kt_list in digest2kts.values():
+            if len(kt_list) > 1:
+                # sort by decreasing modified age
+                kt_list.sort(key=lambda x: os.path.getmtime(x))
+                ret_fdupes.append(tuple(kt_list))
 
         return ret_fdupes, invalid
     #~ def ktest_fdupes()
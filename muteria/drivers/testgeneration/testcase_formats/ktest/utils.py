@@ -219,14 +219,12 @@ class ConvertCollectKtestsSeeds:
         # get new klee stuffs
         if src_new_klee_ktest_dir is not None:
             new_klee_test_list = []
-            cwd = os.getcwd()
-            os.chdir(src_new_klee_ktest_dir)
-            for root, _, files in os.walk('.'):
+            for root, _, files in os.walk(src_new_klee_ktest_dir):
                 for f in files:
-                    tc = os.path.normpath(os.path.join(root, f))
+                    tc = os.path.relpath(os.path.join(root, f), \
+                                                    src_new_klee_ktest_dir)
                     if tc.endswith(KTestTestFormat.ktest_extension):
                         new_klee_test_list.append(tc)
-            os.chdir(cwd)
             klee_sym_args_param, kleeKTContains = \
                                     self._loadAndGetSymArgsFromKleeKTests (\
                                                     new_klee_test_list, \
@@ -10,16 +10,14 @@ def python_unittest_runner(test_name, repo_root_dir, exe_path_map, env_vars, \
     def parse_test(s):
         return s.split('...')[0].replace(':','/').replace(' ','')
 
-    cwd = os.getcwd()
-    os.chdir(repo_root_dir)
-
     try:
         args_list = ['-m', 'unittest', test_name, '-v']
 
         if collected_output is None:
             retcode, stdout, _ = DriversUtils.execute_and_get_retcode_out_err(\
                                 prog=sys.executable, args_list=args_list, \
-                                        timeout=timeout, merge_err_to_out=True)
+                                timeout=timeout, merge_err_to_out=True, \
+                                cwd=repo_root_dir)
             stdout = stdout.splitlines()
         else:
             # collected_output is a list ([retcode, out_err_log])
@@ -27,7 +25,6 @@ def python_unittest_runner(test_name, repo_root_dir, exe_path_map, env_vars, \
             assert False, "TO BE Implemented"
     except:
         # ERROR
-        os.chdir(cwd)
         return GlobalConstants.TEST_EXECUTION_ERROR
     
     # Parse the result
@@ -41,7 +38,6 @@ def python_unittest_runner(test_name, repo_root_dir, exe_path_map, env_vars, \
         elif s.endswith('... ok'):
             subtests_verdicts[parse_test(s)] = False
     #print(subtests_verdicts)
-    os.chdir(cwd)
     return GlobalConstants.FAIL_TEST_VERDICT if hasfail else \
                                             GlobalConstants.PASS_TEST_VERDICT
 #~ def python_unittest_runner()
\ No newline at end of file
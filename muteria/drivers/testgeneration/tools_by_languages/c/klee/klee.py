@@ -5,7 +5,7 @@ import sys
 import glob
 import shutil
 import logging
-import resource
+import contextlib
 
 import muteria.common.fs as common_fs
 import muteria.common.mix as common_mix
@@ -64,11 +64,17 @@ class TestcasesToolKlee(BaseTestcaseTool):
         self.klee_used_tmp_build_dir = os.path.join(self.tests_working_dir, \
                                     self._get_tool_name()+'_used_tmp_build_dir')
 
-        # mapping between exes, to have a local copy for execution
-        self.repo_exe_to_local_to_remote = {}
+        # Slots of staged executables, to have a local copy for execution
+        # (one per running replay). Each slot is a dict with the slot dir
+        # and the signature of the staged file of each repo exe
+        self.free_exe_staging_slots = []
+        self.exe_staging_slots_count = 0
 
         self.keptktest2dupktests = os.path.join(self.tests_working_dir, \
                                                 'kept_to_dup_ktests_map.json')
+        self.replay_tool_capabilities_file = os.path.join(\
+                                                self.tests_working_dir, \
+                                            'replay_tool_capabilities.json')
         
         self.ktest_with_must_exist_dir_file = os.path.join(\
                                                 self.tests_storage_dir, \
@@ -85,6 +91,14 @@ class TestcasesToolKlee(BaseTestcaseTool):
         if os.path.isdir(self.klee_used_tmp_build_dir):
             shutil.rmtree(self.klee_used_tmp_build_dir)
         os.mkdir(self.klee_used_tmp_build_dir)
+
+        # Reused scratch dirs of the ktests replays (one per running replay)
+        self.replay_scratch_top_dir = os.path.join(self.tests_working_dir, \
+                                    self._get_tool_name()+'_replay_scratch')
+        self.free_replay_scratch_dirs = []
+        self.replay_scratch_dirs_count = 0
+        if os.path.isdir(self.replay_scratch_top_dir):
+            shutil.rmtree(self.replay_scratch_top_dir)
     #~ def __init__()
 
     # SHADOW override
@@ -229,25 +243,21 @@ class TestcasesToolKlee(BaseTestcaseTool):
         max_time = cur_max_time + \
                                 self.config.TEST_GEN_TIMEOUT_FRAMEWORK_GRACE
 
-        # set stack to unlimited
-        stack_ulimit_soft, stack_ulimit_hard = \
-                                    resource.getrlimit(resource.RLIMIT_STACK)
-        if stack_ulimit_soft != -1:
-            resource.setrlimit(resource.RLIMIT_STACK, (-1, stack_ulimit_hard))
-
         # Execute Klee
-        if self.driver_config.get_suppress_generation_stdout():
-            ret, out, err = DriversUtils.execute_and_get_retcode_out_err(\
-                                    runtool, args_list=args, timeout=max_time,\
-                                    timeout_grace_period=timeout_grace_period, \
-                                    out_on=False, err_on=True, \
-                                    merge_err_to_out=False)
-            out, err = err, out
-        else:
-            ret, out, err = DriversUtils.execute_and_get_retcode_out_err(\
-                                    runtool, args_list=args, timeout=max_time,\
-                                    timeout_grace_period=timeout_grace_period)
-                                    #out_on=False, err_on=False)
+        # (with the stack unlimited, shared with concurrent runs)
+        with DriversUtils.unlimited_stack():
+            if self.driver_config.get_suppress_generation_stdout():
+                ret, out, err = DriversUtils.execute_and_get_retcode_out_err(\
+                                runtool, args_list=args, timeout=max_time,\
+                                timeout_grace_period=timeout_grace_period, \
+                                out_on=False, err_on=True, \
+                                merge_err_to_out=False)
+                out, err = err, out
+            else:
+                ret, out, err = DriversUtils.execute_and_get_retcode_out_err(\
+                                runtool, args_list=args, timeout=max_time,\
+                                timeout_grace_period=timeout_grace_period)
+                                #out_on=False, err_on=False)
         '''o_d_dbg = self.get_value_in_arglist(args, "output-dir") #DBG
         if os.path.isdir(o_d_dbg): #DBG
             shutil.rmtree(o_d_dbg) #DBG
@@ -263,11 +273,6 @@ class TestcasesToolKlee(BaseTestcaseTool):
         except subprocess.TimeoutExpired: #DBG
             stdout, stderr = p.communicate(timeout=max_time) #DBG
         #os.system(" ".join([runtool]+args)) #DBG'''
-         
-        # restore stack
-        if stack_ulimit_soft != -1:
-            resource.setrlimit(resource.RLIMIT_STACK, \
-                                        (stack_ulimit_soft, stack_ulimit_hard))
 
         if (ret != 0 and ret not in DriversUtils.EXEC_TIMED_OUT_RET_CODE \
                 and not out.rstrip().endswith(": ctrl-c detected, exiting.")):
@@ -331,16 +336,15 @@ class TestcasesToolKlee(BaseTestcaseTool):
             return self.testcase_info_object
         except AttributeError:
             tc_info_obj = TestcasesInfoObject()
-            cwd = os.getcwd()
-            os.chdir(self.tests_storage_dir)
-            for root, _, files in os.walk('.'):
+            # No chdir, the tests can be generated concurrently with others
+            for root, _, files in os.walk(self.tests_storage_dir):
                 for f in files:
-                    tc = os.path.normpath(os.path.join(root, f))
+                    tc = os.path.relpath(os.path.join(root, f), \
+                                                    self.tests_storage_dir)
                     if tc.endswith(KTestTestFormat.ktest_extension):
                         gen_time = self._get_generation_time_of_test(tc, \
                                                      self.tests_storage_dir)
                         tc_info_obj.add_test(tc, generation_time=gen_time)
-            os.chdir(cwd)
             self.testcase_info_object = tc_info_obj
             return self.testcase_info_object
     #~ def get_testcase_info_object()
@@ -389,70 +393,216 @@ class TestcasesToolKlee(BaseTestcaseTool):
                                         'TODO: handle callback_obj', __file__)
         
         repo_exe = list(exe_path_map.keys())[0]
-        local_exe = os.path.join(self.klee_used_tmp_build_dir, repo_exe)
-        if repo_exe not in self.repo_exe_to_local_to_remote:
-            with self.shared_loc:
-                if repo_exe not in self.repo_exe_to_local_to_remote:
-                    if not os.path.isdir(os.path.dirname(local_exe)):
-                        os.makedirs(os.path.dirname(local_exe))
-                    self.repo_exe_to_local_to_remote[repo_exe] = \
-                                                            {local_exe: None}
-
         remote_exe = exe_path_map[repo_exe]
         if remote_exe is None:
             remote_exe = repo_exe
 
-        if remote_exe != self.repo_exe_to_local_to_remote[repo_exe][local_exe]:
-            with self.shared_loc:
-                if remote_exe != \
-                        self.repo_exe_to_local_to_remote[repo_exe][local_exe]:
-                    if remote_exe == repo_exe:
-                        self.code_builds_factory.set_repo_to_build_default(\
-                                        also_copy_to_map={repo_exe: local_exe})
-                    else:
-                        shutil.copy2(remote_exe, local_exe)
-                        # Use hard link to avoid copying for big files
-                        #if os.path.isfile(local_exe):
-                        #    os.remove(local_exe)
-                        #os.link(remote_exe, local_exe)
-                    self.repo_exe_to_local_to_remote[repo_exe][local_exe] = \
-                                                                    remote_exe
+        with self._lease_staged_executable(repo_exe, remote_exe) as local_exe:
+            return self._replay_a_test(testcase, local_exe, env_vars, \
+                                            timeout=timeout, \
+                                            collect_output=collect_output)
+    #~ def _execute_a_test()
 
-        collected_output = [] if collect_output else None
+    def _execute_a_test_in_sandbox (self, testcase, exe_path_map, env_vars, \
+                    callback_object=None, timeout=None, collect_output=False):
+        """ Execute a test directly with the executable of exe_path_map,
+            which is in the caller's sandbox directory
+        """
 
-        extra_env = self._get_testexec_extra_env_vars(testcase)
-        if extra_env is not None and len(extra_env) > 0:
-            env_vars = dict(env_vars).update(extra_env)
+        if timeout is None:
+            timeout = self.config.ONE_TEST_EXECUTION_TIMEOUT
+
+        ERROR_HANDLER.assert_true(len(exe_path_map) == 1, \
+                                    "support a single exe for now", __file__)
+        ERROR_HANDLER.assert_true(callback_object is None, \
+                                        'TODO: handle callback_obj', __file__)
 
+        sandbox_exe = list(exe_path_map.values())[0]
+        return self._replay_a_test(testcase, sandbox_exe, env_vars, \
+                                        timeout=timeout, \
+                                        collect_output=collect_output)
+    #~ def _execute_a_test_in_sandbox()
+
+    def _get_replay_stdin_file_and_must_exist_dirs(self, testcase):
+        """ Get the stdin file (or None) and the list of directories that
+            must exist (or None) to replay the ktest testcase
+        """
         # get stdin if exists
         stdin_file = os.path.join(self.tests_storage_dir, \
                                         os.path.dirname(testcase), \
                                         KTestTestFormat.STDIN_KTEST_DATA_FILE)
-        if os.path.isfile(stdin_file) and os.path.getsize(stdin_file) > 0:
-            stdin = open(stdin_file)
-        else:
-            stdin = None
+        if not (os.path.isfile(stdin_file) \
+                                    and os.path.getsize(stdin_file) > 0):
+            stdin_file = None
 
         if testcase in self.ktest_with_must_exist_dir and \
                       len(self.ktest_with_must_exist_dir[testcase]) > 0:
             must_exist_dirs = self.ktest_with_must_exist_dir[testcase]
         else:
             must_exist_dirs = None
+        return stdin_file, must_exist_dirs
+    #~ def _get_replay_stdin_file_and_must_exist_dirs()
+
+    @staticmethod
+    def _get_staging_signature(repo_exe, remote_exe):
+        """ Identify the content of the executable remote_exe. The default
+            build of repo_exe is identified by its path.
+            The ctime is not used because hard linking changes it.
+        """
+        if remote_exe == repo_exe:
+            return remote_exe
+        st = os.stat(remote_exe)
+        return (os.path.abspath(remote_exe), st.st_ino, st.st_size, \
+                                                            st.st_mtime_ns)
+    #~ def _get_staging_signature()
+
+    @contextlib.contextmanager
+    def _lease_staged_executable(self, repo_exe, remote_exe):
+        """ Get the path of a local executable of repo_exe with the content
+            of remote_exe (the default build if remote_exe is repo_exe),
+            not used by other replays. A free slot that already has it is
+            preferred, otherwise it is staged by hard link or reflink when
+            possible (see common_fs.stage_file)
+        """
+        signature = self._get_staging_signature(repo_exe, remote_exe)
+        with self.shared_loc:
+            slot = None
+            for pos, cand in enumerate(self.free_exe_staging_slots):
+                if cand['staged'].get(repo_exe) == signature:
+                    slot = self.free_exe_staging_slots.pop(pos)
+                    break
+            if slot is None:
+                if len(self.free_exe_staging_slots) > 0:
+                    slot = self.free_exe_staging_slots.pop()
+                else:
+                    slot = {'dir': os.path.join(\
+                                        self.klee_used_tmp_build_dir, \
+                                        str(self.exe_staging_slots_count)), \
+                            'staged': {}}
+                    self.exe_staging_slots_count += 1
+        try:
+            local_exe = os.path.join(slot['dir'], repo_exe)
+            if slot['staged'].get(repo_exe) != signature:
+                slot['staged'].pop(repo_exe, None)
+                if not os.path.isdir(os.path.dirname(local_exe)):
+                    os.makedirs(os.path.dirname(local_exe))
+                if remote_exe == repo_exe:
+                    # Never write through a hard link to a staged exe
+                    if os.path.lexists(local_exe):
+                        os.remove(local_exe)
+                    with self.shared_loc:
+                        self.code_builds_factory.set_repo_to_build_default(\
+                                        also_copy_to_map={repo_exe: local_exe})
+                else:
+                    common_fs.stage_file(remote_exe, local_exe)
+                slot['staged'][repo_exe] = signature
+            yield local_exe
+        finally:
+            with self.shared_loc:
+                self.free_exe_staging_slots.append(slot)
+    #~ def _lease_staged_executable()
+
+    @contextlib.contextmanager
+    def _lease_replay_scratch_dir(self):
+        """ Get a replay scratch dir not used by other replays, reused
+            across replays
+        """
+        with self.shared_loc:
+            if len(self.free_replay_scratch_dirs) > 0:
+                scratch_dir = self.free_replay_scratch_dirs.pop()
+            else:
+                scratch_dir = os.path.join(self.replay_scratch_top_dir, \
+                                        str(self.replay_scratch_dirs_count))
+                self.replay_scratch_dirs_count += 1
+        if not os.path.isdir(scratch_dir):
+            os.makedirs(scratch_dir)
+        try:
+            yield scratch_dir
+        finally:
+            with self.shared_loc:
+                self.free_replay_scratch_dirs.append(scratch_dir)
+    #~ def _lease_replay_scratch_dir()
+
+    def _replay_a_test (self, testcase, local_exe, env_vars, timeout, \
+                                                        collect_output=False):
+        """ Replay the ktest testcase on the executable local_exe
+        """
+        collected_output = [] if collect_output else None
+
+        extra_env = self._get_testexec_extra_env_vars(testcase)
+        if extra_env is not None and len(extra_env) > 0:
+            env_vars = dict(env_vars or {})
+            env_vars.update(extra_env)
+
+        stdin_file, must_exist_dirs = \
+                    self._get_replay_stdin_file_and_must_exist_dirs(testcase)
+        if stdin_file is not None:
+            stdin = open(stdin_file)
+        else:
+            stdin = None
         
-        verdict = KTestTestFormat.execute_test(local_exe, \
+        with self._lease_replay_scratch_dir() as scratch_dir:
+            verdict = KTestTestFormat.execute_test(local_exe, \
                         os.path.join(self.tests_storage_dir, testcase), \
                         env_vars=env_vars, \
                         stdin=stdin, \
                         must_exist_dir_list=must_exist_dirs, \
                         timeout=timeout, \
                         collected_output=collected_output, \
-                        custom_replay_tool_binary_dir=self.custom_binary_dir)
+                        custom_replay_tool_binary_dir=self.custom_binary_dir, \
+                        capabilities_cache_file=\
+                                        self.replay_tool_capabilities_file, \
+                        work_dir=scratch_dir, \
+                        hash_collected_output=\
+                                (collect_output == self.COLLECT_HASHED_OUTPUT))
         
         if stdin is not None:
             stdin.close()
 
         return verdict, collected_output
-    #~ def _execute_a_test()
+    #~ def _replay_a_test()
+
+    def _execute_tests_in_sandbox(self, testcases, exe_path_map, env_vars, \
+                                                timeouts, collect_output=False):
+        """ Replay the tests as a batch (KTestTestFormat.execute_tests_batch)
+            with a scratch dir next to the sandboxed executable
+        """
+        if any(self._get_testexec_extra_env_vars(tc) for tc in testcases):
+            for res in super(TestcasesToolKlee, self)\
+                                ._execute_tests_in_sandbox(testcases, \
+                                    exe_path_map, env_vars, timeouts, \
+                                    collect_output=collect_output):
+                yield res
+            return
+
+        ERROR_HANDLER.assert_true(len(exe_path_map) == 1, \
+                                    "support a single exe for now", __file__)
+        sandbox_exe = list(exe_path_map.values())[0]
+        scratch_dir = sandbox_exe + '.replay_scratch'
+
+        def jobs():
+            for testcase in testcases:
+                stdin_file, must_exist_dirs = \
+                    self._get_replay_stdin_file_and_must_exist_dirs(testcase)
+                yield (testcase, sandbox_exe, \
+                        os.path.join(self.tests_storage_dir, testcase), \
+                        stdin_file, must_exist_dirs, timeouts[testcase])
+        #~ def jobs()
+
+        results = KTestTestFormat.execute_tests_batch(jobs(), env_vars, \
+                        [scratch_dir], collect_output=collect_output, \
+                        custom_replay_tool_binary_dir=self.custom_binary_dir, \
+                        capabilities_cache_file=\
+                                        self.replay_tool_capabilities_file, \
+                        hash_collected_output=\
+                                (collect_output == self.COLLECT_HASHED_OUTPUT))
+        try:
+            for res in results:
+                yield res
+        finally:
+            results.close()
+            KTestTestFormat._clean_replay_work_dir(scratch_dir, remove=True)
+    #~ def _execute_tests_in_sandbox()
 
     def _do_generate_tests (self, exe_path_map, code_builds_factory, \
                                                 meta_criteria_tool_obj=None, \
@@ -601,6 +751,14 @@ class TestcasesToolKlee(BaseTestcaseTool):
         return True
     #~ def can_run_tests_in_parallel()
 
+    def can_generate_tests_concurrently(self):
+        return True
+    #~ def can_generate_tests_concurrently()
+
+    def can_run_tests_in_sandbox(self):
+        return True
+    #~ def can_run_tests_in_sandbox()
+
     def get_test_format_class (self):
         return KTestTestFormat
     # def get_test_format_class ()
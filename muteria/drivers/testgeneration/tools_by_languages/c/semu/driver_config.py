@@ -13,10 +13,13 @@ class MetaMuSource(common_mix.EnumAutoName):
 class DriverConfigSemu(DriverConfigKlee):
     def __init__(self, max_mutant_count_per_cluster=100,
                         meta_mutant_source=MetaMuSource.MART,
-                        target_only_live_mutants=True, **kwargs):
+                        target_only_live_mutants=True, \
+                        cluster_parallel_count=1, **kwargs):
         DriverConfigKlee.__init__(self, **kwargs)
         ERROR_HANDLER.assert_true(max_mutant_count_per_cluster > 0, \
                         "max_mutant_count_per_cluster must be > 0", __file__)
+        ERROR_HANDLER.assert_true(cluster_parallel_count > 0, \
+                        "cluster_parallel_count must be > 0", __file__)
         if type(meta_mutant_source) == str \
                                     and meta_mutant_source.endswith(".bc"):
             # Consider case when directly specifying meta-mu file in semu
@@ -33,6 +36,7 @@ class DriverConfigSemu(DriverConfigKlee):
         self.max_mutant_count_per_cluster = max_mutant_count_per_cluster
         self.meta_mutant_source = meta_mutant_source
         self.target_only_live_mutants = target_only_live_mutants 
+        self.cluster_parallel_count = cluster_parallel_count
     #~ def __init__()
 
     def requires_criteria_instrumented(self):
@@ -52,4 +56,8 @@ class DriverConfigSemu(DriverConfigKlee):
     def get_target_only_live_mutants(self):
         return self.target_only_live_mutants
     #~ def get_target_only_live_mutants()
+
+    def get_cluster_parallel_count(self):
+        return self.cluster_parallel_count
+    #~ def get_cluster_parallel_count()
 #~ class DriverConfigSemu
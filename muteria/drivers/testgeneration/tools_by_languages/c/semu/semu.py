@@ -5,10 +5,11 @@ import sys
 import glob
 import shutil
 import logging
-import resource
 import random
+import math
 
 import numpy as np
+import joblib
 
 import muteria.common.fs as common_fs
 import muteria.common.mix as common_mix
@@ -234,29 +235,59 @@ class TestcasesToolSemu(TestcasesToolKlee):
                 nclust += 1
             clusters = np.array_split(mut_list, nclust)
 
-            # update max-time
-            if len(clusters) > 1:
+            # update max-time (the clusters executed concurrently share it)
+            parallel_count = min(len(clusters), \
+                                self.driver_config.get_cluster_parallel_count())
+            n_rounds = int(math.ceil(len(clusters) / float(parallel_count)))
+            if n_rounds > 1:
                 cur_max_time = float(self.get_value_in_arglist(args, 'max-time'))
                 self.set_value_in_arglist(args, 'max-time', \
-                                        str(max(1, cur_max_time / len(clusters))))
+                                        str(max(1, cur_max_time / n_rounds)))
             
             shutil.move(self.cand_muts_file, cand_mut_file_bak)
 
+            # Each cluster has its own candidate mutants file and output dir
             c_dirs = []
+            c_args_list = []
             for c_id, clust in enumerate(clusters):
-                logging.debug("SEMU: targeting mutant cluster {}/{} ...".format(\
-                                                            c_id+1, len(clusters)))
-                with open(self.cand_muts_file, 'w') as f:
+                c_cand_muts_file = self.cand_muts_file + '.' + str(c_id)
+                with open(c_cand_muts_file, 'w') as f:
                     for m in clust:
                         f.write(m+'\n')
-
-                super(TestcasesToolSemu, self)._call_generation_run(runtool, args)
-                
                 c_dir = os.path.join(os.path.dirname(self.tests_storage_dir), \
                                                                         str(c_id))
-                shutil.move(self.tests_storage_dir, c_dir)
+                if os.path.isdir(c_dir):
+                    shutil.rmtree(c_dir)
+                c_args = list(args)
+                self.set_value_in_arglist(c_args, 'output-dir', c_dir)
+                self.set_value_in_arglist(c_args, \
+                                            'semu-candidate-mutants-list-file', \
+                                                            c_cand_muts_file)
                 c_dirs.append(c_dir)
+                c_args_list.append(c_args)
+
+            def run_cluster(c_id):
+                logging.debug("SEMU: targeting mutant cluster {}/{} ...".format(\
+                                                            c_id+1, len(clusters)))
+                super(TestcasesToolSemu, self)._call_generation_run(runtool, \
+                                                            c_args_list[c_id])
+                os.remove(self.cand_muts_file + '.' + str(c_id))
+            #~ def run_cluster()
+
+            if parallel_count > 1:
+                # Keep the stack unlimited for all the clusters
+                with DriversUtils.unlimited_stack():
+                    joblib.Parallel(n_jobs=parallel_count, \
+                                                    require='sharedmem')\
+                        (joblib.delayed(run_cluster)(c_id) \
+                                            for c_id in range(len(clusters)))
+            else:
+                for c_id in range(len(clusters)):
+                    run_cluster(c_id)
 
+            # Merge the clusters ktests dirs
+            if os.path.isdir(self.tests_storage_dir):
+                shutil.rmtree(self.tests_storage_dir)
             os.mkdir(self.tests_storage_dir)
             for c_dir in c_dirs:
                 shutil.move(c_dir, self.tests_storage_dir)
@@ -368,6 +368,11 @@ class TestcasesToolShadowSE(TestcasesToolKlee):
         return None # TODO: get test env and return
     #~ def _get_testexec_extra_env_vars()
 
+    def can_generate_tests_concurrently(self):
+        # The PATH is changed during the generation
+        return False
+    #~ def can_generate_tests_concurrently()
+
     def _do_generate_tests (self, exe_path_map, code_builds_factory, \
                                                 meta_criteria_tool_obj=None, \
                                                                 max_time=None):
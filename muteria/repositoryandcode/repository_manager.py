@@ -48,6 +48,14 @@
         and release the lock when there is failure (call to error_exit).
         Implement tools with subprocess for parallelism so as to kill all the 
         subprocess upon error_exit, or continue until join.
+
+    When the repository parallelism is greater than 1, a pool of copies
+    (copy-on-write where the filesystem supports it) of the repository
+    is created in the muteria meta folder of the repository. Each copy
+    has its own lock and is leased with `lease_repository_slot`, so that
+    many developer tests can run at the same time.
+    >>> with repo_mgr.lease_repository_slot() as repo_slot:
+    ...     repo_mgr.run_dev_test(test, repo_slot=repo_slot)
 """
 
 
@@ -57,6 +65,13 @@ import os
 import shutil
 import logging
 import threading
+import subprocess
+import contextlib
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
 
 # https://gitpython.readthedocs.io/en/stable/
 from git import Repo as git_repo
@@ -68,16 +83,127 @@ import muteria.common.fs as common_fs
 
 ERROR_HANDLER = common_mix.ErrorHandler
 
+class RepositoryLock(object):
+    """ Reentrant lock of the repository. The owner of the lock can lend
+        it (see `lend`) to the threads that only read the repository
+        (see `borrow`), while it waits for them without changing the
+        repository (e.g. the tests that it runs in parallel).
+    """
+    def __init__(self):
+        self.cond = threading.Condition(threading.Lock())
+        self.owner = None
+        self.count = 0
+        self.n_lends = 0
+        self.n_borrowers = 0
+    #~ def __init__()
+
+    def acquire(self):
+        me = threading.get_ident()
+        with self.cond:
+            while self.owner not in (None, me):
+                self.cond.wait()
+            self.owner = me
+            self.count += 1
+        return True
+    #~ def acquire()
+
+    def release(self):
+        with self.cond:
+            ERROR_HANDLER.assert_true(self.owner == threading.get_ident(), \
+                            "releasing an un-acquired repository lock", \
+                                                                    __file__)
+            self.count -= 1
+            if self.count == 0:
+                self.owner = None
+                self.cond.notify_all()
+    #~ def release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+    @contextlib.contextmanager
+    def lend(self):
+        """ Let the other threads borrow the lock, held by the calling
+            thread, until the end of the context. The end waits for the
+            borrowers to return it.
+        """
+        with self.cond:
+            ERROR_HANDLER.assert_true(self.owner == threading.get_ident(), \
+                            "lending an un-acquired repository lock", \
+                                                                    __file__)
+            self.n_lends += 1
+            self.cond.notify_all()
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.n_lends -= 1
+                while self.n_borrowers > 0:
+                    self.cond.wait()
+    #~ def lend()
+
+    @contextlib.contextmanager
+    def borrow(self):
+        """ Hold the lock until the end of the context, or share it with
+            its owner when it is lent.
+        """
+        me = threading.get_ident()
+        with self.cond:
+            while self.owner not in (None, me) and self.n_lends == 0:
+                self.cond.wait()
+            borrowed = self.owner not in (None, me)
+            if borrowed:
+                self.n_borrowers += 1
+            else:
+                self.owner = me
+                self.count += 1
+        try:
+            yield
+        finally:
+            if borrowed:
+                with self.cond:
+                    self.n_borrowers -= 1
+                    self.cond.notify_all()
+            else:
+                self.release()
+    #~ def borrow()
+#~ class RepositoryLock
+
+class RepositorySlot(object):
+    """ A checkout of the repository where commands can be executed,
+        with the lock that protect it.
+        The slot leased when the parallelism is 1 is the repository itself.
+    """
+    def __init__(self, rootdir, lock, slot_id=None):
+        self.rootdir = rootdir
+        self.lock = lock
+        self.slot_id = slot_id
+        # generation of the repository build that the slot reflects
+        self.generation = None
+        # relative path -> stat signature of the file last synced 
+        self.synced_signatures = {}
+    #~ def __init__()
+
+    def get_rootdir(self):
+        return self.rootdir
+    #~ def get_rootdir()
+#~ class RepositorySlot
+
 class RepositoryManager(object):
     DEFAULT_TESTS_BRANCH_NAME = "_tests_tmp_muteria_"
     DEFAULT_MUTERIA_REPO_META_FOLDER = ".muteria" 
+    DEFAULT_REPOS_POOL_FOLDER = "repos_pool"
     def __init__(self, repository_rootdir, repo_executables_relpaths=None, \
                         dev_test_runner_func=None, code_builder_func=None, \
                         dev_test_program_wrapper=None, \
                         test_exec_output_cleaner_func=None, \
                         source_files_to_objects=None, dev_tests_list=None, \
                         delete_created_on_revert_as_initial=False, \
-                        test_branch_name=DEFAULT_TESTS_BRANCH_NAME):
+                        test_branch_name=DEFAULT_TESTS_BRANCH_NAME, \
+                        parallelism=1):
         self.repository_rootdir = repository_rootdir
         self.repo_executables_relpaths = repo_executables_relpaths
         self.dev_test_runner_func = dev_test_runner_func
@@ -88,12 +214,15 @@ class RepositoryManager(object):
         if self.dev_test_program_wrapper is not None:
             self.dev_test_program_wrapper = self.dev_test_program_wrapper(self)
         self.test_exec_output_cleaner_func = test_exec_output_cleaner_func
+        self.has_custom_output_cleaner = \
+                                    test_exec_output_cleaner_func is not None
         if self.test_exec_output_cleaner_func is None:
             self.test_exec_output_cleaner_func = lambda x: x
 
         self.delete_created_on_revert_as_initial = \
                                         delete_created_on_revert_as_initial
         self.test_branch_name = test_branch_name
+        self.parallelism = 1 if parallelism is None else parallelism
 
         if self.repo_executables_relpaths is None:
             self.repo_executables_relpaths = []
@@ -107,19 +236,32 @@ class RepositoryManager(object):
         if self.repository_rootdir is None:
             ERROR_HANDLER.error_exit(\
                                 "repository rootdir cannot be None", __file__)
+        ERROR_HANDLER.assert_true(self.parallelism >= 1, \
+                        "invalid repository parallelism ({}). {}".format(\
+                            self.parallelism, "must be >= 1"), __file__)
         #if self.repo_executables_relpaths is None:
         #    ERROR_HANDLER.error_exit(\
         #                    "repo executable relpath cannot be None", __file__)
 
         # TODO: Implement a mechanism to avoid deadlock (multiple levels of
         # parallelism)
-        self.lock = threading.RLock()
+        self.lock = RepositoryLock()
 
         self.muteria_metadir = os.path.join(self.repository_rootdir, \
                                         self.DEFAULT_MUTERIA_REPO_META_FOLDER)
         self.muteria_metadir_info_file = os.path.join(self.muteria_metadir, \
                                                             "src_infos.json")
 
+        # Pool of repository copies (used when parallelism > 1)
+        self.main_slot = RepositorySlot(self.repository_rootdir, self.lock)
+        self.pool_dir = os.path.join(self.muteria_metadir, \
+                                                self.DEFAULT_REPOS_POOL_FOLDER)
+        self.pool_slots = None
+        self.pool_free_slots = None
+        self.pool_setup_lock = threading.Lock()
+        # Incremented on each build to invalidate the copies in the pool
+        self.pool_generation = 0
+
         # setup the repo (Should remain as last intruction of initialization)
         self._setup_repository()
     #~ def __init__()
@@ -141,13 +283,177 @@ class RepositoryManager(object):
         return self.test_exec_output_cleaner_func 
     #~ def get_test_exec_output_cleaner_func()
 
+    def has_test_exec_output_cleaner_func (self):
+        """ Whether a custom test execution output cleaner was set
+        """
+        return self.has_custom_output_cleaner
+    #~ def has_test_exec_output_cleaner_func()
+
     def should_build(self):
         return (self.code_builder_func is not None)
     #~ def should_build()
 
-    def _set_callback_basics(self, callback_object):
+    def get_parallelism(self):
+        return self.parallelism
+    #~ def get_parallelism()
+
+    @contextlib.contextmanager
+    def lease_repository_slot(self):
+        """ Lease a checkout of the repository where a developer test
+            can run without interfering with the other leased checkouts.
+            The lease blocks until a checkout is available.
+            With a parallelism of 1, the repository itself is leased.
+            The executables and the source and object files of the checkout
+            are synchronized with the repository before it is handed.
+
+        :rtype: RepositorySlot
+        """
+        if self.parallelism <= 1:
+            with self.main_slot.lock:
+                yield self.main_slot
+            return
+
+        self._setup_pool()
+        slot = self.pool_free_slots.get()
+        try:
+            with slot.lock:
+                # The repository must not change while it is copied
+                with self.lock.borrow():
+                    self._sync_pool_slot(slot)
+                yield slot
+        finally:
+            self.pool_free_slots.put(slot)
+    #~ def lease_repository_slot()
+
+    @contextlib.contextmanager
+    def lend_lock_to_slot_syncs(self):
+        """ Let the leased checkouts be synchronized with the repository 
+            by the other threads while the calling thread, which holds the
+            repository lock (e.g. in custom_read_access), waits for them. 
+            The repository must not change until the end of the context.
+        """
+        with self.lock.lend():
+            yield
+    #~ def lend_lock_to_slot_syncs()
+
+    def _setup_pool(self):
+        # The pool may be set up by the tests of the lock owner
+        with self.lock.borrow(), self.pool_setup_lock:
+            if self.pool_slots is None:
+                if not os.path.isdir(self.pool_dir):
+                    os.makedirs(self.pool_dir)
+                self.pool_slots = []
+                self.pool_free_slots = queue.Queue()
+                for slot_id in range(self.parallelism):
+                    slot = RepositorySlot(os.path.join(self.pool_dir, \
+                                                            str(slot_id)), \
+                                            threading.RLock(), slot_id=slot_id)
+                    self.pool_slots.append(slot)
+                    self.pool_free_slots.put(slot)
+    #~ def _setup_pool()
+
+    def _clone_repository_into(self, dest_dir):
+        """ Copy the repository content (except the muteria meta folder)
+            into dest_dir. Use reflinks (copy-on-write) when possible.
+        """
+        if os.path.isdir(dest_dir):
+            shutil.rmtree(dest_dir)
+        os.mkdir(dest_dir)
+        for entry in os.listdir(self.repository_rootdir):
+            if entry == self.DEFAULT_MUTERIA_REPO_META_FOLDER:
+                continue
+            src = os.path.join(self.repository_rootdir, entry)
+            dest = os.path.join(dest_dir, entry)
+            try:
+                subprocess.check_call(['cp', '-a', '--reflink=auto', \
+                                                                src, dest], \
+                                        stdout=subprocess.DEVNULL, \
+                                        stderr=subprocess.DEVNULL)
+            except (OSError, subprocess.CalledProcessError):
+                if os.path.isdir(dest) and not os.path.islink(dest):
+                    shutil.rmtree(dest)
+                elif os.path.lexists(dest):
+                    os.remove(dest)
+                if os.path.isdir(src) and not os.path.islink(src):
+                    shutil.copytree(src, dest, symlinks=True)
+                else:
+                    shutil.copy2(src, dest, follow_symlinks=False)
+    #~ def _clone_repository_into()
+
+    def _get_pool_synced_relpaths(self):
+        relpaths = list(self.repo_executables_relpaths)
+        relpaths += list(self.source_files_to_objects.keys())
+        relpaths += [o for o in self.source_files_to_objects.values() \
+                                                            if o is not None]
+        return relpaths
+    #~ def _get_pool_synced_relpaths()
+
+    def _sync_pool_slot(self, slot):
+        """ Make the files that muteria changes in the repository 
+            (executables, sources and objects) identical in the slot.
+            The ctime is part of the signature because the copy into the
+            repository preserves the mtime of the replaced file.
+        """
+        if slot.generation != self.pool_generation:
+            self._clone_repository_into(slot.rootdir)
+            slot.generation = self.pool_generation
+            slot.synced_signatures = {}
+
+        for relpath in self._get_pool_synced_relpaths():
+            src = os.path.join(self.repository_rootdir, relpath)
+            dest = os.path.join(slot.rootdir, relpath)
+            if os.path.isfile(src):
+                src_stat = os.stat(src)
+                signature = (src_stat.st_ino, src_stat.st_size, \
+                                src_stat.st_mtime_ns, src_stat.st_ctime_ns)
+            else:
+                signature = None
+            if relpath in slot.synced_signatures \
+                            and slot.synced_signatures[relpath] == signature:
+                continue
+            if signature is None:
+                if os.path.isfile(dest):
+                    os.remove(dest)
+            else:
+                dest_dir = os.path.dirname(dest)
+                if not os.path.isdir(dest_dir):
+                    os.makedirs(dest_dir)
+                try:
+                    shutil.copy2(src, dest)
+                except PermissionError:
+                    os.remove(dest)
+                    shutil.copy2(src, dest)
+            slot.synced_signatures[relpath] = signature
+    #~ def _sync_pool_slot()
+
+    def copy_into_repository_slot(self, repo_slot, exe_path_map):
+        """ Copy the files of exe_path_map (relative path in repository as
+            key, file to copy as value, or None to skip) into the leased
+            checkout repo_slot. The copied files are synchronized back with
+            the repository on next lease.
+        """
+        ERROR_HANDLER.assert_true(repo_slot is not self.main_slot, \
+                    "Cannot copy into the repository through a lease", \
+                                                                    __file__)
+        for relpath, abspath in exe_path_map.items():
+            if abspath is None:
+                continue
+            dest = os.path.join(repo_slot.get_rootdir(), relpath)
+            try:
+                shutil.copy2(abspath, dest)
+            except PermissionError:
+                os.remove(dest)
+                shutil.copy2(abspath, dest)
+            # Force re-synchronization on next lease
+            if relpath in repo_slot.synced_signatures:
+                del repo_slot.synced_signatures[relpath]
+    #~ def copy_into_repository_slot()
+
+    def _set_callback_basics(self, callback_object, repository_rootdir=None):
+        if repository_rootdir is None:
+            repository_rootdir = self.repository_rootdir
         if callback_object is not None:
-            callback_object.set_repository_rootdir(self.repository_rootdir)
+            callback_object.set_repository_rootdir(repository_rootdir)
             callback_object.set_repo_executables_relpaths(\
                                              self.repo_executables_relpaths)
             callback_object.set_source_files_to_objects(\
@@ -156,7 +462,11 @@ class RepositoryManager(object):
     #~ def _set_callback_basics()
 
     def run_dev_test(self, dev_test_name, exe_path_map=None, env_vars=None,\
-                    timeout=None, collected_output=None, callback_object=None):
+                    timeout=None, collected_output=None, callback_object=None,\
+                    repo_slot=None):
+        """ Run the developer test in the repository, or in the checkout
+            `repo_slot` (leased with `lease_repository_slot`) if specified.
+        """
         if self.dev_test_runner_func is None:
             ERROR_HANDLER.error_exit(\
                     "dev_test_runner_func cannot be none when called", \
@@ -166,15 +476,19 @@ class RepositoryManager(object):
         post_ret = common_mix.GlobalConstants.COMMAND_UNCERTAIN
         ret = common_mix.GlobalConstants.COMMAND_UNCERTAIN
 
-        self._set_callback_basics(callback_object)
+        if repo_slot is None:
+            repo_slot = self.main_slot
 
-        self.lock.acquire()
+        self._set_callback_basics(callback_object, \
+                                    repository_rootdir=repo_slot.get_rootdir())
+
+        repo_slot.lock.acquire()
         try:
             if callback_object is not None:
                 pre_ret = callback_object.before_command()
             if pre_ret == common_mix.GlobalConstants.COMMAND_SUCCESS:
                 ret = self.dev_test_runner_func(dev_test_name, \
-                                        self.repository_rootdir, \
+                                        repo_slot.get_rootdir(), \
                                         exe_path_map=exe_path_map, \
                                         env_vars=(env_vars 
                                                     if env_vars is not None \
@@ -189,7 +503,7 @@ class RepositoryManager(object):
                     callback_object.set_op_retval(ret)
                     post_ret = callback_object.after_command()
         finally:
-            self.lock.release()                                
+            repo_slot.lock.release()                                
         return (pre_ret, ret, post_ret)
     #~ def run_dev_test()
 
@@ -274,6 +588,8 @@ class RepositoryManager(object):
                                         self.repo_executables_relpaths, \
                                         compiler, flags_list, clean_tmp, \
                                         reconfigure)
+                # The copies in the pool must be refreshed
+                self.pool_generation += 1
                 if callback_object is not None:
                     callback_object.set_op_retval(ret)
                     post_ret = callback_object.after_command()
@@ -400,6 +716,8 @@ class RepositoryManager(object):
                 # Reset the files but do not delete created files and dir
                 self.revert_src_list_files()
                 shutil.rmtree(self.muteria_metadir)
+                self.pool_slots = None
+                self.pool_free_slots = None
                 #gitobj.reset('--hard') 
         finally:
             self.lock.release()                                
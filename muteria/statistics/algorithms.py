@@ -13,6 +13,66 @@ def getCoupledMutants (mutants_to_killingtests, failingtests, istwoways=False):
             coupled.append(m)
     return coupled
     
+def iterSubsumingMutants (mutants_to_killingtests, equivalent_mutants=None):
+    '''
+        Compute the subsuming mutants clusters, yielded by increasing number
+        of killing tests, as they are found.
+        The kill sets are represented as integer bitsets (a bit per test),
+        mutants with the same kill set are grouped in one pass (hashing the
+        bitsets), and a cluster is only checked against the subsuming
+        clusters indexed by a test that kills the cluster's mutants.
+
+        :param mutants_to_killingtests: dict having as key the mutant ID 
+                                and as value the iterable of tests killing it
+        :param equivalent_mutants: list where the equivalent mutants (killed
+                                by no test) are appended, if not None
+        :returns: generator of tuples of subsuming mutants (Each tuple
+                    contain the mutants that are subsuming each others)
+    '''
+    test_to_bit = {}
+    # bitset -> (list of mutants, list of tests bits)
+    clusters = {}
+    for mutant_id, killingtests in mutants_to_killingtests.items():
+        bitset = 0
+        for test in killingtests:
+            bit = test_to_bit.setdefault(test, len(test_to_bit))
+            bitset |= 1 << bit
+        if bitset == 0:
+            if equivalent_mutants is not None:
+                equivalent_mutants.append(mutant_id)
+        elif bitset in clusters:
+            clusters[bitset][0].append(mutant_id)
+        else:
+            clusters[bitset] = ([mutant_id], \
+                            [test_to_bit[t] for t in set(killingtests)])
+
+    # number of clusters killed by each test, to index the subsuming
+    # clusters by their rarest test
+    bit_frequency = [0] * len(test_to_bit)
+    for _, bits in clusters.values():
+        for bit in bits:
+            bit_frequency[bit] += 1
+
+    # test bit -> bitsets of the subsuming clusters indexed with the test
+    # A cluster can only be subsumed by a cluster with less killing tests
+    subsuming_index = {}
+    for bitset, (cluster, bits) in sorted(clusters.items(), \
+                                                key=lambda x: len(x[1][1])):
+        subsumed = False
+        for bit in bits:
+            for subsuming_bitset in subsuming_index.get(bit, ()):
+                if subsuming_bitset & bitset == subsuming_bitset:
+                    subsumed = True
+                    break
+            if subsumed:
+                break
+
+        if not subsumed:
+            rarest_bit = min(bits, key=lambda b: bit_frequency[b])
+            subsuming_index.setdefault(rarest_bit, []).append(bitset)
+            yield tuple(cluster)
+#~ def iterSubsumingMutants()
+
 def getSubsumingMutants (mutants_to_killingtests, clustered=True):
     '''
         :param mutants_to_killingtests: dict having as key the mutant ID 
@@ -26,52 +86,9 @@ def getSubsumingMutants (mutants_to_killingtests, clustered=True):
     '''
 
     equivalent_mutants = []
-    subsuming_mutants_clusters = []
-
-    # if empty, do nothing
-    if len(mutants_to_killingtests) == 0:
-        return equivalent_mutants, subsuming_mutants_clusters
-    
-    # make sure that the tests killing are sets
-    if type(mutants_to_killingtests[list(mutants_to_killingtests.keys())[0]]) != set:
-        mutants_to_killingtests = {m: set(mutants_to_killingtests[m]) \
-                                            for m in mutants_to_killingtests}
-
-    # Create cluster list of equi-subsumptions, and equivalent mutants list
-    cluster_list = []
-    for mutant_id in mutants_to_killingtests:
-        if len(mutants_to_killingtests[mutant_id]) == 0:
-            equivalent_mutants.append(mutant_id)
-        else:
-            # can it fit in existing cluster:
-            found = False
-            for cluster in cluster_list:
-                if mutants_to_killingtests[cluster[0]] == \
-                                            mutants_to_killingtests[mutant_id]:
-                    cluster.append(mutant_id)
-                    found = True
-                    break
-
-            if not found:
-                # Create its own cluster
-                cluster_list.append([mutant_id])
-
-    # sort the clusters but increating number of killing tests
-    cluster_list.sort(key=lambda x: len(mutants_to_killingtests[x[0]]))
-
-    # for each cluster in order, check if subsumed, else, add
-    for cluster in cluster_list:
-        subsumed = False
-        for subsuming_cluster in subsuming_mutants_clusters:
-            # Check subsumption
-            if len(mutants_to_killingtests[subsuming_cluster[0]] - \
-                    mutants_to_killingtests[cluster[0]]) == 0:
-                # cluster is subsumed by subsuming_cluster, do nothing
-                subsumed = True
-                break
-
-        if not subsumed:
-            subsuming_mutants_clusters.append(tuple(cluster))
+    subsuming_mutants_clusters = list(iterSubsumingMutants(\
+                                            mutants_to_killingtests, \
+                                    equivalent_mutants=equivalent_mutants))
 
     if not clustered:
         tmp_list = []
@@ -82,57 +99,91 @@ def getSubsumingMutants (mutants_to_killingtests, clustered=True):
     return equivalent_mutants, subsuming_mutants_clusters
 
 
+def _bitset_size (bitset):
+    return bin(bitset).count('1')
+#~ def _bitset_size()
+
+def _bitset_to_elements (bitset, elements):
+    return [elements[i] for i, b in enumerate(reversed(bin(bitset)[2:])) \
+                                                                if b == '1']
+#~ def _bitset_to_elements()
+
 def getCommonSetsSizes_venn (setsElemsDict, setsize_from=None, 
                                 setsize_to=None, name_delim='&', 
-                                not_common=None):
+                                not_common=None, sizes_only=False):
     '''
-        TODO: 
+        Compute the intersections of the combinations of the sets (of 
+        setsize_from to setsize_to sets).
+        The sets are represented as bitsets over the union of their 
+        elements, and each intersection of k sets is computed from the 
+        intersection of its first k-1 sets (previous combinations size).
         
     arguments are:
-        - setsElemsDict
-        - setsize_from
-        - setsize_to
-        - name_delim
-        - not_common
+        - setsElemsDict: dict of set name -> elements of the set
+        - setsize_from: minimum number of sets combined (default 1)
+        - setsize_to: maximum number of sets combined (default all)
+        - name_delim: delimiter of the set names in the combinations names
+        - not_common: empty dict that, if not None, is filled with,
+                for each combination name, the dict of the set names of
+                the combination to their elements not in the intersection
+                (only the sets having such elements)
+        - sizes_only: do not materialize the intersections sets
         
-    return:
+    return: pair of the dict of combination name -> intersection size and
+        the dict of combination name -> intersection set (None when
+        sizes_only is True)
     '''
     if not_common is not None:
         assert type(not_common) == dict and len(not_common) == 0
 
-    res_set = {} 
     if setsize_from is None:
         setsize_from = 1
     if setsize_to is None:
         setsize_to = len(setsElemsDict)
     ordered_keys = list(setsElemsDict)
-    for setsize in range(setsize_from, setsize_to+1):
+
+    # Shared element index
+    elements = []
+    elem_to_bit = {}
+    bitsets = []
+    for key in ordered_keys:
+        bitset = 0
+        for elem in setsElemsDict[key]:
+            if elem not in elem_to_bit:
+                elem_to_bit[elem] = len(elements)
+                elements.append(elem)
+            bitset |= 1 << elem_to_bit[elem]
+        bitsets.append(bitset)
+
+    res_num = {} 
+    res_set = None if sizes_only else {}
+    # combination (tuple of set positions) -> intersection bitset, for the
+    # previous combinations size
+    prev_level = {(): -1}
+    for setsize in range(1, setsize_to+1):
+        level = {}
         for set_pos in itertools.combinations(range(len(ordered_keys)), \
                                                                     setsize):
+            inter = prev_level[set_pos[:-1]] & bitsets[set_pos[-1]]
+            level[set_pos] = inter
+            if setsize < setsize_from:
+                continue
+
             name_key = name_delim.join([ordered_keys[i] for i in set_pos])
-            assert name_key not in res_set
-            res_set[name_key] = None 
-            #print (set_pos, len(set_pos))
-            for i in set_pos:
-                if res_set[name_key] is None:
-                    res_set[name_key] = set(setsElemsDict[ordered_keys[i]])
-                else:
-                    res_set[name_key] &= setsElemsDict[ordered_keys[i]]
+            assert name_key not in res_num
+            res_num[name_key] = _bitset_size(inter)
+            if res_set is not None:
+                res_set[name_key] = set(_bitset_to_elements(inter, elements))
 
             if not_common is not None:
                 assert name_key not in not_common
                 not_common[name_key] = {}
                 for i in set_pos:
-                    name_i = ordered_keys[i]
-                    extra_tmp = list(set(setsElemsDict[name_i]) \
-                                                        - res_set[name_key])
-                    if len(extra_tmp) > 0:
-                        not_common[name_key][name_i] = extra_tmp
+                    extra = bitsets[i] & ~inter
+                    if extra != 0:
+                        not_common[name_key][ordered_keys[i]] = \
+                                            _bitset_to_elements(extra, elements)
+        prev_level = level
 
-    #print (res_set)
-    res_num = {} 
-    for v in res_set:
-        res_num[v] = len(res_set[v])
-    
     return res_num, res_set
 #~ def getCommonSetsSizes_venn()
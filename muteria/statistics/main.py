@@ -2,7 +2,6 @@
 from __future__ import print_function
 
 import os
-import shutil
 import logging
 from jinja2 import Template
 import webbrowser
@@ -29,7 +28,9 @@ class StatsComputer(object):
     @staticmethod
     def merge_lmatrix_into_right(lmatrix_file, rmatrix_file):
         if not os.path.isfile(rmatrix_file):
-            shutil.copy2(lmatrix_file, rmatrix_file)
+            # Serialize in the format of rmatrix_file's name
+            lmatrix = common_matrices.ExecutionMatrix(filename=lmatrix_file)
+            lmatrix.serialize(out_filename=rmatrix_file)
         else:
             lmatrix = common_matrices.ExecutionMatrix(filename=lmatrix_file)
             rmatrix = common_matrices.ExecutionMatrix(filename=rmatrix_file)
@@ -41,7 +42,10 @@ class StatsComputer(object):
     @staticmethod
     def merge_lexecoutput_into_right(lexecoutput_file, rexecoutput_file):
         if not os.path.isfile(rexecoutput_file):
-            shutil.copy2(lexecoutput_file, rexecoutput_file)
+            # Serialize in the format of rexecoutput_file's name
+            lexecoutput = common_matrices.OutputLogData(\
+                                                    filename=lexecoutput_file)
+            lexecoutput.serialize(out_filename=rexecoutput_file)
         else:
             lexecoutput = common_matrices.OutputLogData(\
                                                     filename=lexecoutput_file)
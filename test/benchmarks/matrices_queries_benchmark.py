@@ -0,0 +1,80 @@
+""" Benchmark of the ExecutionMatrix queries (query_*_of_rows and
+    query_*_of_columns), comparing the vectorized path used with the
+    default cell predicates to the per-cell path used with custom
+    predicates.
+
+    Usage: python matrices_queries_benchmark.py [--rows N] [--cols N]
+"""
+
+from __future__ import print_function
+
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import muteria.common.matrices as common_matrices
+
+QUERIES = ['query_active_columns_of_rows', 'query_active_rows_of_columns', \
+            'query_inactive_columns_of_rows', 'query_inactive_rows_of_columns',\
+            'query_uncertain_columns_of_rows', \
+            'query_uncertain_rows_of_columns']
+
+def make_matrix(n_rows, n_cols, custom_predicates=False, seed=0):
+    cols = ['test_'+str(i) for i in range(n_cols)]
+    keys = ['mutant_'+str(i) for i in range(n_rows)]
+    kwargs = {}
+    if custom_predicates:
+        kwargs = dict(is_active_cell_func=lambda x: x > 0, \
+                        is_inactive_cell_func=lambda x: x == 0, \
+                        is_uncertain_cell_func=lambda x: x < 0)
+    mat = common_matrices.RawExecutionMatrix(non_key_col_list=cols, **kwargs)
+    # Fill the dataframe directly, the benchmark is about the queries
+    values = np.random.RandomState(seed).randint(-1, 2, size=(n_rows, n_cols))
+    dataframe = pd.DataFrame(values, columns=cols)
+    dataframe.insert(0, mat.get_key_colname(), keys)
+    mat.dataframe = dataframe
+    mat.keys_set = set(keys)
+    return mat
+#~ def make_matrix()
+
+def time_queries(mat):
+    times = {}
+    results = {}
+    for query in QUERIES:
+        start = time.time()
+        results[query] = getattr(mat, query)()
+        times[query] = time.time() - start
+    return times, results
+#~ def time_queries()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--cols', type=int, default=10000)
+    parser.add_argument('--skip_per_cell', action='store_true', \
+                                help="Only run the vectorized queries")
+    args = parser.parse_args()
+
+    print("# Matrix of", args.rows, "rows and", args.cols, "columns")
+    vect_times, vect_res = time_queries(make_matrix(args.rows, args.cols))
+    if args.skip_per_cell:
+        for query in QUERIES:
+            print("{:<35} {:>10.2f}s".format(query, vect_times[query]))
+        return
+
+    cell_times, cell_res = time_queries(make_matrix(args.rows, args.cols, \
+                                                    custom_predicates=True))
+    print("{:<35} {:>11} {:>11} {:>8}".format("query", "vectorized", \
+                                                    "per-cell", "speedup"))
+    for query in QUERIES:
+        assert vect_res[query] == cell_res[query], "result mismatch"
+        print("{:<35} {:>10.2f}s {:>10.2f}s {:>7.1f}x".format(query, \
+                                vect_times[query], cell_times[query], \
+                                cell_times[query] / max(vect_times[query], \
+                                                                    1e-9)))
+#~ def main()
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ import unittest
 import doctest
 
 import muteria.common.fs as common_fs
+import muteria.drivers.checkpoint_handler as checkpoint_handler
 
 TMP_DIR_SUFFIX = '.muteria.test.tmp'
 
@@ -89,6 +90,172 @@ class Test_JSON_CSV(unittest.TestCase):
         self.assertEqual(res, exp)
         os.remove(cfilename)
 
+class Test_StageFile(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._worktmpdir = tempfile.mkdtemp(suffix=TMP_DIR_SUFFIX)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls._worktmpdir)
+
+    def _write(self, name, content):
+        pathname = os.path.join(self._worktmpdir, name)
+        with open(pathname, 'w') as f:
+            f.write(content)
+        return pathname
+
+    def _read(self, pathname):
+        with open(pathname) as f:
+            return f.read()
+
+    def test_stage_over_hard_linked_dest(self):
+        src1 = self._write('src1', 'exe 1')
+        src2 = self._write('src2', 'exe 2')
+        dest = os.path.join(self._worktmpdir, 'dest')
+
+        # dest is hard linked to src1
+        os.link(src1, dest)
+        self.assertTrue(os.path.samefile(src1, dest))
+
+        method = common_fs.stage_file(src2, dest)
+        self.assertIn(method, (common_fs.StagingMethods.HARDLINK, \
+                                        common_fs.StagingMethods.REFLINK, \
+                                        common_fs.StagingMethods.COPY))
+        self.assertEqual(self._read(dest), 'exe 2')
+        self.assertEqual(self._read(src1), 'exe 1')
+        self.assertFalse(os.path.samefile(src1, dest))
+
+        # Rewrite the staged dest
+        src3 = self._write('src3', 'exe 3')
+        common_fs.stage_file(src3, dest)
+        self.assertEqual(self._read(dest), 'exe 3')
+        self.assertEqual(self._read(src1), 'exe 1')
+        self.assertEqual(self._read(src2), 'exe 2')
+
+class Test_IndexedArchive(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._worktmpdir = tempfile.mkdtemp(suffix=TMP_DIR_SUFFIX)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls._worktmpdir)
+
+    def _make_dir(self, name):
+        top = os.path.join(self._worktmpdir, name)
+        for mid in ('1', '2'):
+            os.makedirs(os.path.join(top, mid))
+            exe = os.path.join(top, mid, 'prog')
+            with open(exe, 'w') as f:
+                f.write('mutant '+mid)
+            os.chmod(exe, 0o755)
+        return top
+
+    def _check_extract(self, archive, top, use_mmap):
+        shutil.rmtree(top, ignore_errors=True)
+        name = os.path.join(os.path.basename(top), '2', 'prog')
+        res = common_fs.IndexedArchive.extractFromArchive(archive, name, \
+                                                        use_mmap=use_mmap)
+        self.assertEqual(res, None)
+        with open(os.path.join(top, '2', 'prog')) as f:
+            self.assertEqual(f.read(), 'mutant 2')
+        self.assertTrue(os.access(os.path.join(top, '2', 'prog'), os.X_OK))
+        self.assertFalse(os.path.isdir(os.path.join(top, '1')))
+        self.assertNotEqual(common_fs.IndexedArchive.extractFromArchive(\
+                                                    archive, name+'x'), None)
+
+    def test_compress_extract(self):
+        top = self._make_dir('idxar')
+        res = common_fs.IndexedArchive.compressDir(top, \
+                                                    remove_in_directory=True)
+        self.assertEqual(res, None)
+        archive = common_fs.IndexedArchive.get_archive_filename_of(top)
+        self.assertTrue(common_fs.IndexedArchive.is_archive_file(archive))
+        self.assertFalse(os.path.isdir(top))
+        for use_mmap in (False, True):
+            self._check_extract(archive, top, use_mmap)
+
+        # folder
+        shutil.rmtree(top)
+        res = common_fs.IndexedArchive.extractFromArchive(archive, \
+                        os.path.join(os.path.basename(top), '1'), \
+                                                            is_folder=True)
+        self.assertEqual(res, None)
+        self.assertTrue(os.path.isfile(os.path.join(top, '1', 'prog')))
+
+    def test_migrate_from_targz(self):
+        top = self._make_dir('targz')
+        common_fs.TarGz.compressDir(top, remove_in_directory=True)
+        tar_archive = common_fs.TarGz.get_archive_filename_of(top)
+        res = common_fs.IndexedArchive.migrateFromTarGz(tar_archive)
+        self.assertEqual(res, None)
+        self.assertFalse(os.path.isfile(tar_archive))
+        self._check_extract(\
+                    common_fs.IndexedArchive.get_archive_filename_of(top), \
+                                                        top, use_mmap=False)
+
+class Test_CheckpointJournal(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._worktmpdir = tempfile.mkdtemp(suffix=TMP_DIR_SUFFIX)
+        cls.store = os.path.join(cls._worktmpdir, "cp.json")
+        cls.backup = os.path.join(cls._worktmpdir, "cp.json.bak")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls._worktmpdir)
+
+    def tearDown(self):
+        checkpoint_handler.set_journal_compaction_period(None)
+        common_fs.CheckpointState(self.store, self.backup)\
+                                                        .destroy_checkpoint()
+
+    def _run_checkpoints(self, handler, payload, start, stop):
+        for i in range(start, stop):
+            payload[0]['t'+str(i)] = i
+            payload[1]['t'+str(i)] = {'out': str(i)}
+            handler.do_checkpoint(func_name="runtests", taskid=1, \
+                                        tool="tool"+str(i), opt_payload=payload)
+
+    def test_journal_replay(self):
+        checkpoint_handler.set_journal_compaction_period(4)
+        state = common_fs.CheckpointState(self.store, self.backup)
+        handler = checkpoint_handler.CheckPointHandler(state)
+        payload = [{}, {}]
+        self._run_checkpoints(handler, payload, 0, 6)
+        # The 4th checkpoint compacted the journal
+        self.assertEqual(len(state.load_journal()), 2)
+        self.assertEqual(len(state.load_journal()[-1]\
+                [checkpoint_handler.CheckPointHandler.OPT_PAYLOAD_KEY][0]), 1)
+
+        # Resume from a new state object (a partial record is ignored)
+        with open(state.journal_filepath, 'a') as f:
+            f.write('{"partial')
+        resumed = checkpoint_handler.CheckPointHandler(\
+                            common_fs.CheckpointState(self.store, self.backup))
+        self.assertEqual(resumed.get_optional_payload(), \
+                                                json.loads(json.dumps(payload)))
+        self.assertFalse(resumed.is_to_execute("runtests", 1, "tool5"))
+        self.assertTrue(resumed.is_to_execute("runtests", 1, "tool6"))
+
+        # Continue after resume, then resume again
+        payload = resumed.get_optional_payload()
+        self._run_checkpoints(resumed, payload, 6, 8)
+        resumed_again = checkpoint_handler.CheckPointHandler(\
+                            common_fs.CheckpointState(self.store, self.backup))
+        self.assertEqual(resumed_again.get_optional_payload(), payload)
+        self.assertEqual(len(payload[0]), 8)
+
+        # Same as without journal
+        checkpoint_handler.set_journal_compaction_period(None)
+        resumed_again.destroy()
+        no_journal = checkpoint_handler.CheckPointHandler(\
+                            common_fs.CheckpointState(self.store, self.backup))
+        no_journal_payload = [{}, {}]
+        self._run_checkpoints(no_journal, no_journal_payload, 0, 8)
+        self.assertEqual(no_journal.current_data, resumed_again.current_data)
+
 class Test_Compress_Decompress(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -2,6 +2,8 @@ from __future__ import print_function
 
 import os
 import sys
+import copy
+import json
 import shutil
 import unittest
 from unittest.mock import patch
@@ -70,6 +72,198 @@ class Test_Matrices(unittest.TestCase):
 
         # TODO: add scenario with loading error (wrong col list...)
 
+    def test_add_rows_by_keys(self):
+        cols = ['a', 'b', 'c']
+        rows = {'k%d' % i: [i % 3 - 1, 1, 0] for i in range(10)}
+        rows['kd'] = {'a': 1, 'c': -1, 'b': 0}
+        for mat_class in (common_matrices.ExecutionMatrix, \
+                                    common_matrices.BitPackedExecutionMatrix):
+            one_by_one = mat_class(non_key_col_list=cols)
+            for k, v in rows.items():
+                one_by_one.add_row_by_key(k, v, serialize=False)
+            batched = mat_class(filename=self.filename, non_key_col_list=cols)
+            with batched.bulk_row_adder() as batch:
+                batch.update(rows)
+            self.assertEqual(list(batched.get_keys()), list(rows))
+            self.assertEqual(batched._get_key_values_dict(), \
+                                            one_by_one._get_key_values_dict())
+            self.assertEqual(mat_class(filename=self.filename)\
+                                                    ._get_key_values_dict(), \
+                                            one_by_one._get_key_values_dict())
+            os.remove(self.filename)
+
+    def test_binary_file_format(self):
+        cols = ['a', 'b', 'c']
+        rows = {'k1': [1, 0, -1], 'k2': [0, 0, 1], 'k3': [-1, 1, 0]}
+        bin_filename = self.filename + \
+                                common_matrices.BINARY_MATRIX_FILE_EXTENSION
+        csv_filename = self.filename + '.export.csv'
+        for mat_class in (common_matrices.ExecutionMatrix, \
+                                    common_matrices.BitPackedExecutionMatrix):
+            mat = mat_class(filename=bin_filename, non_key_col_list=cols)
+            mat.add_rows_by_keys(rows, serialize=False)
+            common_matrices.set_matrix_file_format(\
+                                    common_matrices.MatrixFileFormat.BINARY)
+            try:
+                self.assertEqual(common_matrices.get_matrix_file_extension(),\
+                                common_matrices.BINARY_MATRIX_FILE_EXTENSION)
+                mat.serialize()
+                # The files named '.csv' remain CSV
+                mat.serialize(out_filename=csv_filename)
+            finally:
+                common_matrices.set_matrix_file_format(\
+                                    common_matrices.MatrixFileFormat.CSV)
+            with open(bin_filename, 'rb') as f:
+                self.assertEqual(f.read(8), b'MUTMTX01')
+            with open(csv_filename) as f:
+                self.assertEqual(f.readline().split(), \
+                                            [mat.get_key_colname()] + cols)
+
+            # Any backend reads both formats
+            for load_class in (common_matrices.ExecutionMatrix, \
+                                    common_matrices.BitPackedExecutionMatrix):
+                for filename in (bin_filename, csv_filename):
+                    loaded = load_class(filename=filename)
+                    self.assertEqual(list(loaded.get_keys()), list(rows))
+                    self.assertEqual(loaded.get_nonkey_colname_list(), cols)
+                    self.assertEqual(loaded._get_key_values_dict(), \
+                                                mat._get_key_values_dict())
+                loaded.update_cells('k1', {'a': 0})
+                self.assertEqual(loaded.query_inactive_rows_of_columns(['a']),\
+                                                        {'a': ['k1', 'k2']})
+            os.remove(bin_filename)
+
+    def test_bitpacked_backend(self):
+        cols = ['a', 'b', 'c', 'd']
+        rows = {'k1': [1, 0, -1, 5], 'k2': [0, 0, 1, -1], 'k3': [-1, 3, 0, 0]}
+        pd_mat = common_matrices.ExecutionMatrix(non_key_col_list=cols)
+        common_matrices.set_execution_matrix_backend(\
+                                    common_matrices.MatrixBackend.BITPACKED)
+        try:
+            bp_mat = common_matrices.ExecutionMatrix(filename=self.filename,\
+                                                        non_key_col_list=cols)
+        finally:
+            common_matrices.set_execution_matrix_backend(\
+                            common_matrices.MatrixBackend.PANDAS_DATAFRAME)
+        self.assertIsInstance(bp_mat, \
+                                    common_matrices.BitPackedExecutionMatrix)
+        for k, v in rows.items():
+            pd_mat.add_row_by_key(k, v, serialize=False)
+            bp_mat.add_row_by_key(k, dict(zip(cols, v)), serialize=False)
+        bp_mat.serialize()
+
+        for mat in (bp_mat, \
+                    common_matrices.BitPackedExecutionMatrix(\
+                                                    filename=self.filename)):
+            self.assertEqual(list(mat.get_keys()), ['k1', 'k2', 'k3'])
+            for query in ('query_active_columns_of_rows', \
+                            'query_active_rows_of_columns', \
+                            'query_inactive_columns_of_rows', \
+                            'query_inactive_rows_of_columns', \
+                            'query_uncertain_columns_of_rows', \
+                            'query_uncertain_rows_of_columns'):
+                self.assertEqual(getattr(mat, query)(), \
+                                            getattr(pd_mat, query)(), query)
+            self.assertEqual(mat._get_key_values_dict(['k3']), \
+                                    {'k3': {'a': -1, 'b': 1, 'c': 0, 'd': 0}})
+
+        sub_mat = bp_mat.extract_by_column(['d', 'a'])
+        self.assertEqual(sub_mat.query_active_rows_of_columns(), \
+                                                {'d': ['k1'], 'a': ['k1']})
+        sub_mat = bp_mat.extract_by_rowkey(['k2'])
+        self.assertEqual(sub_mat.query_uncertain_columns_of_rows(), \
+                                                                {'k2': ['d']})
+
+        other = common_matrices.BitPackedExecutionMatrix(\
+                                                non_key_col_list=['d', 'e'])
+        other.add_row_by_key('k2', [1, 1])
+        other.add_row_by_key('k4', [0, 1])
+        bp_mat.update_with_other_matrix(other, override_existing=True, \
+                                                            allow_missing=True)
+        self.assertEqual(bp_mat.get_nonkey_colname_list(), \
+                                                ['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual(bp_mat.query_active_columns_of_rows(['k2', 'k4']), \
+                                        {'k2': ['c', 'd', 'e'], 'k4': ['e']})
+        self.assertEqual(bp_mat.query_uncertain_columns_of_rows(['k1']), \
+                                                            {'k1': ['c', 'e']})
+
+        bp_mat.delete_rows_by_key(['k1', 'k3'], serialize=False)
+        self.assertEqual(list(bp_mat.get_keys()), ['k2', 'k4'])
+        self.assertEqual(bp_mat.query_inactive_rows_of_columns(['a', 'b']), \
+                                            {'a': ['k2'], 'b': ['k2']})
+
+    def test_states_arrays(self):
+        cols = ['a', 'b', 'c']
+        rows = {'k1': [1, 0, -1], 'k2': [0, 3, 1]}
+        active = [[False, True, False], [True, False, False]]
+        uncertain = [[True, False, False], [False, False, True]]
+        expected = {'k1': {'a': -1, 'b': 1, 'c': 0}, \
+                                        'k2': {'a': 1, 'b': 0, 'c': -1}}
+        for mat_class in (common_matrices.ExecutionMatrix, \
+                                    common_matrices.BitPackedExecutionMatrix):
+            mat = mat_class(non_key_col_list=cols)
+            mat.add_rows_by_keys(rows, serialize=False)
+            mat_active, mat_uncertain = mat.get_states_arrays()
+            self.assertEqual(mat_active.tolist(), \
+                                [[True, False, False], [False, True, True]])
+            self.assertEqual(mat_uncertain.tolist(), \
+                                [[False, False, True], [False, False, False]])
+            mat.set_cells_from_states(active, uncertain)
+            self.assertEqual(list(mat.get_keys()), ['k1', 'k2'])
+            self.assertEqual(mat._get_key_values_dict(), expected)
+
+    def test_outlogdata_binary_file_format(self):
+        outlog = common_matrices.OutputLogData
+        def _dat(out_len, out_hash, retcode, timedout):
+            return {outlog.OUTLOG_LEN: out_len, outlog.OUTLOG_HASH: out_hash,
+                    outlog.RETURN_CODE: retcode, outlog.TIMEDOUT: timedout}
+        orig = {'p': {'t1': _dat(3, 'h1', 0, False),
+                        't2': _dat(2, 'h2', 1, True),
+                        't3': _dat(0, 'h3', 0, False)}}
+        muts = {'m1': {'t1': _dat(3, 'h1', 0, False),
+                        't2': _dat(5, 'h4', 1, True),
+                        't3': _dat(0, 'h1', 0, False)},
+                'm2': {'t1': dict(outlog.UNCERTAIN_TEST_OUTLOGDATA),
+                        't3': _dat(0, 'h3', 70000, False)},
+                'm3': {}}
+        orig_filename = self.filename + '.orig' + \
+                                common_matrices.BINARY_MATRIX_FILE_EXTENSION
+        bin_filename = self.filename + \
+                                common_matrices.BINARY_MATRIX_FILE_EXTENSION
+        json_filename = self.filename + '.export.json'
+        common_matrices.set_matrix_file_format(\
+                                    common_matrices.MatrixFileFormat.BINARY)
+        try:
+            self.assertEqual(common_matrices.get_matrix_file_extension(\
+                        '.json'), common_matrices.BINARY_MATRIX_FILE_EXTENSION)
+            for filename, data in ((orig_filename, orig), \
+                                                    (bin_filename, muts)):
+                out = outlog(filename=filename)
+                out.add_data(copy.deepcopy(data), check_all=False, \
+                                                            serialize=True)
+            # The JSON named files are always JSON
+            out.serialize(out_filename=json_filename)
+        finally:
+            common_matrices.set_matrix_file_format(\
+                                    common_matrices.MatrixFileFormat.CSV)
+        with open(bin_filename, 'rb') as f:
+            self.assertEqual(f.read(8), b'MUTMTX01')
+        with open(json_filename) as f:
+            self.assertEqual(json.load(f), muts)
+
+        expected = {'m1': {'t3'}, 'm2': {'t1', 't3'}, 'm3': set()}
+        for filename in (bin_filename, json_filename):
+            self.assertEqual(outlog(filename=filename)\
+                    .get_tests_not_equiv_to(outlog(filename=orig_filename)), \
+                                                                    expected)
+            # Same as the nested dicts data
+            loaded = outlog(filename=filename)
+            self.assertEqual(dict(loaded.get_zip_objective_and_data()), muts)
+            self.assertEqual(loaded.get_tests_not_equiv_to(\
+                                outlog(filename=orig_filename)), expected)
+            os.remove(filename)
+        os.remove(orig_filename)
+
 def load_tests(loader, tests, ignore):
     """ Doc tests discovery (doctest discovered by unittest)
     """
@@ -0,0 +1,57 @@
+from __future__ import print_function
+
+import os
+import sys
+import resource
+import threading
+
+import unittest
+
+from muteria.drivers import DriversUtils
+
+class Test_UnlimitedStack(unittest.TestCase):
+    def setUp(self):
+        self.limit = resource.getrlimit(resource.RLIMIT_STACK)
+        if self.limit[0] == resource.RLIM_INFINITY or \
+                                    self.limit[1] != resource.RLIM_INFINITY:
+            self.skipTest("needs a limited soft and unlimited hard stack")
+
+    def tearDown(self):
+        resource.setrlimit(resource.RLIMIT_STACK, self.limit)
+
+    def test_overlapping_contexts(self):
+        def soft():
+            return resource.getrlimit(resource.RLIMIT_STACK)[0]
+        first_in = threading.Event()
+        second_in = threading.Event()
+        first_out = threading.Event()
+        seen = []
+
+        def first():
+            with DriversUtils.unlimited_stack():
+                first_in.set()
+                second_in.wait()
+            first_out.set()
+        def second():
+            first_in.wait()
+            with DriversUtils.unlimited_stack():
+                second_in.set()
+                first_out.wait()
+                # The first context exited, the second still runs
+                seen.append(soft())
+
+        threads = [threading.Thread(target=first), \
+                                        threading.Thread(target=second)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(seen, [resource.RLIM_INFINITY])
+        self.assertEqual(soft(), self.limit[0])
+
+if __name__ == '__main__':
+    verbosity = 2
+
+    testsuite_stack = unittest.TestLoader().loadTestsFromTestCase(\
+                                                        Test_UnlimitedStack)
+    unittest.TextTestRunner(verbosity=verbosity).run(testsuite_stack)
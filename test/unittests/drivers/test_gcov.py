@@ -0,0 +1,85 @@
+from __future__ import print_function
+
+import os
+import sys
+
+import unittest
+
+import muteria.drivers.criteria as criteria
+import muteria.drivers.criteria.tools_by_languages.c.gcov.gcov as gcov_tool
+
+# '.gcov' file generated with 'gcov -b -c'
+DOT_GCOV_LINES = """\
+        -:    0:Source:prog.c
+        -:    0:Runs:1
+        -:    1:#include <stdio.h>
+function main called 1 returned 100% blocks executed 80%
+        1:    2:int main(int argc, char **argv) {
+        1:    3:    if (argc > 1)
+branch  0 taken 0 (fallthrough)
+branch  1 taken 1
+    #####:    4:        puts("x");
+call    0 never executed
+        1:    5:    return f(argc) > 0 ? 1 : 0;
+call    0 returned 1
+branch  1 taken 1 (fallthrough)
+branch  2 taken 0
+        -:    6:}
+""".splitlines(True)
+
+# The same coverage, from 'gcov -b --json-format --stdout'
+JSON_FILE_OBJ = {
+    'file': 'prog.c',
+    'functions': [{'name': 'main', 'execution_count': 1, 'start_line': 2}],
+    'lines': [
+        {'line_number': 2, 'count': 1, 'branches': []},
+        {'line_number': 3, 'count': 1, 'branches': [
+                    {'count': 0, 'fallthrough': True, 'throw': False},
+                    {'count': 1, 'fallthrough': False, 'throw': False}]},
+        {'line_number': 4, 'count': 0, 'branches': []},
+        {'line_number': 5, 'count': 1, 'branches': [
+                    {'count': 1, 'fallthrough': True, 'throw': False},
+                    {'count': 0, 'fallthrough': False, 'throw': False}]},
+    ]
+}
+
+class Test_GCovParsing(unittest.TestCase):
+    def setUp(self):
+        # The parsing does not need an initialized tool
+        self.tool = gcov_tool.CriteriaToolGCov.__new__(\
+                                                gcov_tool.CriteriaToolGCov)
+        self.tool._get_source_of_interest = lambda src: src
+        self.criteria = [criteria.TestCriteria.STATEMENT_COVERAGE, \
+                                    criteria.TestCriteria.BRANCH_COVERAGE, \
+                                    criteria.TestCriteria.FUNCTION_COVERAGE]
+
+    def test_same_elements_in_text_and_json(self):
+        text_res = {c: {} for c in self.criteria}
+        self.tool._add_dot_gcov_coverage(DOT_GCOV_LINES, text_res)
+        json_res = {c: {} for c in self.criteria}
+        self.tool._add_json_file_coverage(JSON_FILE_OBJ, json_res)
+
+        self.assertEqual(text_res, json_res)
+        # The branches are numbered in their line, without the calls
+        self.assertEqual(text_res[criteria.TestCriteria.BRANCH_COVERAGE], \
+                                {'prog.c:3:0': 0, 'prog.c:3:1': 1, \
+                                    'prog.c:5:0': 1, 'prog.c:5:1': 0})
+        self.assertEqual(text_res[criteria.TestCriteria.STATEMENT_COVERAGE], \
+                                {'prog.c:2': 1, 'prog.c:3': 1, \
+                                    'prog.c:4': 0, 'prog.c:5': 1})
+        self.assertEqual(text_res[criteria.TestCriteria.FUNCTION_COVERAGE], \
+                                                        {'prog.c:main': 1})
+
+    def test_source_not_of_interest(self):
+        self.tool._get_source_of_interest = lambda src: None
+        res = {c: {} for c in self.criteria}
+        self.tool._add_dot_gcov_coverage(DOT_GCOV_LINES, res)
+        self.tool._add_json_file_coverage(JSON_FILE_OBJ, res)
+        self.assertEqual(res, {c: {} for c in self.criteria})
+
+if __name__ == '__main__':
+    verbosity = 2
+
+    testsuite_gcov = unittest.TestLoader().loadTestsFromTestCase(\
+                                                            Test_GCovParsing)
+    unittest.TextTestRunner(verbosity=verbosity).run(testsuite_gcov)
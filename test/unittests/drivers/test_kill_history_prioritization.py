@@ -0,0 +1,157 @@
+from __future__ import print_function
+
+import os
+import sys
+import shutil
+import tempfile
+
+import unittest
+
+import muteria.common.mix as common_mix
+import muteria.common.matrices as common_matrices
+import muteria.controller.explorer as explorer
+import muteria.drivers.criteria as criteria
+import muteria.drivers.optimizers.criteriatestexecution.tools.\
+                            kill_history_prioritization as kill_history
+
+TMP_DIR_SUFFIX = '.muteria.test.tmp'
+
+FAIL = common_mix.GlobalConstants.FAIL_TEST_VERDICT
+PASS = common_mix.GlobalConstants.PASS_TEST_VERDICT
+UNCERTAIN = common_mix.GlobalConstants.UNCERTAIN_TEST_VERDICT
+
+TESTS = ['t_fast', 't_slow', 't_new']
+# t_new has no recorded time: the median of the others (2.5) is used
+TEST_TO_TIME = {'t_fast': 1.0, 't_slow': 4.0, 't_new': None}
+MUTANTS = ['m1', 'm2']
+ALIAS = 'alias'
+
+class FakeExplorer(object):
+    """ Explorer of the files in a directory, named by their key
+    """
+    def __init__(self, dirpath):
+        self.dirpath = dirpath
+
+    def get_file_pathname(self, key):
+        return os.path.join(self.dirpath, str(key))
+
+    def get_existing_file_pathname(self, key):
+        return self.get_file_pathname(key)
+
+    def file_exists(self, key):
+        return os.path.isfile(self.get_file_pathname(key))
+#~ class FakeExplorer
+
+class Test_KillHistoryPrioritization(unittest.TestCase):
+    def setUp(self):
+        self._worktmpdir = tempfile.mkdtemp(suffix=TMP_DIR_SUFFIX)
+        self.explorer = FakeExplorer(self._worktmpdir)
+
+    def tearDown(self):
+        shutil.rmtree(self._worktmpdir)
+
+    def new_optimizer(self):
+        optimizer = kill_history.CriteriaTestExecutionOptimizer(None, \
+                        self.explorer, criteria.TestCriteria.STRONG_MUTATION)
+        optimizer.reset(ALIAS, MUTANTS, TESTS, \
+                                        test_to_execution_time=TEST_TO_TIME)
+        return optimizer
+
+    def write_matrix(self, criterion, mutant_to_active_tests):
+        matrix = common_matrices.ExecutionMatrix(\
+                filename=self.explorer.get_file_pathname(\
+                                explorer.TMP_CRITERIA_MATRIX[criterion]), \
+                non_key_col_list=TESTS)
+        active = matrix.getActiveCellDefaultVal()
+        inactive = matrix.getInactiveCellVal()
+        matrix.add_rows_by_keys({ALIAS + ':' + m: \
+                    {t: (active if t in tests else inactive) for t in TESTS} \
+                        for m, tests in mutant_to_active_tests.items()})
+
+    def test_order_by_time(self):
+        # Same kill rate without history: the cheapest first
+        optimizer = self.new_optimizer()
+        self.assertEqual(optimizer._get_ordered_tests('m1'), \
+                                                ['t_fast', 't_new', 't_slow'])
+
+    def test_order_by_kill_rate(self):
+        optimizer = self.new_optimizer()
+        optimizer.history[optimizer.KILLS_KEY] = {'t_slow': 20, 't_fast': 0}
+        optimizer.history[optimizer.RUNS_KEY] = {'t_slow': 20, 't_fast': 10}
+        # kill rate per second: 21/22/4, 1/2/2.5, 1/12/1
+        self.assertEqual(optimizer._get_ordered_tests('m1'), \
+                                                ['t_slow', 't_new', 't_fast'])
+        # The previous killer comes first
+        optimizer.history[optimizer.KILLERS_KEY] = {ALIAS + ':m1': 't_fast'}
+        self.assertEqual(optimizer._get_ordered_tests('m1'), \
+                                                ['t_fast', 't_slow', 't_new'])
+        self.assertEqual(optimizer._get_ordered_tests('m2'), \
+                                                ['t_slow', 't_new', 't_fast'])
+        # Also through the test execution optimizer
+        self.assertEqual(optimizer.get_test_execution_optimizer('m1')\
+                                .select_tests(100, is_proportion=True), \
+                                                ['t_fast', 't_slow', 't_new'])
+
+    def test_weak_mutation_and_coverage_weighting(self):
+        self.write_matrix(criteria.TestCriteria.WEAK_MUTATION, \
+                                                        {'m1': {'t_slow'}})
+        self.write_matrix(criteria.TestCriteria.MUTANT_COVERAGE, \
+                                    {'m1': set(TESTS), 'm2': {'t_new'}})
+        optimizer = self.new_optimizer()
+        # The weak mutation is used when available
+        self.assertEqual(optimizer._get_ordered_tests('m1'), \
+                                                ['t_slow', 't_fast', 't_new'])
+        # Otherwise the mutant coverage
+        self.assertEqual(optimizer._get_ordered_tests('m2'), \
+                                                ['t_new', 't_fast', 't_slow'])
+
+    def test_feedback(self):
+        optimizer = self.new_optimizer()
+        killers = optimizer.history[optimizer.KILLERS_KEY]
+        optimizer.feedback('m1', {'t_fast': FAIL, 't_slow': FAIL, \
+                                                            't_new': PASS})
+        self.assertEqual(optimizer.history[optimizer.KILLS_KEY], \
+                                                {'t_fast': 1, 't_slow': 1})
+        self.assertEqual(optimizer.history[optimizer.RUNS_KEY], \
+                                    {'t_fast': 1, 't_slow': 1, 't_new': 1})
+        # The cheapest killer is kept
+        self.assertEqual(killers, {ALIAS + ':m1': 't_fast'})
+
+        # Uncertain verdicts are ignored
+        optimizer.feedback('m1', {'t_fast': UNCERTAIN, 't_slow': PASS})
+        self.assertEqual(optimizer.history[optimizer.KILLS_KEY], \
+                                                {'t_fast': 1, 't_slow': 1})
+        self.assertEqual(optimizer.history[optimizer.RUNS_KEY], \
+                                    {'t_fast': 1, 't_slow': 2, 't_new': 1})
+        self.assertEqual(killers, {ALIAS + ':m1': 't_fast'})
+
+        # The mutant is not killed anymore
+        optimizer.feedback('m1', {'t_fast': PASS, 't_slow': PASS})
+        self.assertEqual(killers, {})
+        self.assertEqual(optimizer.history[optimizer.RUNS_KEY], \
+                                    {'t_fast': 2, 't_slow': 3, 't_new': 1})
+
+    def test_history_persistence(self):
+        optimizer = self.new_optimizer()
+        optimizer.feedback('m2', {'t_slow': FAIL, 't_fast': PASS})
+        # Not yet saved (saved periodically and after the last mutant)
+        self.assertFalse(os.path.isfile(optimizer.history_file))
+        optimizer._save_history()
+        self.assertTrue(os.path.isfile(optimizer.history_file))
+
+        loaded = self.new_optimizer()
+        self.assertEqual(loaded.history, optimizer.history)
+        self.assertEqual(loaded._get_ordered_tests('m2')[0], 't_slow')
+
+        # Saved after the feedback of the last mutant
+        while loaded.has_next_test_objective():
+            loaded.get_next_test_objective()
+        loaded.feedback('m1', {'t_new': FAIL})
+        self.assertEqual(self.new_optimizer().history, loaded.history)
+
+if __name__ == '__main__':
+    verbosity = 2
+
+    testsuite_history = unittest.TestLoader().loadTestsFromTestCase(\
+                                            Test_KillHistoryPrioritization)
+    unittest.TextTestRunner(verbosity=verbosity).run(testsuite_history)
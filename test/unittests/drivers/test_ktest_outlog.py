@@ -0,0 +1,124 @@
+from __future__ import print_function
+
+import os
+import sys
+import random
+import hashlib
+
+import unittest
+
+from muteria.drivers import StreamingOutlogHasher
+from muteria.drivers.testgeneration.testcase_formats.ktest.ktest import \
+                                                                KTestTestFormat
+
+NEW_REGEXES = KTestTestFormat._get_regexes(True)
+OLD_REGEXES = KTestTestFormat._get_regexes(False)
+
+# (regexes, retcode, output, expected (retcode, cleaned output, exit_status))
+OUTPUTS = [
+    # CRLF line breaks
+    (NEW_REGEXES, 0, \
+        "a\r\nKLEE-REPLAY: NOTE: Test file: t.ktest\r\n\r\nb\r\n" \
+        "KLEE-REPLAY: NOTE: EXIT STATUS: NORMAL (0 seconds)\r\n", \
+        (0, "a\n\nb\n@MUTERIA.KLEE-REPLAY: EXIT STATUS: NORMAL\n", None)),
+    # ABNORMAL status and missing final newline
+    (OLD_REGEXES, 1, \
+        "out 1\nklee-replay: TEST CASE: t.ktest\n" \
+        "EXIT STATUS: ABNORMAL 11 (1 seconds)\nlast", \
+        (1, "out 1\n@MUTERIA.KLEE-REPLAY: EXIT STATUS: ABNORMAL 11\nlast", \
+                                                                        11)),
+    # TIMED OUT followed by another status
+    (OLD_REGEXES, 0, \
+        "x\n\nklee-replay: EXIT STATUS: TIMED OUT (3 seconds)\n" \
+        "klee-replay: EXIT STATUS: ABNORMAL 9 (3 seconds)\n", \
+        (KTestTestFormat.timedout_retcodes[0], \
+            "x\n\n@MUTERIA.KLEE-REPLAY: EXIT STATUS: TIMED OUT\n" \
+            "@MUTERIA.KLEE-REPLAY: EXIT STATUS: ABNORMAL 9\n", 9)),
+    # Lone '\r', non ascii and status line without final newline
+    (NEW_REGEXES, 0, \
+        "a\r\rb\n\né\r" \
+        "KLEE-REPLAY: NOTE: EXIT STATUS: ABNORMAL 6 (0 seconds)", \
+        (0, "a\n\nb\n\né\n@MUTERIA.KLEE-REPLAY: EXIT STATUS: ABNORMAL 6", \
+                                                                        6)),
+]
+
+def random_chunks(text, rand):
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + rand.randint(1, 5)
+        chunks.append(text[start:end])
+        start = end
+    return chunks
+#~ def random_chunks()
+
+def sha512_len_and_hash(text):
+    return len(text), \
+        hashlib.sha512(text.encode('utf-8', 'backslashreplace')).hexdigest()
+#~ def sha512_len_and_hash()
+
+class Test_OutputNoiseRemover(unittest.TestCase):
+    def remove_noise_by_chunks(self, regexes, retcode, chunks):
+        res = []
+        noise_remover = KTestTestFormat.OutputNoiseRemover(regexes[0], \
+                                                    regexes[1], res.append)
+        for chunk in chunks:
+            noise_remover.feed(chunk)
+        retcode, exit_status = noise_remover.finish(retcode)
+        return retcode, ''.join(res), exit_status
+
+    def test_one_shot(self):
+        for regexes, retcode, out, expected in OUTPUTS:
+            self.assertEqual(KTestTestFormat._remove_output_noise(retcode, \
+                                            out, *regexes), expected, out)
+
+    def test_split_in_two_chunks(self):
+        # Cover the split of '\r\n' across the chunks
+        for regexes, retcode, out, expected in OUTPUTS:
+            for pos in range(len(out) + 1):
+                self.assertEqual(self.remove_noise_by_chunks(regexes, \
+                            retcode, [out[:pos], out[pos:]]), expected, \
+                                                                (out, pos))
+
+    def test_random_chunks(self):
+        rand = random.Random(0)
+        for regexes, retcode, out, expected in OUTPUTS:
+            for _ in range(50):
+                chunks = random_chunks(out, rand)
+                self.assertEqual(self.remove_noise_by_chunks(regexes, \
+                                        retcode, chunks), expected, chunks)
+
+class Test_StreamingOutlogHasher(unittest.TestCase):
+    def test_same_as_whole_log(self):
+        rand = random.Random(0)
+        for _, _, out, _ in OUTPUTS:
+            for _ in range(20):
+                hasher = StreamingOutlogHasher()
+                for chunk in random_chunks(out, rand):
+                    hasher.update(chunk)
+                self.assertEqual(hasher.get_len_and_hash(), \
+                                                    sha512_len_and_hash(out))
+
+    def test_hash_of_cleaned_output(self):
+        rand = random.Random(0)
+        for regexes, retcode, out, expected in OUTPUTS:
+            for _ in range(20):
+                hasher = StreamingOutlogHasher()
+                noise_remover = KTestTestFormat.OutputNoiseRemover(\
+                                    regexes[0], regexes[1], hasher.update)
+                for chunk in random_chunks(out, rand):
+                    noise_remover.feed(chunk)
+                self.assertEqual(noise_remover.finish(retcode), \
+                                                (expected[0], expected[2]))
+                self.assertEqual(hasher.get_len_and_hash(), \
+                                            sha512_len_and_hash(expected[1]))
+
+if __name__ == '__main__':
+    verbosity = 2
+
+    testsuite_noise = unittest.TestLoader().loadTestsFromTestCase(\
+                                                    Test_OutputNoiseRemover)
+    testsuite_hasher = unittest.TestLoader().loadTestsFromTestCase(\
+                                                Test_StreamingOutlogHasher)
+    unittest.TextTestRunner(verbosity=verbosity).run(testsuite_noise)
+    unittest.TextTestRunner(verbosity=verbosity).run(testsuite_hasher)
@@ -0,0 +1,97 @@
+from __future__ import print_function
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+
+import unittest
+
+import muteria.drivers.testgeneration.test_execution_times as \
+                                                        test_execution_times
+
+TMP_DIR_SUFFIX = '.muteria.test.tmp'
+
+class Test_TestExecutionTimes(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._worktmpdir = tempfile.mkdtemp(suffix=TMP_DIR_SUFFIX)
+        cls.filename = os.path.join(cls._worktmpdir, "times.json")
+        cls.legacy_filename = os.path.join(cls._worktmpdir, "legacy.json")
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls._worktmpdir)
+
+    def setUp(self):
+        for filename in (self.filename, self.legacy_filename):
+            if os.path.isfile(filename):
+                os.remove(filename)
+        # median of the 3 latest samples, * 2 * timeout_times, + 0.5
+        self.times = self.new_times()
+
+    def new_times(self):
+        return test_execution_times.TestExecutionTimes(self.filename, \
+                                max_samples=3, percentile=50, \
+                                timeout_factor=2, timeout_margin=0.5)
+
+    def test_timeout(self):
+        for exec_time in (1, 2, 3, 10):
+            self.times.add_sample('t', exec_time)
+        # The oldest sample is dropped
+        self.assertEqual(self.times.samples['t'], [2, 3, 10])
+        self.assertEqual(self.times.get_recorded_time('t'), 3)
+        self.assertEqual(self.times.get_timeout('t', 1.5), \
+                                                        3 * 2 * 1.5 + 0.5)
+
+    def test_sample_precision(self):
+        self.times.add_sample('t', 0.12345)
+        self.assertEqual(self.times.samples['t'], [0.123])
+
+    def test_no_sample(self):
+        self.assertFalse(self.times.has_test('t'))
+        self.assertIsNone(self.times.get_timeout('t', 1))
+
+    def test_legacy(self):
+        with open(self.legacy_filename, 'w') as f:
+            json.dump({'t1': 8, 't2': 5}, f)
+        self.times.add_sample('t2', 1)
+        self.times.load_legacy(self.legacy_filename)
+        # The legacy times include the timeout factor
+        self.assertEqual(self.times.samples['t1'], [4.0])
+        # The recorded samples are kept
+        self.assertEqual(self.times.samples['t2'], [1])
+        self.assertEqual(sorted(self.times.get_tests()), ['t1', 't2'])
+
+    def test_serialize(self):
+        self.times.add_sample('t', 1.5)
+        self.times.add_sample('t', 2.5)
+        self.times.serialize()
+        loaded = self.new_times()
+        self.assertEqual(loaded.samples, {'t': [1.5, 2.5]})
+        self.assertEqual(loaded.get_timeout('t', 1), \
+                                            self.times.get_timeout('t', 1))
+
+    def test_account_timed_out(self):
+        self.assertEqual(self.times.get_timeout_savings(), (0, 0.0))
+        for exec_time in (2, 3, 10):
+            self.times.add_sample('t1', exec_time)
+        self.times.add_sample('t2', 0.2)
+        # former timeout: int(latest sample) * 2 * timeout_times
+        self.times.account_timed_out('t1', 1.5)
+        n_timeouts, saved = self.times.get_timeout_savings()
+        self.assertEqual(n_timeouts, 1)
+        self.assertAlmostEqual(saved, 10 * 2 * 1.5 - (3 * 2 * 1.5 + 0.5))
+        # former timeout of at least 1 second * 2 * timeout_times
+        self.times.account_timed_out('t2', 1)
+        n_timeouts, saved = self.times.get_timeout_savings()
+        self.assertEqual(n_timeouts, 2)
+        self.assertAlmostEqual(saved, 20.5 + 1 * 2 * 1 - (0.2 * 2 * 1 + 0.5))
+
+if __name__ == '__main__':
+    verbosity = 2
+
+    testsuite_times = unittest.TestLoader().loadTestsFromTestCase(\
+                                                    Test_TestExecutionTimes)
+    unittest.TextTestRunner(verbosity=verbosity).run(testsuite_times)
@@ -8,6 +8,7 @@ import shutil
 import tempfile
 import filecmp
 import logging
+import threading
 
 import unittest
 from unittest.mock import patch, PropertyMock, MagicMock
@@ -79,6 +80,89 @@ class Test_RepositoryManager_Command(unittest.TestCase):
                                     callback_object=DefaultCallbackObject())
         self.assertEqual(res, (True, True))
 
+class Test_RepositoryManager_Pool(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls._worktmpdir = tempfile.mkdtemp(suffix=TMP_DIR_SUFFIX)
+        cls._repodir = os.path.join(cls._worktmpdir, "repodir")
+        cls._exe = os.path.join(cls._repodir, "exe")
+        os.mkdir(cls._repodir)
+        with open(cls._exe, 'w') as f:
+            f.write("exe")
+        with patch.object(rm.common_mix, 'confirm_execution', \
+                                                    side_effect=[True, True]):
+            cls.rep_mgr = rm.RepositoryManager(cls._repodir, \
+                            repo_executables_relpaths=["exe"], \
+                            dev_test_runner_func=cls.read_exe_runner, \
+                            parallelism=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        if os.path.isdir(cls._worktmpdir):
+            shutil.rmtree(cls._worktmpdir)
+
+    @staticmethod
+    def read_exe_runner(test, repo_root_dir, **kwargs):
+        with open(os.path.join(repo_root_dir, "exe")) as f:
+            return f.read()
+
+    def test_lease_slots(self):
+        with self.rep_mgr.lease_repository_slot() as slot1:
+            with self.rep_mgr.lease_repository_slot() as slot2:
+                self.assertNotEqual(slot1.get_rootdir(), slot2.get_rootdir())
+                self.assertNotEqual(slot1.get_rootdir(), self._repodir)
+                for slot in (slot1, slot2):
+                    res = self.rep_mgr.run_dev_test("anything", \
+                                                            repo_slot=slot)
+                    self.assertEqual(res, (0, "exe", None))
+
+        # changes in the repository are synced into the slots
+        with open(self._exe, 'w') as f:
+            f.write("new exe")
+        for _ in range(2):
+            with self.rep_mgr.lease_repository_slot() as slot:
+                res = self.rep_mgr.run_dev_test("anything", repo_slot=slot)
+                self.assertEqual(res, (0, "new exe", None))
+
+    def test_copy_into_repository_slot(self):
+        with open(self._exe) as f:
+            repo_exe_content = f.read()
+        mutant_exe = os.path.join(self._worktmpdir, "mutant_exe")
+        with open(mutant_exe, 'w') as f:
+            f.write("mutant exe")
+        with self.rep_mgr.lease_repository_slot() as slot:
+            self.rep_mgr.copy_into_repository_slot(slot, \
+                                                    {"exe": mutant_exe})
+            res = self.rep_mgr.run_dev_test("anything", repo_slot=slot)
+            self.assertEqual(res, (0, "mutant exe", None))
+
+        # The repository is unchanged and the slots are restored
+        with open(self._exe) as f:
+            self.assertEqual(f.read(), repo_exe_content)
+        for _ in range(2):
+            with self.rep_mgr.lease_repository_slot() as slot:
+                res = self.rep_mgr.run_dev_test("anything", repo_slot=slot)
+                self.assertEqual(res, (0, repo_exe_content, None))
+
+    def test_lease_waits_for_repository_lock(self):
+        leased = threading.Event()
+        def lease():
+            with self.rep_mgr.lease_repository_slot() as slot:
+                leased.set()
+        # A build may be changing the repository
+        with self.rep_mgr.lock:
+            lease_thread = threading.Thread(target=lease)
+            lease_thread.start()
+            self.assertFalse(leased.wait(0.2))
+            # The lock owner waits for the tests without changing it
+            with self.rep_mgr.lend_lock_to_slot_syncs():
+                self.assertTrue(leased.wait(5))
+            lease_thread.join()
+        # The lock is released
+        with self.rep_mgr.lease_repository_slot() as slot:
+            res = self.rep_mgr.run_dev_test("anything", repo_slot=slot)
+            self.assertEqual(res[0], 0)
+
 if __name__ == "__main__":
     verbosity = 2 # TODO: Check why verbosity has no effect here
     testsuite_rep_mgr = unittest.TestLoader().loadTestsFromTestCase(\
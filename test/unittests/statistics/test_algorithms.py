@@ -40,11 +40,45 @@ class Test_Subsumption(unittest.TestCase):
         res_eq, res_subs = statistics_algorithms.getSubsumingMutants(mutants2tests, clustered=False)
         self.assertEqual(set(res_eq), set(exp_eq))
         self.assertEqual(set(res_subs), set(exp_subs))
-        
+
+    def test_iterSubsumingMutants (self):
+        mutants2tests = {1:[], 2:['a','e'], 3:set(), 4:('e','a'), 5:['c','e'],
+                            6:['a','e','c'], 7:['b'], 8:['b','a']}
+        res_eq = []
+        res_iter = statistics_algorithms.iterSubsumingMutants(mutants2tests,
+                                                    equivalent_mutants=res_eq)
+        # clusters are yielded by increasing number of killing tests
+        self.assertEqual(next(res_iter), (7,))
+        self.assertEqual(list(res_iter), [(2, 4), (5,)])
+        self.assertEqual(res_eq, [1, 3])
+
+class Test_Venn(unittest.TestCase):
+
+    def test_getCommonSetsSizes_venn (self):
+        sets = {'a':{1,2,3}, 'b':{2,3,4}, 'c':{3,5}}
+        not_common = {}
+        res_num, res_set = statistics_algorithms.getCommonSetsSizes_venn(
+                                    sets, setsize_from=2, not_common=not_common)
+        self.assertEqual(res_set, {'a&b':{2,3}, 'a&c':{3}, 'b&c':{3}, 
+                                                                'a&b&c':{3}})
+        self.assertEqual(res_num, {'a&b':2, 'a&c':1, 'b&c':1, 'a&b&c':1})
+        self.assertEqual(not_common['a&b'], {'a':[1], 'b':[4]})
+        self.assertEqual({k: set(v) for k, v in not_common['a&b&c'].items()},
+                                        {'a':{1,2}, 'b':{2,4}, 'c':{5}})
+
+        res_num_only, no_set = statistics_algorithms.getCommonSetsSizes_venn(
+                                                    sets, sizes_only=True)
+        self.assertIsNone(no_set)
+        self.assertEqual(res_num_only['b'], 3)
+        self.assertEqual(res_num_only['a&b&c'], 1)
+
 if __name__ == "__main__":
     #unittest.main()
     verbosity=2 # TODO: Check why verbosity has no effect here
     testsuite_subsumption = unittest.TestLoader().loadTestsFromTestCase(Test_Subsumption)
 
+    testsuite_venn = unittest.TestLoader().loadTestsFromTestCase(Test_Venn)
+
     unittest.TextTestRunner(verbosity=verbosity).run(testsuite_subsumption)
+    unittest.TextTestRunner(verbosity=verbosity).run(testsuite_venn)
 